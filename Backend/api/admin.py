@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import IdempotencyKey
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'user', 'state', 'response_status', 'created_at', 'expires_at')
+    list_filter = ('state',)
+    search_fields = ('key', 'user__username')
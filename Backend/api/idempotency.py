@@ -0,0 +1,119 @@
+"""
+Cabecera Idempotency-Key para los endpoints que crean transacciones.
+
+La primera petición con una clave inserta una fila IN_FLIGHT (commit propio, antes del trabajo),
+ejecuta la vista y, si tuvo éxito, guarda la respuesta. Los reintentos con la misma clave reciben esa respuesta
+sin volver a ejecutar nada; un duplicado concurrente recibe enseguida 409 con Retry-After (no ocupa el
+worker esperando) y al reintentar obtiene la respuesta guardada. Las filas vencen a las IDEMPOTENCY_TTL_S; un IN_FLIGHT más viejo que
+IDEMPOTENCY_LOCK_S se da por abandonado (proceso caído) y se puede retomar.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction as dbtx
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+SECRET_FIELDS = ('password', 'step_up_token')
+
+
+def _fingerprint(request) -> str:
+    data = request.data
+    if hasattr(data, 'dict'):
+        data = data.dict()
+    if isinstance(data, dict):
+        # La contraseña no debe quedar derivable del hash guardado
+        data = {k: v for k, v in data.items() if k not in SECRET_FIELDS}
+    raw = json.dumps([request.method, request.path, data], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _claim(user, key: str, fingerprint: str) -> tuple[IdempotencyKey, bool]:
+    """(fila, True) si esta petición es la dueña de la clave; (fila existente, False) si no."""
+    now = timezone.now()
+    while True:
+        try:
+            with dbtx.atomic():
+                row = IdempotencyKey.objects.create(
+                    user=user, key=key, fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_S),
+                )
+            return row, True
+        except IntegrityError:
+            row = IdempotencyKey.objects.filter(user=user, key=key).first()
+            if row is None:
+                continue
+            abandoned = (
+                row.state == IdempotencyKey.STATE_IN_FLIGHT
+                and row.created_at < now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_S)
+            )
+            if row.expires_at > now and not abandoned:
+                return row, False
+            # Vencida o abandonada: se libera (solo si nadie la cambió mientras tanto) y se reintenta
+            IdempotencyKey.objects.filter(pk=row.pk, state=row.state, created_at=row.created_at).delete()
+
+
+def _replay(row: IdempotencyKey) -> Response:
+    response = Response(row.response_body, status=row.response_status)
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def idempotent(view_method):
+    """Decorador para métodos de ViewSet/APIView. Sin cabecera Idempotency-Key no cambia nada."""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = (request.headers.get(HEADER) or '').strip()
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({'detail': 'Idempotency-Key demasiado larga (máximo 255).'}, status=status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = _fingerprint(request)
+        row, owner = _claim(request.user, key, fingerprint)
+        if not owner:
+            if row.fingerprint != fingerprint:
+                return Response({'detail': 'Idempotency-Key ya se usó con otra solicitud.'},
+                                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if row.state == IdempotencyKey.STATE_DONE:
+                return _replay(row)
+            response = Response({'detail': 'La solicitud original sigue en curso; reintenta más tarde.'},
+                                status=status.HTTP_409_CONFLICT)
+            response['Retry-After'] = str(settings.IDEMPOTENCY_RETRY_AFTER_S)
+            return response
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            row.delete()
+            raise
+        if response.status_code >= 400:
+            # Solo se memorizan los éxitos: tras un error (p. ej. contraseña mal escrita) el mismo
+            # reintento debe volver a ejecutarse, y no hubo efectos que proteger
+            row.delete()
+            return response
+        row.state = IdempotencyKey.STATE_DONE
+        row.response_status = response.status_code
+        row.response_body = response.data
+        row.save(update_fields=['state', 'response_status', 'response_body'])
+        return response
+
+    return wrapper
+
+
+def purge_expired(batch_size: int = 5000) -> int:
+    """Borra claves vencidas por lotes. Devuelve filas eliminadas."""
+    deleted = 0
+    expired = IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+    while ids := list(expired.values_list('id', flat=True)[:batch_size]):
+        deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+    return deleted
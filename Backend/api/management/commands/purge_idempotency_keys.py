@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Elimina por lotes las Idempotency-Key vencidas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        deleted = purge_expired(options['batch'])
+        self.stdout.write(self.style.SUCCESS(f'Claves eliminadas: {deleted}.'))
@@ -1,3 +1,30 @@
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
-# Create your models here.
+
+class IdempotencyKey(models.Model):
+    """Primera respuesta de una petición con cabecera Idempotency-Key (ver api/idempotency.py)."""
+    STATE_IN_FLIGHT = 'IN_FLIGHT'
+    STATE_DONE = 'DONE'
+    STATE_CHOICES = [
+        (STATE_IN_FLIGHT, 'En curso'),
+        (STATE_DONE, 'Completada'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)              # sha256 de método + ruta + body
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=STATE_IN_FLIGHT)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='uniq_idempotency_user_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}:{self.key} {self.state}'
@@ -0,0 +1,78 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) opcional.
+    Sin ?limit= la vista responde el arreglo completo como siempre; con ?limit=N devuelve
+    {"next": url|null, "results": [...]}. El cursor guarda (valor de orden, id) del último
+    elemento, así la página N cuesta lo mismo que la primera (WHERE + índice compuesto, sin OFFSET).
+    La vista define el orden con `keyset_ordering` (ej. '-created_at'); el id desempata.
+    """
+    ordering = '-created_at'
+    limit_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    max_limit = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        raw_limit = request.query_params.get(self.limit_query_param)
+        if not raw_limit:
+            return None
+        try:
+            limit = min(max(int(raw_limit), 1), self.max_limit)
+        except ValueError:
+            limit = self.max_limit
+
+        ordering = getattr(view, 'keyset_ordering', self.ordering)
+        self.field = ordering.lstrip('-')
+        self.descending = ordering.startswith('-')
+        lookup = 'lt' if self.descending else 'gt'
+        pk_order = '-pk' if self.descending else 'pk'
+        queryset = queryset.order_by(ordering, pk_order)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            value, pk = self._decode(cursor, queryset.model)
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{lookup}': value}) | Q(**{self.field: value, f'pk__{lookup}': pk})
+            )
+
+        rows = list(queryset[:limit + 1])
+        self.request = request
+        self.next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            self.next_cursor = self._encode(getattr(last, self.field), last.pk)
+        return rows
+
+    def get_paginated_response(self, data):
+        next_url = None
+        if self.next_cursor:
+            next_url = replace_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+            )
+        return Response({'next': next_url, 'results': data})
+
+    def _encode(self, value, pk) -> str:
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        raw = json.dumps([value, pk], separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def _decode(self, cursor: str, model):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            value, pk = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            value = model._meta.get_field(self.field).to_python(value)
+            return value, int(pk)
+        except Exception:
+            raise NotFound('Cursor inválido.')
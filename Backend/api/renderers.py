@@ -0,0 +1,39 @@
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def _rows(data) -> list[dict]:
+    if data is None:
+        return []
+    return list(data) if isinstance(data, (list, tuple)) else [data]
+
+
+class NDJSONRenderer(BaseRenderer):
+    """application/x-ndjson: un objeto JSON por línea. Las exportaciones responden en streaming y no pasan por aquí."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return ''.join(json.dumps(row, cls=JSONEncoder, ensure_ascii=False) + '\n' for row in _rows(data)).encode()
+
+
+class CSVRenderer(BaseRenderer):
+    """text/csv a partir de un objeto o una lista de objetos planos (columnas = claves del primero)."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = _rows(data)
+        if not rows:
+            return b''
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(rows[0]), extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue().encode()
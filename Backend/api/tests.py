@@ -1,3 +1,98 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from transactions.models import Transaction
+from wallets.defaults import default_wallet_id
+
+from .idempotency import HEADER, REPLAY_HEADER
+from .models import IdempotencyKey
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=0, MEMPOOL_ENABLED=False, IDEMPOTENCY_RETRY_AFTER_S=2)
+class IdempotencyKeyTests(APITestCase):
+    """POST /api/tx/ con Idempotency-Key: reintentos, otra solicitud con la misma clave y duplicados en curso."""
+
+    def setUp(self):
+        self.sender = User.objects.create_user('idem-a', password='Pw123456!')
+        User.objects.create_user('idem-b', password='Pw123456!')
+        self.client.force_authenticate(self.sender)
+
+    def _send(self, amount='1.00', key='k-1'):
+        body = {'from_wallet': default_wallet_id(self.sender.id), 'to_username': 'idem-b', 'amount': amount}
+        return self.client.post('/api/tx/', body, format='json', headers={HEADER: key})
+
+    def _sent(self) -> int:
+        return Transaction.objects.filter(from_wallet_id=default_wallet_id(self.sender.id)).count()
+
+    def test_retry_replays_the_first_response(self):
+        first = self._send()
+        second = self._send()
+
+        self.assertEqual((first.status_code, second.status_code), (201, 201))
+        self.assertEqual(second[REPLAY_HEADER], 'true')
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(self._sent(), 1)
+
+    def test_same_key_with_another_payload_is_rejected(self):
+        self._send()
+
+        response = self._send(amount='2.00')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self._sent(), 1)
+
+    def test_in_flight_duplicate_gets_409_without_waiting(self):
+        self._send()
+        IdempotencyKey.objects.update(state=IdempotencyKey.STATE_IN_FLIGHT, response_status=None, response_body=None)
+
+        response = self._send()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertEqual(self._sent(), 1)
+
+    def test_failed_request_releases_the_key(self):
+        self.assertEqual(self._send(amount='1000.00').status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        self.assertEqual(self._send(amount='1000.00').status_code, 400)
+        self.assertEqual(self._send(amount='1.00', key='k-2').status_code, 201)
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=0, MEMPOOL_ENABLED=False)
+class KeysetPaginationTests(APITestCase):
+    """?limit=N&cursor=: sin saltos ni repetidos con empates en created_at y filas nuevas entre páginas."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('pager', password='Pw123456!')     # + crédito de bienvenida
+        User.objects.create_user('pager-b', password='Pw123456!')
+        self.client.force_authenticate(self.user)
+        self.wallet = default_wallet_id(self.user.id)
+        for _ in range(4):
+            self._send()
+        self.mine = Transaction.objects.filter(Q(from_wallet_id=self.wallet) | Q(to_wallet_id=self.wallet))
+        self.mine.update(created_at=timezone.now())      # todas empatadas: decide el id
+
+    def _send(self):
+        body = {'from_wallet': self.wallet, 'to_username': 'pager-b', 'amount': '0.10'}
+        self.assertEqual(self.client.post('/api/tx/', body, format='json').status_code, 201)
+
+    def test_pages_are_stable_across_ties_and_new_rows(self):
+        expected = sorted(self.mine.values_list('id', flat=True), reverse=True)
+        seen, url = [], '/api/tx/?limit=2'
+        while url:
+            page = self.client.get(url).data
+            seen += [row['id'] for row in page['results']]
+            self._send()                                  # más reciente: no se cuela en las páginas siguientes
+            url = page['next']
+
+        self.assertEqual(seen, expected)
+
+    def test_without_limit_returns_the_plain_list(self):
+        self.assertIsInstance(self.client.get('/api/tx/').data, list)
+
+    def test_invalid_cursor_is_404(self):
+        self.assertEqual(self.client.get('/api/tx/?limit=2&cursor=basura').status_code, 404)
@@ -0,0 +1,170 @@
+"""
+Escritor de bitácora con buffer (opcional, AUDITLOG_BUFFERED=1).
+
+log_action() encola la entrada tras el commit de la transacción en curso y un hilo de fondo
+las inserta con bulk_create cuando se juntan AUDITLOG_FLUSH_SIZE entradas o pasan
+AUDITLOG_FLUSH_INTERVAL segundos. Al terminar el proceso se vacía lo pendiente (atexit).
+
+Si un lote falla por datos (IntegrityError/DataError) se parte en mitades hasta aislar las filas
+malas, que se descartan al log `auditlog.dead_letter` en vez de bloquear la cola. Si falla la BD
+(OperationalError y similares) el lote vuelve al frente para el próximo flush. La cola no pasa de
+AUDITLOG_MAX_PENDING entradas: con la BD caída se descartan (y cuentan) las más antiguas.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.db import DataError, IntegrityError, connection, transaction as dbtx
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+dead_letter = logging.getLogger('auditlog.dead_letter')
+
+
+class AuditBuffer:
+    def __init__(self, flush_size: int = 200, flush_interval: float = 1.0, max_pending: int = 10000):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max(max_pending, flush_size)
+        self._pending: list[AuditLog] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        # contadores
+        self.enqueued = 0
+        self.written = 0
+        self.flushes = 0
+        self.errors = 0
+        self.dropped = 0
+        self._overflowing = False
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def add(self, entry: AuditLog) -> None:
+        with self._lock:
+            self._pending.append(entry)
+            self.enqueued += 1
+            self._trim()
+            full = len(self._pending) >= self.flush_size
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Escribe lo pendiente con bulk_create. Devuelve cuántas entradas escribió."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            written, bad, retry = self._write(batch)
+            for entry in bad:
+                dead_letter.error('Entrada de bitácora descartada: actor=%s action=%r payload=%r',
+                                  entry.actor_id, entry.action, entry.payload_json)
+            if bad or retry:
+                self.errors += 1
+                self.dropped += len(bad)
+            with self._lock:
+                if retry:
+                    self._pending[:0] = retry   # se reintenta en el siguiente flush
+                    self._trim()
+                else:
+                    self._overflowing = False
+            elapsed = (time.perf_counter() - started) * 1000
+            self.flushes += 1
+            self.written += written
+            self.last_flush_ms = elapsed
+            self.max_flush_ms = max(self.max_flush_ms, elapsed)
+            return written
+
+    def _write(self, batch: list[AuditLog]) -> tuple[int, list[AuditLog], list[AuditLog]]:
+        """(escritas, filas que fallan solas, filas sin intentar por error de la BD)."""
+        try:
+            with dbtx.atomic():
+                AuditLog.objects.bulk_create(batch, batch_size=500)
+            return len(batch), [], []
+        except (IntegrityError, DataError):
+            if len(batch) == 1:
+                return 0, batch, []
+        except Exception:
+            logger.exception('No se pudo escribir un lote de %s entradas de bitácora', len(batch))
+            return 0, [], batch
+        # Error de datos: se parte el lote para aislar las filas malas
+        mid = len(batch) // 2
+        written, bad, retry = self._write(batch[:mid])
+        if retry:
+            return written, bad, retry + batch[mid:]   # la BD dejó de responder: no se sigue
+        right = self._write(batch[mid:])
+        return written + right[0], bad + right[1], right[2]
+
+    def _trim(self) -> None:
+        # Con self._lock tomado: descarta lo más antiguo que exceda el tope
+        excess = len(self._pending) - self.max_pending
+        if excess > 0:
+            del self._pending[:excess]
+            self.dropped += excess
+            if not self._overflowing:     # un aviso por episodio, no uno por entrada
+                self._overflowing = True
+                logger.warning('Cola de bitácora llena (%s): se descartan las entradas más antiguas', self.max_pending)
+
+    def stats(self) -> dict:
+        with self._lock:
+            depth = len(self._pending)
+        return {
+            'queue_depth': depth,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'flushes': self.flushes,
+            'errors': self.errors,
+            'dropped': self.dropped,
+            'last_flush_ms': round(self.last_flush_ms, 3),
+            'max_flush_ms': round(self.max_flush_ms, 3),
+            'flush_size': self.flush_size,
+            'flush_interval_s': self.flush_interval,
+        }
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def _ensure_thread(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='auditlog-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                connection.close()   # conexión propia del hilo
+
+
+_buffer: AuditBuffer | None = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> AuditBuffer:
+    global _buffer
+    if _buffer is None:
+        from django.conf import settings
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = AuditBuffer(settings.AUDITLOG_FLUSH_SIZE, settings.AUDITLOG_FLUSH_INTERVAL,
+                                      settings.AUDITLOG_MAX_PENDING)
+                atexit.register(_buffer.shutdown)
+    return _buffer
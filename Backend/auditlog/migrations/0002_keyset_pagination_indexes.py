@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditlog', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-created_at', '-id'], name='auditlog_au_created_d36b16_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['actor', '-created_at', '-id'], name='auditlog_au_actor_i_3843ae_idx'),
+        ),
+    ]
@@ -13,6 +13,8 @@ class AuditLog(models.Model):
             models.Index(fields=['actor']),
             models.Index(fields=['created_at']),
             models.Index(fields=['action']),
+            models.Index(fields=['-created_at', '-id']),            # paginación por cursor (staff)
+            models.Index(fields=['actor', '-created_at', '-id']),   # paginación por cursor (propias)
         ]
 
     def __str__(self):
@@ -1,3 +1,44 @@
+from unittest import mock
+
+from django.db import OperationalError
 from django.test import TestCase
 
-# Create your tests here.
+from .buffer import AuditBuffer
+from .models import AuditLog
+
+
+@mock.patch.object(AuditBuffer, '_ensure_thread')     # sin hilo de fondo: se vacía a mano
+class AuditBufferFailureTests(TestCase):
+
+    def _buffer(self, entries, **kwargs) -> AuditBuffer:
+        buffer = AuditBuffer(flush_size=100, flush_interval=60, **kwargs)
+        for entry in entries:
+            buffer.add(entry)
+        return buffer
+
+    def test_bad_rows_are_dead_lettered_and_the_rest_written(self, _thread):
+        entries = [AuditLog(action=f'OK_{n}') for n in range(7)]
+        entries[4] = AuditLog(action=None)        # NOT NULL: falla sola
+        buffer = self._buffer(entries)
+
+        with self.assertLogs('auditlog.dead_letter', level='ERROR'):
+            written = buffer.flush()
+
+        self.assertEqual(written, 6)
+        self.assertEqual(AuditLog.objects.count(), 6)
+        self.assertEqual(buffer.stats()['dropped'], 1)
+        self.assertEqual(buffer.stats()['queue_depth'], 0)
+
+    def test_database_errors_requeue_within_the_cap(self, _thread):
+        with self.assertLogs('auditlog.buffer', level='WARNING'):
+            buffer = self._buffer([AuditLog(action=f'A_{n}') for n in range(150)], max_pending=120)
+        self.assertEqual(buffer.stats()['queue_depth'], 120)
+
+        with mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=OperationalError('db caída')), \
+                self.assertLogs('auditlog.buffer', level='ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+
+        self.assertEqual(buffer.stats()['queue_depth'], 120)
+        self.assertEqual(buffer.stats()['dropped'], 30)
+        self.assertEqual(buffer.flush(), 120)
+        self.assertEqual(list(AuditLog.objects.order_by('id').values_list('action', flat=True)[:1]), ['A_30'])
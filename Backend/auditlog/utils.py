@@ -1,15 +1,42 @@
 from typing import Any, Mapping
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction as dbtx
 from .models import AuditLog
 
 def log_action(actor: User | None, action: str, payload: Mapping[str, Any] | None = None) -> AuditLog:
     """
     Crea una entrada de bitácora. actor puede ser None (acciones del sistema).
+    Con AUDITLOG_BUFFERED la entrada se encola tras el commit y se inserta en lote
+    (ver auditlog/buffer.py); en ese caso se devuelve sin guardar todavía.
     Ejemplo:
         log_action(request.user, 'WALLET_CREATE', {'wallet_id': w.id, 'name': w.name})
     """
-    return AuditLog.objects.create(
+    entry = AuditLog(
         actor=actor,
         action=action,
         payload_json=dict(payload or {})
     )
+    if not settings.AUDITLOG_BUFFERED:
+        entry.save()
+        return entry
+    from .buffer import get_buffer
+    buffer = get_buffer()
+    dbtx.on_commit(lambda: buffer.add(entry))
+    return entry
+
+
+def log_actions(actor: User | None, action: str, payloads) -> list[AuditLog]:
+    """Varias entradas de la misma acción con un solo bulk_create (o encoladas si hay buffer)."""
+    entries = [AuditLog(actor=actor, action=action, payload_json=dict(p or {})) for p in payloads]
+    if not settings.AUDITLOG_BUFFERED:
+        return AuditLog.objects.bulk_create(entries)
+    from .buffer import get_buffer
+    buffer = get_buffer()
+
+    def enqueue() -> None:
+        for entry in entries:
+            buffer.add(entry)
+
+    dbtx.on_commit(enqueue)
+    return entries
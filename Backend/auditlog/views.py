@@ -1,6 +1,10 @@
-from rest_framework import viewsets, permissions
+from django.conf import settings
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from .models import AuditLog
 from .serializers import AuditLogSerializer
+from api.pagination import KeysetPagination
 
 class IsSelfOrStaff(permissions.BasePermission):
     """
@@ -18,13 +22,26 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     Solo lectura vía API:
       GET /api/audit-logs/        (propios; si es staff, todos)
       GET /api/audit-logs/{id}/
+      GET /api/audit-logs/stats/  (staff) contadores del buffer de escritura
     La creación se hace desde el backend con utils.log_action(...)
+    Paginación opcional: ?limit=N[&cursor=...]
     """
     serializer_class = AuditLogSerializer
     permission_classes = [IsSelfOrStaff]
+    pagination_class = KeysetPagination
+    keyset_ordering = '-created_at'
 
     def get_queryset(self):
         qs = AuditLog.objects.all().select_related('actor')
         if not self.request.user.is_staff:
             qs = qs.filter(actor=self.request.user)
         return qs
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        if not request.user.is_staff:
+            return Response({'detail': 'No autorizado.'}, status=status.HTTP_403_FORBIDDEN)
+        if not settings.AUDITLOG_BUFFERED:
+            return Response({'buffered': False})
+        from .buffer import get_buffer
+        return Response({'buffered': True, **get_buffer().stats()})
@@ -1,13 +1,20 @@
 from django.contrib import admin
-from .models import Block
+from .models import Block, MiningJob
 
 @admin.register(Block)
 class BlockAdmin(admin.ModelAdmin):
     list_display = ('id', 'height', 'prev_hash', 'merkle_root', 'nonce', 'mined_at', 'short_hash')
-    search_fields = ('height', 'prev_hash', 'merkle_root', 'nonce')
+    search_fields = ('height', 'hash', 'prev_hash', 'merkle_root', 'nonce')
     list_filter = ('mined_at',)
-    readonly_fields = ('height', 'prev_hash', 'mined_at')
+    readonly_fields = ('height', 'prev_hash', 'hash', 'mined_at')
 
     def short_hash(self, obj):
         return obj.hash[:12]
     short_hash.short_description = 'hash'
+
+
+@admin.register(MiningJob)
+class MiningJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'block', 'status', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = ('user', 'block', 'result', 'created_at', 'started_at', 'finished_at')
@@ -0,0 +1,82 @@
+"""
+Mempool y ensamblador de bloques.
+
+El mempool son las transacciones PENDING sin bloque. El ensamblador las sella en lotes:
+un bloque por cada `max_txs` transacciones, o con lo que haya cuando la más antigua
+lleva esperando `max_wait_ms`. Todas las transacciones del lote se confirman con un
+único UPDATE y el libro de saldos se ajusta por (wallet, moneda), no por transacción.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction as dbtx
+from django.utils import timezone
+
+from transactions.models import Transaction
+from transactions.utils import apply_balance_transitions
+from .models import Block
+from .utils import MERKLE_LEAF_ORDER, create_block
+
+
+def mempool():
+    """Transacciones pendientes de sellar, en orden de llegada."""
+    return Transaction.objects.filter(
+        status=Transaction.STATUS_PENDING, block__isnull=True
+    ).order_by(*MERKLE_LEAF_ORDER)
+
+
+def mempool_ready(max_txs: int, max_wait_ms: int) -> bool:
+    """True si hay un lote completo o si la transacción más antigua ya esperó max_wait_ms."""
+    pending = mempool()
+    if pending[max_txs - 1:max_txs].exists():
+        return True
+    oldest = pending.values_list('created_at', flat=True).first()
+    if oldest is None:
+        return False
+    return timezone.now() - oldest >= timedelta(milliseconds=max_wait_ms)
+
+
+@dbtx.atomic
+def seal_block(max_txs: int | None = None) -> Block | None:
+    """Sella hasta max_txs transacciones del mempool en un solo bloque. None si no había nada."""
+    max_txs = max_txs or settings.BLOCK_MAX_TXS
+    batch = mempool()
+    if connection.features.has_select_for_update_skip_locked:
+        # Varios ensambladores en paralelo no se pisan el mismo lote
+        batch = batch.select_for_update(skip_locked=True)
+    txs = list(batch[:max_txs])
+    if not txs:
+        return None
+
+    block = create_block(tx_hashes=[tx.tx_hash for tx in txs])
+    ids = [tx.id for tx in txs]
+    updated = Transaction.objects.filter(
+        id__in=ids, status=Transaction.STATUS_PENDING, block__isnull=True
+    ).update(block=block, status=Transaction.STATUS_CONFIRMED)
+    if updated != len(ids):
+        # Otro proceso confirmó alguna mientras tanto: se descarta el lote y se reintenta luego
+        dbtx.set_rollback(True)
+        return None
+    apply_balance_transitions(txs, Transaction.STATUS_PENDING, Transaction.STATUS_CONFIRMED)
+    return block
+
+
+def run_assembler(max_txs: int | None = None, max_wait_ms: int | None = None,
+                  poll_ms: int = 50, stop: threading.Event | None = None, on_block=None) -> None:
+    """Bucle del ensamblador: sella bloques mientras el mempool esté listo, hasta que `stop` se active."""
+    max_txs = max_txs or settings.BLOCK_MAX_TXS
+    max_wait_ms = settings.BLOCK_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        sealed = False
+        while mempool_ready(max_txs, max_wait_ms):
+            block = seal_block(max_txs)
+            if block is None:
+                break
+            sealed = True
+            if on_block:
+                on_block(block)
+        if not sealed:
+            stop.wait(poll_ms / 1000)
@@ -0,0 +1,99 @@
+"""
+Cola de minado. La API solo encola un MiningJob y responde 202; `manage.py run_miner` toma los PENDING
+en orden de id y corre la prueba de trabajo (multiproceso, ver miner.py) fuera del ciclo de la petición.
+Tomar un trabajo es un UPDATE condicional PENDING -> RUNNING: dos mineros nunca corren el mismo.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from auditlog.utils import log_action
+
+from .models import MiningJob, MiningReward
+from .utils import mine_block
+
+logger = logging.getLogger(__name__)
+
+
+def claim_next_job() -> MiningJob | None:
+    """El PENDING más antiguo, ya marcado RUNNING por este proceso (None si no hay)."""
+    for job_id in MiningJob.objects.filter(status=MiningJob.STATUS_PENDING).order_by('id').values_list('id', flat=True)[:10]:
+        claimed = MiningJob.objects.filter(id=job_id, status=MiningJob.STATUS_PENDING).update(
+            status=MiningJob.STATUS_RUNNING, started_at=timezone.now(),
+        )
+        if claimed:
+            return MiningJob.objects.select_related('block', 'user').get(id=job_id)
+    return None
+
+
+def fail_stale_jobs(now=None) -> int:
+    """RUNNING que ningún minero terminará (proceso caído): pasan a FAILED y liberan al usuario."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=settings.MINING_TIMEOUT_S * 2 + 60)
+    return MiningJob.objects.filter(status=MiningJob.STATUS_RUNNING, started_at__lt=cutoff).update(
+        status=MiningJob.STATUS_FAILED, finished_at=now, result={'outcome': 'failure', 'reason': 'stale'},
+    )
+
+
+def run_job(job: MiningJob) -> MiningJob:
+    block, user = job.block, job.user
+    snapshot = {
+        'block_id': block.id,
+        'height': block.height,
+        'prev_hash': block.prev_hash,
+        'current_hash': block.hash,
+        'merkle_root': block.merkle_root,
+        'nonce': block.nonce,
+    }
+    if MiningReward.objects.filter(block=block).exists():
+        result = {'outcome': 'failure', 'reason': 'already_mined'}
+    else:
+        mined, reward = mine_block(block, user=user)
+        stats = {
+            'difficulty_bits': mined.difficulty_bits,
+            'hashes': mined.hashes,
+            'elapsed_s': round(mined.elapsed, 3),
+            'hashrate': round(mined.hashrate, 1),
+            'worker_hashrates': [round(h, 1) for h in mined.worker_hashrates],
+        }
+        if reward is not None:
+            result = {**stats, 'outcome': 'success', 'winning_nonce': str(mined.nonce), 'pow_hash': mined.hash,
+                      'reward_btc': str(reward.amount_btc)}
+        elif mined.success:
+            result = {**stats, 'outcome': 'failure', 'reason': 'already_mined'}
+        else:
+            result = {**stats, 'outcome': 'failure', 'reason': 'network_difficulty'}
+    success = result['outcome'] == 'success'
+    log_action(user, 'BLOCK_SIMULATION_SUCCESS' if success else 'BLOCK_SIMULATION_FAILURE', {**snapshot, **result})
+
+    job.status = MiningJob.STATUS_DONE
+    job.result = result
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'finished_at'])
+    return job
+
+
+def run_miner(stop: threading.Event | None = None, poll_ms: int = 500, on_job=None) -> int:
+    """Bucle del minero: procesa trabajos hasta que `stop` se active. Devuelve cuántos procesó."""
+    stop = stop or threading.Event()
+    fail_stale_jobs()
+    done = 0
+    while not stop.is_set():
+        job = claim_next_job()
+        if job is None:
+            stop.wait(poll_ms / 1000)
+            continue
+        try:
+            run_job(job)
+        except Exception:   # noqa: BLE001 - un trabajo roto no detiene la cola
+            logger.exception('Minado %s falló.', job.id)
+            MiningJob.objects.filter(id=job.id).update(
+                status=MiningJob.STATUS_FAILED, finished_at=timezone.now(), result={'outcome': 'failure', 'reason': 'error'},
+            )
+        done += 1
+        if on_job:
+            on_job(job)
+    return done
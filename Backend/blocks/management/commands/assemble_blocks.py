@@ -0,0 +1,52 @@
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blocks.assembler import mempool, run_assembler, seal_block
+
+
+class Command(BaseCommand):
+    help = 'Ensambla las transacciones PENDING del mempool en bloques (hasta K por bloque o tras T ms de espera).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-txs', type=int, default=settings.BLOCK_MAX_TXS,
+                            help='Máximo de transacciones por bloque (K).')
+        parser.add_argument('--max-wait-ms', type=int, default=settings.BLOCK_MAX_WAIT_MS,
+                            help='Espera máxima de la transacción más antigua antes de sellar (T).')
+        parser.add_argument('--poll-ms', type=int, default=50,
+                            help='Intervalo de sondeo del mempool cuando está vacío.')
+        parser.add_argument('--once', action='store_true',
+                            help='Sella todo lo pendiente y termina.')
+
+    def handle(self, *args, **options):
+        max_txs = options['max_txs']
+        if not settings.MEMPOOL_ENABLED:
+            # Sin mempool los envíos esperan confirmación manual: sellarlos aquí la saltaría
+            self.stdout.write('MEMPOOL_ENABLED=0: no hay nada que ensamblar.')
+            if not options['once']:
+                try:
+                    threading.Event().wait()        # proceso del Procfile: en espera, sin reiniciarse en bucle
+                except KeyboardInterrupt:
+                    pass
+            return
+
+        def report(block):
+            count = block.transactions.count()
+            self.stdout.write(f'Bloque #{block.height} sellado con {count} transacciones.')
+
+        if options['once']:
+            while mempool().exists():
+                block = seal_block(max_txs)
+                if block is None:
+                    break
+                report(block)
+            return
+
+        stop = threading.Event()
+        self.stdout.write(f"Ensamblador iniciado (K={max_txs}, T={options['max_wait_ms']} ms).")
+        try:
+            run_assembler(max_txs, options['max_wait_ms'], options['poll_ms'], stop, on_block=report)
+        except KeyboardInterrupt:
+            stop.set()
+            self.stdout.write('Ensamblador detenido.')
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from blocks.models import Block
+from blocks.utils import mine_block
+
+
+class Command(BaseCommand):
+    help = 'Minero de prueba de trabajo multiproceso: busca nonces para los bloques y reporta el hashrate.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--height', type=int, help='Bloque a minar (por defecto el último).')
+        parser.add_argument('--count', type=int, default=1, help='Cantidad de bloques a minar hacia atrás.')
+        parser.add_argument('--difficulty', type=int, default=settings.MINING_DIFFICULTY_BITS,
+                            help='Bits en cero requeridos al inicio del hash.')
+        parser.add_argument('--workers', type=int, default=settings.MINING_WORKERS)
+        parser.add_argument('--timeout', type=float, default=0, help='Segundos por bloque (0 = sin límite).')
+        parser.add_argument('--user', help='Usuario que recibe la recompensa (MiningReward).')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"Usuario '{options['user']}' no existe.")
+
+        qs = Block.objects.order_by('-height')
+        if options['height'] is not None:
+            qs = qs.filter(height__lte=options['height'])
+        blocks = list(qs[:options['count']])
+        if not blocks:
+            raise CommandError('No hay bloques para minar.')
+
+        for block in blocks:
+            result, reward = mine_block(
+                block, user=user, difficulty_bits=options['difficulty'],
+                workers=options['workers'], timeout=options['timeout'] or None,
+            )
+            per_worker = ', '.join(f'{h:,.0f}' for h in result.worker_hashrates)
+            self.stdout.write(
+                f'#{block.height}: {result.hashes:,} hashes en {result.elapsed:.2f}s '
+                f'({result.hashrate:,.0f} H/s; por proceso: {per_worker})'
+            )
+            if result.success:
+                msg = f'  nonce={result.nonce} hash={result.hash}'
+                if reward:
+                    msg += f' recompensa={reward.amount_btc} BTC'
+                elif user:
+                    msg += ' (el bloque ya tenía recompensa)'
+                self.stdout.write(self.style.SUCCESS(msg))
+            else:
+                self.stdout.write(self.style.WARNING('  sin solución en el tiempo dado'))
@@ -0,0 +1,32 @@
+import threading
+
+from django.core.management.base import BaseCommand
+
+from blocks.jobs import claim_next_job, fail_stale_jobs, run_job, run_miner
+
+
+class Command(BaseCommand):
+    help = 'Minero en segundo plano: ejecuta los minados encolados por POST /api/blocks/{id}/simulate-mining/.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-ms', type=int, default=500, help='Intervalo de sondeo cuando la cola está vacía.')
+        parser.add_argument('--once', action='store_true', help='Procesa lo pendiente y termina.')
+
+    def handle(self, *args, **options):
+        def report(job):
+            outcome = (job.result or {}).get('outcome', 'error')
+            self.stdout.write(f'Minado {job.id} (#{job.block.height}, {job.user.username}): {outcome}')
+
+        if options['once']:
+            fail_stale_jobs()
+            while job := claim_next_job():
+                report(run_job(job))
+            return
+
+        stop = threading.Event()
+        self.stdout.write('Minero iniciado.')
+        try:
+            run_miner(stop, options['poll_ms'], on_job=report)
+        except KeyboardInterrupt:
+            stop.set()
+            self.stdout.write('Minero detenido.')
@@ -0,0 +1,66 @@
+import hashlib
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blocks.models import Block, ChainCheckpoint
+from blocks.utils import GENESIS_PREV_HASH
+
+
+class Command(BaseCommand):
+    help = 'Recorre la cadena por bloques de tamaño fijo y verifica hash y enlace prev_hash de cada bloque.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk', type=int, default=2000, help='Bloques leídos por consulta.')
+        parser.add_argument('--resume', action='store_true',
+                            help='Continúa desde el último checkpoint guardado.')
+        parser.add_argument('--checkpoint', default='default', help='Nombre del checkpoint.')
+        parser.add_argument('--no-save', action='store_true', help='No actualiza el checkpoint.')
+
+    def handle(self, *args, **options):
+        name = options['checkpoint']
+        prev_height, prev_hash = None, GENESIS_PREV_HASH
+        if options['resume']:
+            cp = ChainCheckpoint.objects.filter(name=name).first()
+            if cp:
+                prev_height, prev_hash = cp.height, cp.block_hash
+                self.stdout.write(f'Reanudando desde el bloque #{cp.height}.')
+
+        qs = Block.objects.order_by('height')
+        if prev_height is not None:
+            qs = qs.filter(height__gt=prev_height)
+        rows = qs.values_list('height', 'prev_hash', 'merkle_root', 'nonce', 'hash')
+
+        sha256 = hashlib.sha256
+        checked, error_count, errors = 0, 0, []  # solo se guardan los primeros mensajes: memoria constante
+        last_good = None  # (height, hash) del último bloque de la racha válida
+        for height, prev, merkle, nonce, stored in rows.iterator(chunk_size=options['chunk']):
+            checked += 1
+            # Misma cabecera que Block.header, sin instanciar modelos
+            computed = sha256(f'{height}:{prev}:{merkle}:{nonce}'.encode('utf-8')).hexdigest()
+            problems = []
+            if computed != stored:
+                problems.append(f'#{height}: hash guardado no coincide con la cabecera')
+            if prev != prev_hash:
+                problems.append(f'#{height}: prev_hash no enlaza con el bloque anterior')
+            if problems:
+                error_count += len(problems)
+                errors.extend(problems[:max(0, 50 - len(errors))])
+            elif not error_count:
+                last_good = (height, stored)
+            prev_hash = stored
+            if checked % options['chunk'] == 0:
+                self._save(name, last_good, options)
+
+        self._save(name, last_good, options)
+        for error in errors:
+            self.stdout.write(self.style.ERROR(error))
+        if error_count:
+            raise CommandError(f'Cadena inválida: {error_count} errores en {checked} bloques revisados.')
+        self.stdout.write(self.style.SUCCESS(f'Cadena válida: {checked} bloques revisados.'))
+
+    def _save(self, name, last_good, options):
+        if last_good is None or options['no_save']:
+            return
+        ChainCheckpoint.objects.update_or_create(
+            name=name, defaults={'height': last_good[0], 'block_hash': last_good[1]}
+        )
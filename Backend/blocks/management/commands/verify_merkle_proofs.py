@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blocks.merkle import packed_leaves, packed_proof, verify_proofs
+from blocks.models import Block
+from blocks.utils import block_merkle_tree, has_legacy_root
+
+
+class Command(BaseCommand):
+    help = 'Genera y verifica en lote las pruebas Merkle de todas las transacciones de los bloques.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from-height', type=int, default=0)
+        parser.add_argument('--chunk', type=int, default=500, help='Bloques leídos por consulta.')
+
+    def handle(self, *args, **options):
+        blocks = Block.objects.filter(height__gte=options['from_height']).order_by('height')
+        items = []
+        legacy = 0
+        for block in blocks.iterator(chunk_size=options['chunk']):
+            tree = block_merkle_tree(block)
+            if not tree:
+                continue
+            if has_legacy_root(block, tree):
+                legacy += 1         # su merkle_root no es la raíz de sus transacciones: nada que verificar
+                continue
+            for index, leaf in enumerate(packed_leaves(tree)):
+                items.append((leaf, packed_proof(tree, index), block.merkle_root))
+
+        started = time.perf_counter()
+        valid = verify_proofs(items)
+        elapsed = time.perf_counter() - started
+        rate = len(items) / elapsed if elapsed else 0.0
+        self.stdout.write(f'Pruebas verificadas: {valid}/{len(items)} en {elapsed:.3f}s ({rate:,.0f} pruebas/s).')
+        if legacy:
+            self.stdout.write(f'Bloques con raíz heredada (sin verificar): {legacy}.')
+        if valid != len(items):
+            self.stdout.write(self.style.WARNING(f'{len(items) - valid} pruebas no coinciden con merkle_root del bloque.'))
@@ -0,0 +1,106 @@
+"""
+Árbol Merkle binario sobre los tx_hash de un bloque.
+
+Hojas = bytes de cada tx_hash (ya son SHA-256); nodo interno = SHA-256(izq + der).
+Si un nivel tiene cantidad impar, el último nodo se empareja consigo mismo.
+
+Todos los niveles se guardan en Block.merkle_tree como bytes contiguos:
+    4 bytes big-endian con la cantidad de hojas + 32 bytes por nodo, nivel por nivel.
+Así una prueba de inclusión se arma leyendo log2(n) nodos, sin volver a hashear el bloque.
+"""
+import hashlib
+from typing import Iterable
+
+NODE = 32
+_HEADER = 4
+
+
+def build_levels(tx_hashes: Iterable[str]) -> list[list[bytes]]:
+    """Niveles del árbol, de las hojas (nivel 0) a la raíz."""
+    sha256 = hashlib.sha256
+    level = [bytes.fromhex(h) for h in tx_hashes]
+    if not level:
+        return []
+    levels = [level]
+    while len(level) > 1:
+        if len(level) % 2:
+            level = level + [level[-1]]
+        level = [sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+        levels.append(level)
+    return levels
+
+
+def pack_levels(levels: list[list[bytes]]) -> bytes:
+    leaves = len(levels[0]) if levels else 0
+    return leaves.to_bytes(_HEADER, 'big') + b''.join(node for level in levels for node in level)
+
+
+def _level_offsets(leaves: int) -> list[tuple[int, int]]:
+    """(offset, tamaño) de cada nivel dentro del blob empaquetado."""
+    offsets, offset, size = [], _HEADER, leaves
+    while size:
+        offsets.append((offset, size))
+        if size == 1:
+            break
+        offset += size * NODE
+        size = (size + 1) // 2
+    return offsets
+
+
+def packed_leaves(blob: bytes) -> list[str]:
+    leaves = int.from_bytes(blob[:_HEADER], 'big')
+    return [blob[_HEADER + i * NODE:_HEADER + (i + 1) * NODE].hex() for i in range(leaves)]
+
+
+def packed_root(blob: bytes) -> str:
+    return blob[-NODE:].hex()
+
+
+def packed_index(blob: bytes, tx_hash: str) -> int | None:
+    """Posición de tx_hash entre las hojas (búsqueda alineada en bytes, sin hashear)."""
+    leaves = int.from_bytes(blob[:_HEADER], 'big')
+    target = bytes.fromhex(tx_hash)
+    end = _HEADER + leaves * NODE
+    pos = blob.find(target, _HEADER, end)
+    while pos != -1:
+        if (pos - _HEADER) % NODE == 0:
+            return (pos - _HEADER) // NODE
+        pos = blob.find(target, pos + 1, end)
+    return None
+
+
+def packed_proof(blob: bytes, index: int) -> list[tuple[str, str]]:
+    """Prueba de inclusión O(log n): [(hash_hermano, 'L'|'R'), ...] de la hoja a la raíz."""
+    leaves = int.from_bytes(blob[:_HEADER], 'big')
+    proof = []
+    for offset, size in _level_offsets(leaves)[:-1]:
+        sibling = index ^ 1
+        if sibling >= size:
+            sibling = index  # nodo impar: se emparejó consigo mismo
+        start = offset + sibling * NODE
+        proof.append((blob[start:start + NODE].hex(), 'L' if sibling < index else 'R'))
+        index //= 2
+    return proof
+
+
+def merkle_root(tx_hashes: list[str]) -> str:
+    levels = build_levels(tx_hashes)
+    return levels[-1][0].hex() if levels else '0' * 64
+
+
+def verify_proof(tx_hash: str, proof: list[tuple[str, str]], root: str) -> bool:
+    return verify_proofs([(tx_hash, proof, root)]) == 1
+
+
+def verify_proofs(items: Iterable[tuple[str, list[tuple[str, str]], str]]) -> int:
+    """Verifica muchas pruebas en un bucle ajustado. Devuelve cuántas son válidas."""
+    sha256 = hashlib.sha256
+    fromhex = bytes.fromhex
+    ok = 0
+    for tx_hash, proof, root in items:
+        node = fromhex(tx_hash)
+        for sibling, side in proof:
+            node = sha256(fromhex(sibling) + node).digest() if side == 'L' else sha256(node + fromhex(sibling)).digest()
+        if node == fromhex(root):
+            ok += 1
+    return ok
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blocks', '0002_miningreward'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='block',
+            name='merkle_tree',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
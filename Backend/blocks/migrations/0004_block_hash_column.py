@@ -0,0 +1,54 @@
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_block_hash(apps, schema_editor):
+    Block = apps.get_model('blocks', 'Block')
+    batch = []
+    for block in Block.objects.all().iterator(chunk_size=1000):
+        header = f'{block.height}:{block.prev_hash}:{block.merkle_root}:{block.nonce}'
+        block.hash = hashlib.sha256(header.encode('utf-8')).hexdigest()
+        batch.append(block)
+        if len(batch) >= 1000:
+            Block.objects.bulk_update(batch, ['hash'])
+            batch = []
+    if batch:
+        Block.objects.bulk_update(batch, ['hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blocks', '0003_block_merkle_tree'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='block',
+            name='hash',
+            field=models.CharField(default='', editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_block_hash, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='block',
+            name='hash',
+            field=models.CharField(editable=False, max_length=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='block',
+            name='prev_hash',
+            field=models.CharField(db_index=True, max_length=64),
+        ),
+        migrations.CreateModel(
+            name='ChainCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(default='default', max_length=40, unique=True)),
+                ('height', models.PositiveBigIntegerField()),
+                ('block_hash', models.CharField(max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blocks', '0004_block_hash_column'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='miningreward',
+            name='difficulty_bits',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='miningreward',
+            name='hashrate',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='miningreward',
+            name='nonce',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
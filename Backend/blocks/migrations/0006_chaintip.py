@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+def init_chain_tip(apps, schema_editor):
+    Block = apps.get_model('blocks', 'Block')
+    ChainTip = apps.get_model('blocks', 'ChainTip')
+    last = Block.objects.order_by('-height').values_list('height', 'hash').first()
+    if last is None:
+        ChainTip.objects.create(pk=1, next_height=0, tip_hash='0' * 64)
+    else:
+        ChainTip.objects.create(pk=1, next_height=last[0] + 1, tip_hash=last[1])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blocks', '0005_miningreward_pow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChainTip',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_height', models.PositiveBigIntegerField(default=0)),
+                ('tip_hash', models.CharField(default='0000000000000000000000000000000000000000000000000000000000000000', max_length=64)),
+            ],
+        ),
+        migrations.RunPython(init_chain_tip, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def link_rewards_to_blocks(apps, schema_editor):
+    # La recompensa más antigua de cada altura queda como la del bloque; las repetidas quedan sin enlazar
+    Block = apps.get_model('blocks', 'Block')
+    MiningReward = apps.get_model('blocks', 'MiningReward')
+    block_ids = dict(Block.objects.values_list('height', 'id'))
+    linked = set()
+    rows = MiningReward.objects.order_by('created_at', 'id').values_list('id', 'block_height')
+    for reward_id, height in rows.iterator(chunk_size=5000):
+        block_id = block_ids.get(height)
+        if block_id is not None and block_id not in linked:
+            linked.add(block_id)
+            MiningReward.objects.filter(id=reward_id).update(block_id=block_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blocks', '0006_chaintip'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='miningreward',
+            name='block',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mining_reward', to='blocks.block'),
+        ),
+        migrations.RunPython(link_rewards_to_blocks, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='MiningJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'PENDING'), ('RUNNING', 'RUNNING'), ('DONE', 'DONE'), ('FAILED', 'FAILED')], default='PENDING', max_length=8)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('block', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mining_jobs', to='blocks.block')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mining_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['status', 'id'], name='blocks_mini_status_8e320f_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'RUNNING'])), fields=('user',), name='miningjob_one_active_per_user')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+from itertools import groupby
+
+from django.db import migrations
+
+from blocks.merkle import build_levels, pack_levels
+
+
+def backfill_merkle_trees(apps, schema_editor):
+    # Guarda el árbol de los bloques que aún no lo tienen, así /proof/ no escribe en un GET.
+    # La raíz guardada no se toca (el hash del bloque y el enlace del siguiente dependen de ella).
+    Block = apps.get_model('blocks', 'Block')
+    Transaction = apps.get_model('transactions', 'Transaction')
+    pending = set(Block.objects.filter(merkle_tree__isnull=True).values_list('id', flat=True))
+    if not pending:
+        return
+    rows = (
+        Transaction.objects.filter(block_id__isnull=False).order_by('block_id', 'created_at', 'id')
+        .values_list('block_id', 'tx_hash').iterator(chunk_size=5000)
+    )
+    for block_id, group in groupby(rows, key=lambda row: row[0]):
+        if block_id in pending:
+            tree = pack_levels(build_levels(tx_hash for _, tx_hash in group))
+            Block.objects.filter(id=block_id).update(merkle_tree=tree)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blocks', '0007_mining_jobs'),
+        ('transactions', '0010_trade_request_expiry'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_merkle_trees, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,125 @@
+"""
+Minero de prueba de trabajo multiproceso.
+
+Busca un nonce tal que SHA-256(cabecera) < objetivo, con objetivo = 2**(256 - difficulty_bits).
+La cabecera es la misma de Block.header: "height:prev_hash:merkle_root:nonce".
+El espacio de nonces se reparte entre procesos (el proceso i prueba i, i+N, i+2N, ...) y
+todos se detienen en cuanto uno encuentra solución. Cada proceso reporta sus hashes/s; uno que muere
+sin reportar (OOM, kill) se da por perdido en lugar de esperarlo para siempre.
+
+Este módulo no importa Django: los procesos hijos solo hacen hashlib.
+"""
+import hashlib
+import multiprocessing as mp
+import os
+import queue
+import time
+from dataclasses import dataclass, field
+
+CHECK_EVERY = 20_000   # hashes entre consultas al evento de parada
+REPORT_POLL_S = 0.2    # espera máxima por reporte antes de revisar si los procesos siguen vivos
+
+
+@dataclass
+class MiningResult:
+    nonce: int | None
+    hash: str | None
+    difficulty_bits: int
+    hashes: int
+    elapsed: float
+    worker_hashrates: list[float] = field(default_factory=list)
+
+    @property
+    def success(self) -> bool:
+        return self.nonce is not None
+
+    @property
+    def hashrate(self) -> float:
+        return self.hashes / self.elapsed if self.elapsed else 0.0
+
+
+def target_for(difficulty_bits: int) -> bytes:
+    return (1 << (256 - difficulty_bits)).to_bytes(33, 'big')[1:] if difficulty_bits else b'\xff' * 32
+
+
+def header_prefix(height: int, prev_hash: str, merkle_root: str) -> bytes:
+    return f'{height}:{prev_hash}:{merkle_root}:'.encode('utf-8')
+
+
+def _search(worker_id, workers, prefix, target, max_nonce, stop, results):
+    base = hashlib.sha256(prefix)
+    found = None
+    hashes = 0
+    started = time.perf_counter()
+    nonce = worker_id
+    while nonce < max_nonce and found is None and not stop.is_set():
+        end = min(nonce + workers * CHECK_EVERY, max_nonce)
+        for n in range(nonce, end, workers):
+            h = base.copy()
+            h.update(str(n).encode())
+            if h.digest() < target:
+                found = n
+                hashes += (n - nonce) // workers + 1
+                break
+        else:
+            hashes += len(range(nonce, end, workers))
+        nonce = end if found is None else nonce
+    if found is not None:
+        stop.set()
+    results.put((worker_id, found, hashes, time.perf_counter() - started))
+
+
+def mine(height: int, prev_hash: str, merkle_root: str, difficulty_bits: int,
+         workers: int | None = None, timeout: float | None = None,
+         max_nonce: int = 2 ** 63) -> MiningResult:
+    """Busca un nonce válido repartiendo el trabajo entre `workers` procesos."""
+    workers = max(1, workers or os.cpu_count() or 1)
+    prefix = header_prefix(height, prev_hash, merkle_root)
+    target = target_for(difficulty_bits)
+    stop = mp.Event()
+    results = mp.Queue()
+    procs = [
+        mp.Process(target=_search, args=(i, workers, prefix, target, max_nonce, stop, results), daemon=True)
+        for i in range(workers)
+    ]
+    started = time.perf_counter()
+    for p in procs:
+        p.start()
+
+    reports = []
+    deadline = started + timeout if timeout else None
+    while len(reports) < workers:
+        try:
+            reports.append(results.get(timeout=REPORT_POLL_S))
+            continue
+        except queue.Empty:
+            pass
+        if deadline is not None and time.perf_counter() >= deadline:
+            stop.set()           # tiempo agotado: que todos reporten y terminen
+            deadline = None
+        reported = {r[0] for r in reports}
+        if all(p.exitcode is not None for i, p in enumerate(procs) if i not in reported):
+            # Los que faltan terminaron: lo que alcanzaron a encolar ya está en la cola; el resto murió
+            stop.set()
+            while True:
+                try:
+                    reports.append(results.get(timeout=REPORT_POLL_S))
+                except queue.Empty:
+                    break
+            break
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - started
+
+    winners = sorted((r for r in reports if r[1] is not None), key=lambda r: r[1])
+    nonce = winners[0][1] if winners else None
+    digest = hashlib.sha256(prefix + str(nonce).encode()).hexdigest() if nonce is not None else None
+    reports.sort()
+    return MiningResult(
+        nonce=nonce,
+        hash=digest,
+        difficulty_bits=difficulty_bits,
+        hashes=sum(r[2] for r in reports),
+        elapsed=elapsed,
+        worker_hashrates=[r[2] / r[3] if r[3] else 0.0 for r in reports],
+    )
@@ -5,9 +5,11 @@ import hashlib
 class Block(models.Model):
     # height empieza en 0 (genesis) o en 1 si prefieres; aquí lo haremos automático en el serializer
     height = models.PositiveBigIntegerField(unique=True)
-    prev_hash = models.CharField(max_length=64)       # SHA-256 del bloque anterior
+    prev_hash = models.CharField(max_length=64, db_index=True)  # SHA-256 del bloque anterior
     merkle_root = models.CharField(max_length=64)     # raíz Merkle de las txs confirmadas
     nonce = models.CharField(max_length=64)           # texto o número (string para flexibilidad)
+    merkle_tree = models.BinaryField(null=True, blank=True, editable=False)  # niveles del árbol Merkle (ver blocks/merkle.py)
+    hash = models.CharField(max_length=64, unique=True, editable=False)      # SHA-256 de la cabecera, calculado al guardar
     mined_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -25,15 +27,53 @@ class Block(models.Model):
         # Cabecera simple para demo; en real incluirías más campos (timestamp, version, etc.)
         return f'{self.height}:{self.prev_hash}:{self.merkle_root}:{self.nonce}'
 
-    @property
-    def hash(self) -> str:
+    def compute_hash(self) -> str:
         return hashlib.sha256(self.header.encode('utf-8')).hexdigest()
 
+    def save(self, *args, **kwargs):
+        # El hash se persiste (columna indexada) para no recalcularlo en cada lectura
+        self.hash = self.compute_hash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'hash' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'hash']
+        super().save(*args, **kwargs)
+
+
+class ChainTip(models.Model):
+    """
+    Punta de la cadena en una sola fila (pk=1). Reservar altura = UPDATE atómico de esta fila,
+    que queda bloqueada hasta el commit: los creadores concurrentes obtienen alturas distintas y
+    enlaces prev_hash correctos sin recorrer la tabla de bloques.
+    """
+    SINGLETON_ID = 1
+
+    next_height = models.PositiveBigIntegerField(default=0)
+    tip_hash = models.CharField(max_length=64, default='0' * 64)   # hash del último bloque (génesis: ceros)
+
+    def __str__(self):
+        return f'tip #{self.next_height - 1} {self.tip_hash[:12]}'
+
+
+class ChainCheckpoint(models.Model):
+    """Último bloque verificado por `manage.py verify_chain`, para reanudar desde ahí."""
+    name = models.CharField(max_length=40, unique=True, default='default')
+    height = models.PositiveBigIntegerField()
+    block_hash = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.name}: #{self.height}'
+
 
 class MiningReward(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='mining_rewards')
+    # Una sola recompensa por bloque: el nonce ganador es determinista, repetir el minado no paga de nuevo
+    block = models.OneToOneField(Block, null=True, blank=True, on_delete=models.SET_NULL, related_name='mining_reward')
     block_height = models.PositiveBigIntegerField()
     block_hash = models.CharField(max_length=64)
+    nonce = models.CharField(max_length=64, blank=True)              # nonce ganador de la prueba de trabajo
+    difficulty_bits = models.PositiveSmallIntegerField(default=0)
+    hashrate = models.FloatField(default=0)                           # hashes/s totales del minado
     amount_btc = models.DecimalField(max_digits=18, decimal_places=8)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -42,3 +82,43 @@ class MiningReward(models.Model):
 
     def __str__(self):
         return f'{self.user_id} → {self.amount_btc} BTC (#{self.block_height})'
+
+
+class MiningJob(models.Model):
+    """
+    Minado pedido desde la API. La vista solo encola; el proceso `manage.py run_miner` toma los
+    PENDING en orden de id, corre la prueba de trabajo y deja el resultado en `result`.
+    """
+    STATUS_PENDING = 'PENDING'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_DONE = 'DONE'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'PENDING'),
+        (STATUS_RUNNING, 'RUNNING'),
+        (STATUS_DONE, 'DONE'),
+        (STATUS_FAILED, 'FAILED'),
+    ]
+    ACTIVE_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='mining_jobs')
+    block = models.ForeignKey(Block, on_delete=models.CASCADE, related_name='mining_jobs')
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    result = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [models.Index(fields=['status', 'id'])]
+        constraints = [
+            # Un minado en curso por usuario: la cola no se llena con pedidos repetidos
+            models.UniqueConstraint(
+                fields=['user'], condition=models.Q(status__in=['PENDING', 'RUNNING']),
+                name='miningjob_one_active_per_user',
+            ),
+        ]
+
+    def __str__(self):
+        return f'job {self.id} #{self.block_id} {self.status}'
@@ -1,21 +1,15 @@
 from rest_framework import serializers
-from django.db.models import Max
 from .models import Block
-import hashlib
-
-GENESIS_PREV_HASH = '0' * 64   # marcador del bloque génesis
+from .utils import GENESIS_PREV_HASH, create_block
 
 class BlockSerializer(serializers.ModelSerializer):
-    current_hash = serializers.SerializerMethodField()
+    current_hash = serializers.CharField(source='hash', read_only=True)
 
     class Meta:
         model = Block
         fields = ('id', 'height', 'prev_hash', 'merkle_root', 'nonce', 'mined_at', 'current_hash')
         read_only_fields = ('id', 'height', 'prev_hash', 'mined_at', 'current_hash')
 
-    def get_current_hash(self, obj) -> str:
-        return obj.hash
-
 class BlockCreateSerializer(serializers.ModelSerializer):
     """Para crear/minear un bloque. El cliente envía merkle_root y nonce."""
     class Meta:
@@ -23,19 +17,5 @@ class BlockCreateSerializer(serializers.ModelSerializer):
         fields = ('merkle_root', 'nonce')
 
     def create(self, validated_data):
-        # Siguiente height
-        last = Block.objects.aggregate(m=Max('height'))['m']
-        next_height = 0 if last is None else last + 1
-
-        # prev_hash = hash del último bloque, o GENESIS si no existe
-        if last is None:
-            prev_hash = GENESIS_PREV_HASH
-        else:
-            prev_block = Block.objects.get(height=last)
-            prev_hash = prev_block.hash
-
-        return Block.objects.create(
-            height=next_height,
-            prev_hash=prev_hash,
-            **validated_data
-        )
+        # Siguiente height y prev_hash = hash del último bloque, o GENESIS si no existe
+        return create_block(validated_data['merkle_root'], validated_data['nonce'])
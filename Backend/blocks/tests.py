@@ -1,3 +1,309 @@
-from django.test import TestCase
+import os
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from transactions.models import Transaction, WalletBalance
+from wallets.defaults import default_wallet_id
+
+from . import miner
+from .assembler import mempool_ready, seal_block
+from .jobs import claim_next_job, run_job
+from .merkle import merkle_root, verify_proof
+from .models import Block, ChainCheckpoint, MiningJob, MiningReward
+from .serializers import BlockCreateSerializer
+from .utils import GENESIS_PREV_HASH, create_block, mine_block
+
+
+class ChainTipConcurrencyTests(TransactionTestCase):
+    """Muchos hilos creando bloques a la vez: alturas distintas y cadena bien enlazada."""
+    THREADS = 8
+    BLOCKS_PER_THREAD = 15
+
+    def _worker(self, worker_id, errors):
+        try:
+            for i in range(self.BLOCKS_PER_THREAD):
+                for attempt in range(50):
+                    try:
+                        if i % 2:
+                            s = BlockCreateSerializer(data={'merkle_root': f'{worker_id:02x}' * 32, 'nonce': str(i)})
+                            s.is_valid(raise_exception=True)
+                            s.save()
+                        else:
+                            create_block(tx_hashes=[f'{worker_id:02x}{i:02x}' * 16])
+                        break
+                    except OperationalError:
+                        # SQLite de pruebas bloquea la BD entera: se reintenta, nunca se duplica altura
+                        time.sleep(0.005 * (attempt + 1))
+                else:
+                    errors.append(f'worker {worker_id}: sin reintentos')
+        except Exception as exc:  # noqa: BLE001 - se reporta en el hilo principal
+            errors.append(repr(exc))
+        finally:
+            connection.close()
+
+    def test_concurrent_block_creation(self):
+        errors = []
+        threads = [threading.Thread(target=self._worker, args=(n, errors)) for n in range(self.THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        blocks = list(Block.objects.order_by('height').values_list('height', 'prev_hash', 'hash'))
+        total = self.THREADS * self.BLOCKS_PER_THREAD
+        self.assertEqual([b[0] for b in blocks], list(range(total)))
+        prev = GENESIS_PREV_HASH
+        for height, prev_hash, block_hash in blocks:
+            self.assertEqual(prev_hash, prev, f'enlace roto en #{height}')
+            prev = block_hash
+
+
+_real_search = miner._search
+
+
+def _search_or_die(worker_id, *args):
+    if worker_id == 0:
+        os._exit(1)         # como un proceso muerto por OOM: no reporta nada
+    _real_search(worker_id, *args)
+
+
+class MinerWorkerDeathTests(SimpleTestCase):
+
+    def test_dead_worker_does_not_hang_the_miner(self):
+        outcome = []
+        with mock.patch.object(miner, '_search', _search_or_die):
+            thread = threading.Thread(target=lambda: outcome.append(miner.mine(1, '0' * 64, 'ab' * 32, 4, workers=2)),
+                                      daemon=True)
+            thread.start()
+            thread.join(10)
+
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(outcome[0].success)
+        self.assertEqual(len(outcome[0].worker_hashrates), 1)
+
+
+@override_settings(MINING_DIFFICULTY_BITS=4, MINING_WORKERS=1, MINING_TIMEOUT_S=10, WALLET_DEFAULT_CACHE_TTL_S=0)
+class MiningJobTests(TestCase):
+    """simulate-mining solo encola; el minero paga una única recompensa por bloque."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('miner', password='Pw123456!')
+        self.other = User.objects.create_user('other', password='Pw123456!')
+        self.block = create_block(tx_hashes=['ab' * 32])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _enqueue(self, block=None):
+        return self.client.post(f'/api/blocks/{(block or self.block).id}/simulate-mining/')
+
+    def test_request_enqueues_without_mining(self):
+        response = self._enqueue()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], MiningJob.STATUS_PENDING)
+        self.assertFalse(MiningReward.objects.exists())
+
+    def test_worker_pays_one_reward_per_block(self):
+        job_id = self._enqueue().data['job_id']
+
+        run_job(claim_next_job())
+
+        response = self.client.get(f'/api/blocks/mining-jobs/{job_id}/')
+        self.assertEqual(response.data['status'], MiningJob.STATUS_DONE)
+        self.assertTrue(response.data['success'])
+        self.assertEqual(MiningReward.objects.get().block_id, self.block.id)
+
+        self.assertEqual(self._enqueue().status_code, 409)
+        _, reward = mine_block(self.block, user=self.other)
+        self.assertIsNone(reward)
+        self.assertEqual(MiningReward.objects.count(), 1)
+
+    def test_one_active_job_per_user(self):
+        second = create_block(tx_hashes=['cd' * 32])
+
+        self.assertEqual(self._enqueue().status_code, 202)
+        self.assertEqual(self._enqueue(second).status_code, 409)
+
+    def test_job_status_is_private(self):
+        job_id = self._enqueue().data['job_id']
+        self.client.force_authenticate(self.other)
+
+        self.assertEqual(self.client.get(f'/api/blocks/mining-jobs/{job_id}/').status_code, 404)
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=0)
+class MerkleProofTests(TestCase):
+    """Las pruebas de inclusión verifican contra merkle_root, se lea el árbol guardado o se reconstruya."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='Pw123456!')
+        self.other = User.objects.create_user('bob', password='Pw123456!')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _tx(self) -> Transaction:
+        return Transaction.objects.create(
+            from_wallet_id=default_wallet_id(self.user.id), to_wallet_id=default_wallet_id(self.other.id),
+            amount=Decimal('0.10'), fee=Decimal('0'), tx_hash=os.urandom(32).hex(), status=Transaction.STATUS_PENDING,
+        )
+
+    def _assert_proofs(self, block, txs):
+        for tx in txs:
+            body = self.client.get(f'/api/blocks/{block.id}/proof/', {'tx': tx.tx_hash}).data
+            path = [(step['hash'], step['position']) for step in body['proof']]
+            self.assertTrue(body['verified'])
+            self.assertEqual((body['root_scheme'], body['tree_root']), ('merkle', block.merkle_root))
+            self.assertTrue(verify_proof(tx.tx_hash, path, block.merkle_root))
+
+    def test_proof_round_trip_stored_and_rebuilt_tree(self):
+        txs = [self._tx() for _ in range(5)]
+        # Orden de llegada distinto del de id: el árbol reconstruido debe usar el mismo que el ensamblador
+        base = txs[0].created_at
+        for n, tx in enumerate(txs):
+            Transaction.objects.filter(pk=tx.pk).update(created_at=base - timedelta(seconds=n))
+        block = seal_block(max_txs=10)
+
+        self._assert_proofs(block, txs)
+
+        Block.objects.filter(pk=block.pk).update(merkle_tree=None)
+        self._assert_proofs(Block.objects.get(pk=block.pk), txs)
+        self.assertIsNone(Block.objects.get(pk=block.pk).merkle_tree)       # un GET no escribe
+
+    def test_proofs_for_odd_and_single_transaction_blocks(self):
+        odd = [self._tx() for _ in range(3)]
+        self._assert_proofs(seal_block(max_txs=10), odd)
+
+        single = self._tx()
+        block = seal_block(max_txs=10)
+        self.assertEqual(block.merkle_root, single.tx_hash)
+        self._assert_proofs(block, [single])
+        body = self.client.get(f'/api/blocks/{block.id}/proof/', {'tx': single.tx_hash}).data
+        self.assertEqual(body['proof'], [])
+
+    def test_legacy_root_is_reported_not_verified(self):
+        first, second = self._tx(), self._tx()
+        block = create_block(merkle_root=first.tx_hash, nonce='1')      # como confirmaba el código anterior
+        Transaction.objects.filter(pk__in=[first.pk, second.pk]).update(block=block, status=Transaction.STATUS_CONFIRMED)
+
+        body = self.client.get(f'/api/blocks/{block.id}/proof/', {'tx': second.tx_hash}).data
+
+        self.assertEqual(body['root_scheme'], 'legacy')
+        self.assertIsNone(body['verified'])
+        self.assertEqual(body['merkle_root'], first.tx_hash)
+        path = [(step['hash'], step['position']) for step in body['proof']]
+        self.assertTrue(verify_proof(second.tx_hash, path, body['tree_root']))
+
+    def test_confirm_into_sealed_block_is_rejected(self):
+        block = create_block(tx_hashes=['aa' * 32])
+        tx = self._tx()
+
+        response = self.client.post(f'/api/tx/{tx.id}/confirm/', {'block': block.id}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        tx.refresh_from_db()
+        self.assertEqual((tx.status, tx.block_id), (Transaction.STATUS_PENDING, None))
+
+    def test_confirm_into_block_that_commits_to_the_tx(self):
+        tx = self._tx()
+        block = create_block(merkle_root=merkle_root([tx.tx_hash]), nonce='1')
+
+        response = self.client.post(f'/api/tx/{tx.id}/confirm/', {'block': block.id}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self._assert_proofs(Block.objects.get(pk=block.pk), [tx])
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=0, MEMPOOL_ENABLED=True)
+class AssemblerTests(TestCase):
+    """El ensamblador sella el mempool en lotes de K y confirma cada lote con el libro de saldos al día."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('carol', password='Pw123456!')
+        User.objects.create_user('dave', password='Pw123456!')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.wallet = default_wallet_id(self.user.id)
+        for _ in range(5):
+            response = self.client.post('/api/tx/', {'from_wallet': self.wallet, 'to_username': 'dave', 'amount': '0.50'},
+                                        format='json')
+            self.assertEqual(response.status_code, 201)
+
+    def _pending(self) -> int:
+        return Transaction.objects.filter(from_wallet_id=self.wallet, status=Transaction.STATUS_PENDING).count()
+
+    def test_seal_block_confirms_one_batch(self):
+        block = seal_block(max_txs=2)
+
+        self.assertEqual(block.transactions.count(), 2)
+        self.assertFalse(block.transactions.exclude(status=Transaction.STATUS_CONFIRMED).exists())
+        self.assertEqual(self._pending(), 3)
+        balance = WalletBalance.objects.get(wallet_id=self.wallet, currency=Transaction.CURRENCY_SIM)
+        self.assertEqual((balance.confirmed, balance.pending_out), (Decimal('4.00'), Decimal('1.50')))
+
+    def test_ready_when_batch_full_or_oldest_waited(self):
+        self.assertTrue(mempool_ready(max_txs=5, max_wait_ms=60_000))
+        self.assertFalse(mempool_ready(max_txs=6, max_wait_ms=60_000))
+        self.assertTrue(mempool_ready(max_txs=6, max_wait_ms=0))
+
+    def test_command_once_seals_everything_in_batches(self):
+        call_command('assemble_blocks', '--once', '--max-txs', '2', stdout=StringIO())
+
+        self.assertEqual(self._pending(), 0)
+        sizes = Counter(Transaction.objects.filter(from_wallet_id=self.wallet).values_list('block_id', flat=True))
+        self.assertEqual(sorted(sizes.values()), [1, 2, 2])
+
+    @override_settings(MEMPOOL_ENABLED=False)
+    def test_command_does_nothing_without_mempool(self):
+        call_command('assemble_blocks', '--once', stdout=StringIO())
+
+        self.assertEqual(self._pending(), 5)
+
+
+class VerifyChainTests(TestCase):
+    """manage.py verify_chain recalcula cada hash y enlace prev_hash, y reanuda desde su checkpoint."""
+
+    def setUp(self):
+        self.blocks = [create_block(tx_hashes=[f'{i:02x}' * 32]) for i in range(4)]
+
+    def _verify(self, *args) -> str:
+        out = StringIO()
+        call_command('verify_chain', '--chunk', '2', *args, stdout=out)
+        return out.getvalue()
+
+    def test_valid_chain_saves_a_checkpoint(self):
+        self.assertIn('Cadena válida: 4 bloques', self._verify())
+        self.assertEqual(ChainCheckpoint.objects.get().height, self.blocks[-1].height)
+
+        self.assertIn('Cadena válida: 0 bloques', self._verify('--resume'))
+
+    def test_tampered_header_is_detected(self):
+        tampered = self.blocks[1]
+        Block.objects.filter(id=tampered.id).update(merkle_root='ff' * 32)
+
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, '1 errores en 4 bloques'):
+            call_command('verify_chain', '--no-save', stdout=out)
+        self.assertIn(f'#{tampered.height}: hash guardado no coincide', out.getvalue())
+        self.assertFalse(ChainCheckpoint.objects.exists())
+
+    def test_rewritten_hash_breaks_the_next_link(self):
+        Block.objects.filter(id=self.blocks[1].id).update(hash='00' * 32)
+
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, '2 errores'):
+            call_command('verify_chain', stdout=out)
+        self.assertIn(f'#{self.blocks[2].height}: prev_hash no enlaza', out.getvalue())
+        self.assertEqual(ChainCheckpoint.objects.get().height, self.blocks[0].height)    # última racha válida
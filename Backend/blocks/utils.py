@@ -0,0 +1,117 @@
+import os
+from decimal import Decimal
+from django.conf import settings
+from django.db import IntegrityError, transaction as dbtx
+from django.db.models import F
+
+from .merkle import build_levels, pack_levels, packed_root
+from .miner import MiningResult, mine
+from .models import Block, ChainTip, MiningReward
+
+GENESIS_PREV_HASH = '0' * 64   # marcador del bloque génesis
+# Orden de las hojas del árbol Merkle: el de llegada al mempool. Todo el que arme o reconstruya un árbol lo usa
+MERKLE_LEAF_ORDER = ('created_at', 'id')
+
+
+def _init_chain_tip() -> None:
+    last = Block.objects.order_by('-height').values_list('height', 'hash').first()
+    next_height, tip_hash = (0, GENESIS_PREV_HASH) if last is None else (last[0] + 1, last[1])
+    ChainTip.objects.get_or_create(
+        pk=ChainTip.SINGLETON_ID, defaults={'next_height': next_height, 'tip_hash': tip_hash}
+    )
+
+
+def reserve_block_link() -> tuple[int, str]:
+    """
+    Reserva (height, prev_hash) para un bloque nuevo. Llamar dentro de un atomic(): la fila ChainTip
+    queda bloqueada por el UPDATE hasta el commit, así que otro creador espera en vez de colisionar.
+    Después de crear el bloque hay que publicar su hash con set_chain_tip().
+    """
+    tip = ChainTip.objects.filter(pk=ChainTip.SINGLETON_ID)
+    if not tip.update(next_height=F('next_height') + 1):
+        _init_chain_tip()
+        tip.update(next_height=F('next_height') + 1)
+    next_height, prev_hash = tip.values_list('next_height', 'tip_hash').get()
+    return next_height - 1, prev_hash
+
+
+def set_chain_tip(block: Block) -> None:
+    ChainTip.objects.filter(pk=ChainTip.SINGLETON_ID).update(tip_hash=block.hash)
+
+
+@dbtx.atomic
+def create_block(merkle_root: str | None = None, nonce: str | None = None,
+                 tx_hashes: list[str] | None = None) -> Block:
+    """
+    Crea el siguiente bloque enlazado al último.
+    Con tx_hashes se calcula el árbol Merkle, se usa su raíz y se guardan sus niveles.
+    """
+    tree = None
+    if tx_hashes:
+        levels = build_levels(tx_hashes)
+        merkle_root = levels[-1][0].hex()
+        tree = pack_levels(levels)
+    height, prev_hash = reserve_block_link()
+    block = Block.objects.create(
+        height=height,
+        prev_hash=prev_hash,
+        merkle_root=merkle_root,
+        merkle_tree=tree,
+        nonce=nonce if nonce is not None else os.urandom(8).hex(),
+    )
+    set_chain_tip(block)
+    return block
+
+
+def block_merkle_tree(block: Block) -> bytes | None:
+    """
+    Niveles Merkle empaquetados del bloque. Los bloques con transacciones ya lo tienen guardado
+    (migración 0008); si falta se calcula al vuelo sin escribir: se usa desde GET /proof/.
+    """
+    if block.merkle_tree:
+        return bytes(block.merkle_tree)
+    tx_hashes = list(block.transactions.order_by(*MERKLE_LEAF_ORDER).values_list('tx_hash', flat=True))
+    if not tx_hashes:
+        return None
+    return pack_levels(build_levels(tx_hashes))
+
+
+def has_legacy_root(block: Block, tree: bytes) -> bool:
+    """
+    Bloques anteriores al árbol Merkle: al confirmar en un bloque existente su merkle_root quedaba igual
+    (el tx_hash de la primera transacción). No se puede corregir sin romper la cadena, así que sus
+    pruebas no se pueden verificar contra el bloque.
+    """
+    return packed_root(tree) != block.merkle_root
+
+
+def mine_block(block: Block, user=None, difficulty_bits: int | None = None,
+               workers: int | None = None, timeout: float | None = None) -> tuple[MiningResult, MiningReward | None]:
+    """
+    Prueba de trabajo sobre la cabecera del bloque. Si hay solución y `user`, registra la recompensa
+    con el nonce ganador; si el bloque ya tenía recompensa no se paga otra (devuelve None).
+    El bloque guardado no se modifica (cambiar su nonce rompería el enlace del siguiente).
+    """
+    result = mine(
+        block.height, block.prev_hash, block.merkle_root,
+        settings.MINING_DIFFICULTY_BITS if difficulty_bits is None else difficulty_bits,
+        workers=workers or settings.MINING_WORKERS,
+        timeout=settings.MINING_TIMEOUT_S if timeout is None else timeout,
+    )
+    reward = None
+    if result.success and user is not None:
+        try:
+            with dbtx.atomic():
+                reward = MiningReward.objects.create(
+                    user=user,
+                    block=block,
+                    block_height=block.height,
+                    block_hash=result.hash,
+                    nonce=str(result.nonce),
+                    difficulty_bits=result.difficulty_bits,
+                    hashrate=result.hashrate,
+                    amount_btc=Decimal(settings.MINING_REWARD_BTC).quantize(Decimal('0.00000001')),
+                )
+        except IntegrityError:
+            reward = None       # otro minado del mismo bloque ganó la recompensa
+    return result, reward
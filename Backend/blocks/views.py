@@ -1,21 +1,52 @@
-import random
 from decimal import Decimal
+from django.db import IntegrityError, transaction as dbtx
 from django.db.models import Sum, Count
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Block, MiningReward
+from .models import Block, MiningJob, MiningReward
 from .serializers import BlockSerializer, BlockCreateSerializer
+from .merkle import packed_index, packed_proof, packed_root, verify_proof
+from .utils import block_merkle_tree, has_legacy_root
 from auditlog.utils import log_action
+from api.pagination import KeysetPagination
+
+
+def _job_payload(job: MiningJob) -> dict:
+    height = job.block.height
+    result = job.result or {}
+    payload = {
+        'job_id': job.id,
+        'status': job.status,
+        'block_id': job.block_id,
+        'success': result.get('outcome') == 'success',
+        **{k: v for k, v in result.items() if k != 'outcome'},
+    }
+    if job.status in MiningJob.ACTIVE_STATUSES:
+        payload['message'] = f'Minado del bloque #{height} en cola.'
+    elif payload['success']:
+        payload['message'] = f"Bloque #{height} minado. Recompensa {result['reward_btc']} BTC"
+    elif result.get('reason') == 'already_mined':
+        payload['message'] = f'El bloque #{height} ya fue minado.'
+    else:
+        payload['message'] = f'Imposible minar el bloque #{height} en este intento.'
+    return payload
 
 class BlockViewSet(viewsets.ModelViewSet):
     """
     /api/blocks/            GET list (público de lectura), POST crea/minea (requiere auth)
     /api/blocks/{id}/       GET retrieve (público), DELETE (auth) [opcional en una demo]
     /api/blocks/mine/       POST alias de create (opcional)
+    /api/blocks/{id}/proof/?tx=<hash>   GET prueba de inclusión Merkle (público)
+    /api/blocks/{id}/simulate-mining/   POST encola la prueba de trabajo (202)
+    /api/blocks/mining-jobs/{job_id}/   GET estado del minado encolado
+    Filtros: ?hash=<hash del bloque> | ?prev_hash=<hash>
+    Paginación opcional: ?limit=N[&cursor=...]
     """
     queryset = Block.objects.all()
+    pagination_class = KeysetPagination
+    keyset_ordering = '-height'
     # Serializer por defecto para lecturas
     serializer_class = BlockSerializer
     
@@ -28,8 +59,18 @@ class BlockViewSet(viewsets.ModelViewSet):
         })
         return resp
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        hash_f = self.request.query_params.get('hash')
+        prev_f = self.request.query_params.get('prev_hash')
+        if hash_f:
+            qs = qs.filter(hash=hash_f.lower())
+        if prev_f:
+            qs = qs.filter(prev_hash=prev_f.lower())
+        return qs
+
     def get_permissions(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'proof'):
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
@@ -45,55 +86,58 @@ class BlockViewSet(viewsets.ModelViewSet):
             return Response(BlockSerializer(block).data, status=status.HTTP_201_CREATED)
         return Response(s.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=True, methods=['post'], url_path='simulate-mining')
-    def simulate_mining(self, request, pk=None):
-        """Simula el minado de un bloque existente con resultado aleatorio."""
+    @action(detail=True, methods=['get'])
+    def proof(self, request, pk=None):
+        """
+        Prueba de inclusión O(log n) de una transacción en el árbol Merkle del bloque. En bloques con raíz
+        heredada (root_scheme 'legacy', ver has_legacy_root) la prueba lleva a tree_root y verified es null.
+        """
         block = self.get_object()
-        block_snapshot = {
+        tx_hash = (request.query_params.get('tx') or '').strip().lower()
+        if len(tx_hash) != 64:
+            return Response({'detail': 'Parámetro tx inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            bytes.fromhex(tx_hash)
+        except ValueError:
+            return Response({'detail': 'Parámetro tx inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+        tree = block_merkle_tree(block)
+        index = packed_index(tree, tx_hash) if tree else None
+        if index is None:
+            return Response({'detail': 'La transacción no está en este bloque.'}, status=status.HTTP_404_NOT_FOUND)
+        path = packed_proof(tree, index)
+        legacy = has_legacy_root(block, tree)
+        return Response({
             'block_id': block.id,
             'height': block.height,
-            'prev_hash': block.prev_hash,
-            'current_hash': block.hash,
+            'tx_hash': tx_hash,
+            'index': index,
             'merkle_root': block.merkle_root,
-            'nonce': block.nonce,
-        }
+            'tree_root': packed_root(tree),
+            'root_scheme': 'legacy' if legacy else 'merkle',
+            'proof': [{'hash': h, 'position': side} for h, side in path],
+            'verified': None if legacy else verify_proof(tx_hash, path, block.merkle_root),
+        })
 
-        success = random.random() >= 0.5
-        if success:
-            reward_sats = random.randint(20_000, 150_000)  # 0.0002 - 0.0015 BTC aprox
-            reward = (Decimal(reward_sats) / Decimal('100000000')).quantize(Decimal('0.00000001'))
-            payload = {
-                **block_snapshot,
-                'reward_btc': str(reward),
-                'outcome': 'success',
-            }
-            log_action(request.user, 'BLOCK_SIMULATION_SUCCESS', payload)
-            MiningReward.objects.create(
-                user=request.user,
-                block_height=block_snapshot['height'],
-                block_hash=block_snapshot['current_hash'],
-                amount_btc=reward
-            )
-            block.delete()
-            return Response({
-                'success': True,
-                'message': f"Bloque #{block_snapshot['height']} minado. Recompensa {reward} BTC",
-                'reward_btc': str(reward),
-                'block_id': block_snapshot['block_id'],
-            })
+    @action(detail=True, methods=['post'], url_path='simulate-mining')
+    def simulate_mining(self, request, pk=None):
+        """Encola la prueba de trabajo del bloque (la corre `manage.py run_miner`); responde 202 con el trabajo."""
+        block = self.get_object()
+        if MiningReward.objects.filter(block=block).exists():
+            return Response({'detail': f'El bloque #{block.height} ya fue minado.'}, status=status.HTTP_409_CONFLICT)
+        try:
+            with dbtx.atomic():
+                job = MiningJob.objects.create(user=request.user, block=block)
+        except IntegrityError:
+            return Response({'detail': 'Ya tienes un minado en curso.'}, status=status.HTTP_409_CONFLICT)
+        return Response(_job_payload(job), status=status.HTTP_202_ACCEPTED)
 
-        payload = {
-            **block_snapshot,
-            'outcome': 'failure',
-            'reason': 'network_difficulty',
-        }
-        log_action(request.user, 'BLOCK_SIMULATION_FAILURE', payload)
-        block.delete()
-        return Response({
-            'success': False,
-            'message': f"Imposible minar el bloque #{block_snapshot['height']} en este intento.",
-            'block_id': block_snapshot['block_id'],
-        })
+    @action(detail=False, methods=['get'], url_path=r'mining-jobs/(?P<job_id>\d+)')
+    def mining_job(self, request, job_id=None):
+        """Estado de un minado encolado por el usuario."""
+        job = MiningJob.objects.select_related('block').filter(id=job_id, user=request.user).first()
+        if job is None:
+            return Response({'detail': 'No encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(_job_payload(job))
 
     @action(detail=False, methods=['get'], url_path='mining-summary')
     def mining_summary(self, request):
@@ -3,6 +3,8 @@ from datetime import timedelta
 import os
 from urllib.parse import urlparse
 
+from corsheaders.defaults import default_headers
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'django-insecure-8&flnunambtx749lwvuna=qs86tm*@q++de!+^7muf2ibia=5c')
 DEBUG = os.environ.get('DJANGO_DEBUG', '0') == '1'
@@ -133,7 +135,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # DRF + JWT
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated', # por defecto todo protegido
@@ -145,6 +147,69 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
 }
 
+# Caché compartida por todos los workers y procesos (principal JWT, último precio, versión de la analítica).
+# Sin REDIS_URL se usa memoria local: las invalidaciones no cruzan procesos (solo desarrollo y tests)
+redis_url = os.environ.get('REDIS_URL')
+if redis_url:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': redis_url}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Principal del usuario autenticado (campos sin contraseña + ids de wallets) en caché, en segundos
+AUTH_PRINCIPAL_TTL_S = int(os.environ.get('AUTH_PRINCIPAL_TTL_S', '30'))
+# Sin REDIS_URL: vigencia por worker (retraso máximo con que los demás ven una desactivación o cambio de contraseña)
+AUTH_PRINCIPAL_LOCAL_TTL_S = int(os.environ.get('AUTH_PRINCIPAL_LOCAL_TTL_S', '5'))
+
+# Ids de wallet por defecto (por usuario) y del exchange en memoria de cada worker, en segundos
+WALLET_DEFAULT_CACHE_TTL_S = int(os.environ.get('WALLET_DEFAULT_CACHE_TTL_S', '60'))
+
+# Idempotency-Key (api/idempotency.py): vigencia de la respuesta guardada, Retry-After del 409 a duplicados
+# concurrentes y tiempo tras el cual una petición en curso se da por abandonada (segundos)
+IDEMPOTENCY_TTL_S = int(os.environ.get('IDEMPOTENCY_TTL_S', str(24 * 3600)))
+IDEMPOTENCY_RETRY_AFTER_S = int(os.environ.get('IDEMPOTENCY_RETRY_AFTER_S', '1'))
+IDEMPOTENCY_LOCK_S = int(os.environ.get('IDEMPOTENCY_LOCK_S', '60'))
+
+# Token step-up (POST /api/auth/step-up/): segundos durante los que confirma operaciones sin contraseña
+STEP_UP_TTL_S = int(os.environ.get('STEP_UP_TTL_S', '300'))
+
+# Solicitudes P2P: segundos que una TradeRequest puede seguir PENDING antes de vencer (0 = nunca).
+# manage.py expire_trade_requests las pasa a CANCELLED
+TRADE_REQUEST_TTL_S = int(os.environ.get('TRADE_REQUEST_TTL_S', str(3 * 24 * 3600)))
+
+# Mempool: si está activo, buy/sell/approve dejan la transacción PENDING y el
+# ensamblador (manage.py assemble_blocks, proceso `assembler` del Procfile) la sella en un bloque junto con otras.
+MEMPOOL_ENABLED = os.environ.get('MEMPOOL_ENABLED', '0') == '1'
+BLOCK_MAX_TXS = int(os.environ.get('BLOCK_MAX_TXS', '500'))          # K: transacciones por bloque
+BLOCK_MAX_WAIT_MS = int(os.environ.get('BLOCK_MAX_WAIT_MS', '2000'))  # T: espera máxima en el mempool
+
+# Minado (prueba de trabajo): hash de la cabecera < 2**(256 - bits)
+MINING_DIFFICULTY_BITS = int(os.environ.get('MINING_DIFFICULTY_BITS', '18'))
+MINING_WORKERS = int(os.environ.get('MINING_WORKERS', '0')) or os.cpu_count() or 1
+MINING_TIMEOUT_S = float(os.environ.get('MINING_TIMEOUT_S', '10'))
+MINING_REWARD_BTC = os.environ.get('MINING_REWARD_BTC', '0.00050000')
+
+# Bitácora con buffer: encola y escribe en lote (bulk_create) por tamaño o por tiempo
+AUDITLOG_BUFFERED = os.environ.get('AUDITLOG_BUFFERED', '0') == '1'
+AUDITLOG_FLUSH_SIZE = int(os.environ.get('AUDITLOG_FLUSH_SIZE', '200'))
+AUDITLOG_FLUSH_INTERVAL = float(os.environ.get('AUDITLOG_FLUSH_INTERVAL', '1.0'))
+# Tope de entradas en cola si la BD no responde (se descartan las más antiguas)
+AUDITLOG_MAX_PENDING = int(os.environ.get('AUDITLOG_MAX_PENDING', '10000'))
+
+# Último precio: copia en memoria por worker sobre la caché de Django (ambos en segundos)
+PRICE_LATEST_LOCAL_TTL = float(os.environ.get('PRICE_LATEST_LOCAL_TTL', '1.0'))
+PRICE_LATEST_CACHE_TTL = float(os.environ.get('PRICE_LATEST_CACHE_TTL', '5.0'))
+PRICE_ANALYTICS_CACHE_SIZE = int(os.environ.get('PRICE_ANALYTICS_CACHE_SIZE', '32'))   # entradas LRU por worker
+PRICE_ANALYTICS_CACHE_TTL = float(os.environ.get('PRICE_ANALYTICS_CACHE_TTL', '60'))   # segundos máximos de una entrada
+
+# Retención de precios (manage.py prune_prices): días de ticks crudos y de velas por intervalo (1d no se borra)
+PRICE_TICK_RETENTION_DAYS = int(os.environ.get('PRICE_TICK_RETENTION_DAYS', '7'))
+PRICE_CANDLE_RETENTION = {
+    interval: int(days)
+    for interval, days in (
+        item.split('=') for item in os.environ.get('PRICE_CANDLE_RETENTION', '1m=7,5m=30,1h=365').split(',') if item
+    )
+}
+
 
 # CORS: permite que el frontend consuma la API
 frontend_origins = os.environ.get('FRONTEND_ORIGINS')
@@ -156,6 +221,9 @@ else:
         'http://localhost:4200', 'http://127.0.0.1:4200',
     ]
 
+# Cabeceras propias que el navegador puede enviar (Idempotency-Key, token step-up)
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'x-step-up-token')
+
 if render_host:
     render_origin = f"https://{render_host}"
     if render_origin not in CORS_ALLOWED_ORIGINS:
@@ -0,0 +1,156 @@
+"""
+Analítica de precios vectorizada con NumPy.
+
+Los arreglos (ts, price_usd, volume_sim) se cargan una vez con values_list y todas las métricas se
+calculan sobre ellos: SMA, EMA, retornos logarítmicos, volatilidad móvil, drawdown y VWAP móvil.
+El resultado se guarda en un LRU por (rango, ventana, puntos, versión de los datos); la versión cambia
+con cada inserción (id máximo), con cualquier edición o borrado de ticks y con la purga de retención
+(contador en la caché de Django, ver bump_version), así la entrada vieja deja de coincidir sin tener que
+invalidarla. Además expira cada PRICE_ANALYTICS_CACHE_TTL segundos por si el cambio vino de otro
+proceso y CACHES no es compartida. La vista acota el rango y las filas (como /series/); con más de
+`limit` ticks price_analytics devuelve None sin calcular nada.
+"""
+import math
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+
+from .downsample import load_columns, lttb
+from .latest import get_latest
+from .models import PriceTick
+
+VERSION_KEY = 'priceticks:analytics_version'
+
+
+def rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Suma de las últimas `window` posiciones; nan mientras la ventana no está completa."""
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        csum = np.cumsum(np.concatenate(([0.0], values)))
+        out[window - 1:] = csum[window:] - csum[:-window]
+    return out
+
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    return rolling_sum(values, window) / window
+
+
+def ema(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    EMA con alpha = 2 / (window + 1), sin bucle por elemento: se resuelve por bloques en los que
+    (1 - alpha)**k no llega a subdesbordarse, usando ema[i] = d**(i+1)·prev + alpha·d**i·Σ x_k / d**k.
+    """
+    n = len(values)
+    out = np.empty(n)
+    if not n:
+        return out
+    alpha = 2.0 / (window + 1)
+    decay = 1.0 - alpha
+    block = max(1, min(4096, int(-280 * math.log(10) / math.log(decay)))) if decay > 0 else 1
+    powers = decay ** np.arange(block + 1)
+    prev = values[0]
+    out[0] = prev
+    i = 1
+    while i < n:
+        chunk = values[i:i + block]
+        m = len(chunk)
+        p = powers[:m]
+        out[i:i + m] = powers[1:m + 1] * prev + alpha * p * np.cumsum(chunk / p)
+        prev = out[i + m - 1]
+        i += m
+    return out
+
+
+def log_returns(prices: np.ndarray) -> np.ndarray:
+    out = np.full(len(prices), np.nan)
+    out[1:] = np.diff(np.log(prices))
+    return out
+
+
+def rolling_volatility(returns: np.ndarray, window: int) -> np.ndarray:
+    """Desviación estándar (poblacional) de los retornos en la ventana."""
+    r = np.nan_to_num(returns)
+    mean = rolling_sum(r, window) / window
+    var = rolling_sum(r * r, window) / window - mean * mean
+    out = np.sqrt(np.clip(var, 0, None))
+    out[:window] = np.nan          # la primera ventana incluye el retorno inexistente del tick 0
+    return out
+
+
+def drawdown(prices: np.ndarray) -> np.ndarray:
+    return prices / np.maximum.accumulate(prices) - 1.0
+
+
+def rolling_vwap(prices: np.ndarray, volumes: np.ndarray, window: int) -> np.ndarray:
+    v = np.nan_to_num(volumes)
+    pv = rolling_sum(prices * v, window)
+    vv = rolling_sum(v, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(vv > 0, pv / vv, np.nan)
+
+
+def _num(value, digits: int = 6):
+    value = float(value)
+    return None if math.isnan(value) or math.isinf(value) else round(value, digits)
+
+
+def compute(x: np.ndarray, prices: np.ndarray, volumes: np.ndarray, window: int, points: int) -> dict:
+    n = len(prices)
+    if not n:
+        return {'window': window, 'source_points': 0, 'summary': None, 'series': []}
+    returns = log_returns(prices)
+    metrics = {
+        'sma': sma(prices, window),
+        'ema': ema(prices, window),
+        'log_return': returns,
+        'volatility': rolling_volatility(returns, window),
+        'drawdown': drawdown(prices),
+        'vwap': rolling_vwap(prices, volumes, window),
+    }
+    summary = {name: _num(values[-1]) for name, values in metrics.items()}
+    summary.update({
+        'last': _num(prices[-1], 2),
+        'total_return': _num(prices[-1] / prices[0] - 1.0),
+        'max_drawdown': _num(metrics['drawdown'].min()),
+    })
+    series = []
+    for i in lttb(x, prices, points):
+        row = {'ts': datetime.fromtimestamp(x[i], tz=dt_timezone.utc).isoformat(), 'price_usd': _num(prices[i], 2)}
+        row.update({name: _num(values[i]) for name, values in metrics.items()})
+        series.append(row)
+    return {'window': window, 'source_points': n, 'summary': summary, 'series': series}
+
+
+@lru_cache(maxsize=settings.PRICE_ANALYTICS_CACHE_SIZE)
+def _cached(start: datetime | None, end: datetime | None, window: int, points: int, limit: int | None,
+            version: tuple) -> dict | None:
+    x, prices, volumes = load_columns(start, end, ('price_usd', 'volume_sim'), limit=None if limit is None else limit + 1)
+    if limit is not None and len(x) > limit:
+        return None
+    return compute(x, prices, volumes, window, points)
+
+
+def bump_version() -> None:
+    """Llamar tras editar o borrar ticks: el id máximo no cambia y el LRU seguiría sirviendo lo anterior."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def price_analytics(start: datetime | None, end: datetime | None, window: int, points: int,
+                    limit: int | None = None) -> dict | None:
+    """Analítica del rango (resultado compartido del LRU: no modificar); None si hay más de `limit` ticks."""
+    latest = get_latest()
+    version = (
+        PriceTick.objects.aggregate(m=Max('id'))['m'],
+        latest['etag'] if latest else None,
+        cache.get(VERSION_KEY, 0),
+        int(time.time() // settings.PRICE_ANALYTICS_CACHE_TTL),
+    )
+    return _cached(start, end, window, points, limit, version)
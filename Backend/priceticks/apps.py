@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PriceticksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'priceticks'
+
+    def ready(self) -> None:
+        # Rollups OHLCV incrementales
+        from . import signals  # noqa: F401
@@ -0,0 +1,237 @@
+"""
+Rollups OHLCV de PriceTick.
+
+apply_tick() actualiza las velas de todos los intervalos con un tick nuevo (un UPDATE por intervalo,
+sin leer los ticks anteriores). apply_ticks() hace lo mismo para un lote insertado con bulk_create
+(que no dispara post_save): agrega el lote en memoria y funde una vela parcial por bucket; apply_new_ticks()
+lo aplica a lo recién cargado. rebuild_candles() recalcula desde los ticks, día por día, solo donde los
+ticks crudos siguen completos (ver retention.py), para el backfill; al editar o borrar un tick se
+recalcula su día con rebuild_day() bajo la misma condición (day_is_complete()).
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, transaction as dbtx
+from django.db.models import Case, Count, F, Value, When
+from django.db.models.functions import Greatest, Least, TruncDay
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import PriceCandle, PriceTick
+
+INTERVAL_SECONDS = {'1m': 60, '5m': 300, '1h': 3600, '1d': 86400}
+ZERO = Decimal('0')
+
+
+def parse_ts(value: str | None) -> datetime | None:
+    """Fecha/hora ISO (o epoch en segundos) a datetime con zona; naive se asume UTC. ValueError si no es válida."""
+    if not value:
+        return None
+    if value.replace('.', '', 1).isdigit():
+        return datetime.fromtimestamp(float(value), tz=dt_timezone.utc)
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+def bucket_start(ts: datetime, interval: str) -> datetime:
+    seconds = INTERVAL_SECONDS[interval]
+    epoch = int(ts.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=dt_timezone.utc)
+
+
+def _merge(part: PriceCandle) -> dict:
+    """Expresiones de UPDATE que funden una vela parcial en la existente (toleran ticks fuera de orden)."""
+    return {
+        'open': Case(When(open_ts__gt=part.open_ts, then=Value(part.open)), default=F('open')),
+        'open_ts': Least(F('open_ts'), Value(part.open_ts)),
+        'close': Case(When(close_ts__lte=part.close_ts, then=Value(part.close)), default=F('close')),
+        'close_ts': Greatest(F('close_ts'), Value(part.close_ts)),
+        'high': Greatest(F('high'), Value(part.high)),
+        'low': Least(F('low'), Value(part.low)),
+        'volume': F('volume') + part.volume,
+        'ticks': F('ticks') + part.ticks,
+    }
+
+
+def _upsert(part: PriceCandle) -> None:
+    qs = PriceCandle.objects.filter(interval=part.interval, bucket=part.bucket)
+    if qs.update(**_merge(part)):
+        return
+    try:
+        with dbtx.atomic():
+            part.save(force_insert=True)
+    except IntegrityError:
+        # Otro proceso creó la vela entre el UPDATE y el INSERT
+        part.pk = None
+        qs.update(**_merge(part))
+
+
+def _single(interval: str, ts: datetime, price: Decimal, volume: Decimal) -> PriceCandle:
+    price, volume = Decimal(str(price)), Decimal(str(volume))
+    return PriceCandle(
+        interval=interval, bucket=bucket_start(ts, interval),
+        open=price, high=price, low=price, close=price,
+        volume=volume, ticks=1, open_ts=ts, close_ts=ts,
+    )
+
+
+def apply_tick(ts: datetime, price: Decimal, volume: Decimal | None = None) -> None:
+    """Incorpora un tick a las velas de todos los intervalos."""
+    for interval in INTERVAL_SECONDS:
+        _upsert(_single(interval, ts, price, volume or ZERO))
+
+
+def apply_ticks(ticks) -> int:
+    """Incorpora un lote de PriceTick (p. ej. tras bulk_create). Devuelve velas tocadas."""
+    parts: dict[tuple[str, datetime], PriceCandle] = {}
+    for tick in ticks:
+        volume = tick.volume_sim or ZERO
+        for interval in INTERVAL_SECONDS:
+            key = (interval, bucket_start(tick.ts, interval))
+            part = parts.get(key)
+            if part is None:
+                parts[key] = _single(interval, tick.ts, tick.price_usd, volume)
+                continue
+            if tick.ts < part.open_ts:
+                part.open, part.open_ts = tick.price_usd, tick.ts
+            if tick.ts >= part.close_ts:
+                part.close, part.close_ts = tick.price_usd, tick.ts
+            part.high = max(part.high, tick.price_usd)
+            part.low = min(part.low, tick.price_usd)
+            part.volume += volume
+            part.ticks += 1
+    for part in parts.values():
+        _upsert(part)
+    return len(parts)
+
+
+def _floor_day(ts: datetime) -> datetime:
+    return bucket_start(ts, '1d')
+
+
+def retention_floor() -> datetime | None:
+    """Primer día con ticks crudos garantizados (PRICE_TICK_RETENTION_DAYS); antes, las velas son la única copia."""
+    days = settings.PRICE_TICK_RETENTION_DAYS
+    if days <= 0:
+        return None
+    return _floor_day(timezone.now() - timedelta(days=days))
+
+
+def day_is_complete(day: datetime) -> bool:
+    """Si el día UTC de `day` aún tiene todos sus ticks crudos, es decir, si rebuild_day() no pierde historia."""
+    start = _floor_day(day)
+    floor = retention_floor()
+    if floor is not None and start < floor:
+        return False
+    covered = PriceCandle.objects.filter(interval='1d', bucket=start).values_list('ticks', flat=True).first() or 0
+    return covered <= PriceTick.objects.filter(ts__gte=start, ts__lt=start + timedelta(days=1)).count()
+
+
+def apply_new_ticks(after_id: int, chunk_size: int = 5000) -> int:
+    """
+    Funde en las velas los ticks con id > after_id (cargas con bulk_create y candles=False).
+    Solo suma a las velas existentes: nunca borra historia ya compactada. Devuelve ticks aplicados.
+    """
+    ticks = (
+        PriceTick.objects.filter(id__gt=after_id).order_by('id')
+        .only('ts', 'price_usd', 'volume_sim').iterator(chunk_size=chunk_size)
+    )
+    applied = 0
+    while batch := list(islice(ticks, chunk_size)):
+        with dbtx.atomic():
+            apply_ticks(batch)
+        applied += len(batch)
+    return applied
+
+
+def rebuild_candles(start: datetime | None = None, end: datetime | None = None,
+                    chunk_size: int = 5000) -> int:
+    """
+    Recalcula desde los ticks las velas de los días de [start, end] (alineado a días UTC) que aún
+    tienen todos sus ticks crudos. Se saltan los días anteriores a retention_floor() y los días cuya
+    vela diaria cuenta más ticks de los que quedan (prune_prices ya borró parte): ahí las velas
+    compactadas son la única copia. Devuelve velas escritas.
+    """
+    ticks = PriceTick.objects.all()
+    candles = PriceCandle.objects.filter(interval='1d')
+    floor = retention_floor()
+    if start is not None:
+        start = _floor_day(start)
+    if floor is not None and (start is None or start < floor):
+        start = floor
+    if start is not None:
+        ticks = ticks.filter(ts__gte=start)
+        candles = candles.filter(bucket__gte=start)
+    if end is not None:
+        end = _floor_day(end) + timedelta(days=1)
+        ticks = ticks.filter(ts__lt=end)
+        candles = candles.filter(bucket__lt=end)
+    raw = (
+        ticks.annotate(day=TruncDay('ts', tzinfo=dt_timezone.utc))
+        .values('day').annotate(n=Count('id')).order_by('day').values_list('day', 'n')
+    )
+    covered = dict(candles.values_list('bucket', 'ticks'))
+    written = 0
+    for day, count in raw:
+        if covered.get(day, 0) > count:
+            continue
+        written += rebuild_day(day, chunk_size)
+    return written
+
+
+@dbtx.atomic
+def rebuild_day(day: datetime, chunk_size: int = 5000) -> int:
+    """
+    Reemplaza las velas del día UTC de `day` por las calculadas de sus ticks, en un solo recorrido
+    ordenado por ts (memoria constante: solo la vela abierta de cada intervalo). Devuelve velas escritas.
+    """
+    start = _floor_day(day)
+    end = start + timedelta(days=1)
+    PriceCandle.objects.filter(bucket__gte=start, bucket__lt=end).delete()
+    ticks = PriceTick.objects.filter(ts__gte=start, ts__lt=end).order_by('ts', 'id')
+
+    current: dict[str, PriceCandle] = {}
+    batch: list[PriceCandle] = []
+    written = 0
+
+    def emit(candle: PriceCandle) -> None:
+        nonlocal batch, written
+        batch.append(candle)
+        if len(batch) >= 1000:
+            PriceCandle.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+
+    for ts, price, volume in ticks.values_list('ts', 'price_usd', 'volume_sim').iterator(chunk_size=chunk_size):
+        volume = volume or ZERO
+        for interval in INTERVAL_SECONDS:
+            bucket = bucket_start(ts, interval)
+            candle = current.get(interval)
+            if candle is not None and candle.bucket == bucket:
+                candle.high = max(candle.high, price)
+                candle.low = min(candle.low, price)
+                candle.close = price
+                candle.close_ts = ts
+                candle.volume += volume
+                candle.ticks += 1
+                continue
+            if candle is not None:
+                emit(candle)
+            current[interval] = PriceCandle(
+                interval=interval, bucket=bucket,
+                open=price, high=price, low=price, close=price,
+                volume=volume, ticks=1, open_ts=ts, close_ts=ts,
+            )
+    for candle in current.values():
+        emit(candle)
+    if batch:
+        PriceCandle.objects.bulk_create(batch)
+        written += len(batch)
+    return written
@@ -0,0 +1,71 @@
+"""
+Reducción de series de precio con Largest-Triangle-Three-Buckets (LTTB).
+
+La serie (ts, price_usd) se lee de la BD por bloques con iterator() y se vuelca a arreglos NumPy;
+LTTB conserva la forma visual (picos y valles) devolviendo como máximo `points` puntos.
+"""
+from datetime import datetime
+
+import numpy as np
+
+from .models import PriceTick
+
+
+def load_columns(start: datetime | None, end: datetime | None, fields: tuple[str, ...],
+                 chunk_size: int = 20000, limit: int | None = None) -> tuple[np.ndarray, ...]:
+    """(epoch en segundos, *fields) como arreglos float64 ordenados por ts; NULL → nan. Como mucho `limit` filas."""
+    qs = PriceTick.objects.order_by('ts', 'id')
+    if start is not None:
+        qs = qs.filter(ts__gte=start)
+    if end is not None:
+        qs = qs.filter(ts__lte=end)
+    if limit is not None:
+        qs = qs[:limit]
+    width = len(fields) + 1
+    chunks: list[np.ndarray] = []
+    buf: list[tuple] = []
+    for row in qs.values_list('ts', *fields).iterator(chunk_size=chunk_size):
+        buf.append((row[0].timestamp(), *(np.nan if v is None else float(v) for v in row[1:])))
+        if len(buf) >= chunk_size:
+            chunks.append(np.array(buf, dtype=np.float64))
+            buf = []
+    if buf:
+        chunks.append(np.array(buf, dtype=np.float64))
+    if not chunks:
+        return tuple(np.empty(0) for _ in range(width))
+    data = np.concatenate(chunks)
+    return tuple(data[:, i] for i in range(width))
+
+
+def load_series(start: datetime | None = None, end: datetime | None = None,
+                chunk_size: int = 20000, limit: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Devuelve (x = epoch en segundos, y = precio USD) ordenados por ts."""
+    return load_columns(start, end, ('price_usd',), chunk_size, limit)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Índices de los puntos elegidos por LTTB (incluye siempre el primero y el último)."""
+    n = len(x)
+    if points >= n:
+        return np.arange(n)
+    if points < 3:
+        return np.array([0, n - 1][:max(points, 0)], dtype=np.int64)
+
+    # Límites de los buckets intermedios (el primero y el último punto van solos)
+    edges = np.floor(np.linspace(1, n - 1, points - 1)).astype(np.int64)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Promedio del bucket siguiente (el último punto para el bucket final)
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nlo:nhi].mean()
+        avg_y = y[nlo:nhi].mean()
+        ax, ay = x[a], y[a]
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((ax - avg_x) * (by - ay) - (ax - bx) * (avg_y - ay))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
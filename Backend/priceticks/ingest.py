@@ -0,0 +1,69 @@
+"""
+Ingesta masiva de PriceTick.
+
+bulk_create no dispara post_save, así que ingest_ticks() actualiza las velas con apply_ticks()
+por lote. Para cargas históricas grandes conviene candles=False y apply_new_ticks() al final.
+"""
+import csv
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from itertools import islice
+
+from django.db import transaction as dbtx
+
+from .candles import apply_ticks, parse_ts
+from .latest import invalidate_latest
+from .models import PriceTick
+
+CENTS = Decimal('0.01')
+SATS = Decimal('0.00000001')
+
+
+def _decimal(value, quant: Decimal, field: str) -> Decimal | None:
+    if value in (None, ''):
+        return None
+    try:
+        return Decimal(str(value)).quantize(quant, rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        raise ValueError(f'{field} inválido: {value!r}')
+
+
+def build_tick(row: dict) -> PriceTick:
+    """Dict (JSON/CSV) → PriceTick sin guardar. ValueError si falta ts/price_usd o no son válidos."""
+    try:
+        ts = parse_ts(str(row.get('ts') or ''))
+    except ValueError:
+        raise ValueError(f"ts inválido: {row.get('ts')!r}")
+    price = _decimal(row.get('price_usd'), CENTS, 'price_usd')
+    if ts is None or price is None:
+        raise ValueError('ts y price_usd son obligatorios.')
+    return PriceTick(
+        ts=ts,
+        price_usd=price,
+        price_btc=_decimal(row.get('price_btc'), SATS, 'price_btc'),
+        volume_sim=_decimal(row.get('volume_sim'), CENTS, 'volume_sim'),
+        notes=str(row.get('notes') or '')[:255],
+    )
+
+
+def ingest_ticks(ticks, batch_size: int = 5000, candles: bool = True) -> int:
+    """Inserta PriceTick por lotes con bulk_create (un atomic por lote). Devuelve ticks insertados."""
+    it = iter(ticks)
+    total = 0
+    while batch := list(islice(it, batch_size)):
+        with dbtx.atomic():
+            PriceTick.objects.bulk_create(batch)
+            if candles:
+                apply_ticks(batch)
+            # bulk_create no dispara post_save: la caché del último precio se invalida a mano
+            dbtx.on_commit(invalidate_latest)
+        total += len(batch)
+    return total
+
+
+def read_csv(stream):
+    """Recorre un CSV con cabecera (ts, price_usd[, price_btc, volume_sim, notes]) fila a fila."""
+    for line, row in enumerate(csv.DictReader(stream), start=2):
+        try:
+            yield build_tick(row)
+        except ValueError as exc:
+            raise ValueError(f'Línea {line}: {exc}')
@@ -0,0 +1,72 @@
+"""
+Caché del último precio (/api/prices/latest/).
+
+Dos niveles: una copia en memoria del proceso, válida PRICE_LATEST_LOCAL_TTL segundos, y la caché de
+Django (PRICE_LATEST_CACHE_TTL segundos; acota el retraso si los ticks los escribe otro proceso, p. ej.
+simulate_prices, y CACHES no es compartida). Las señales de PriceTick reemplazan o invalidan la entrada; la vista
+responde 304 con ETag/Last-Modified sin tocar la BD mientras el tick no cambie.
+"""
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import PriceTick
+
+CACHE_KEY = 'priceticks:latest'
+
+_lock = threading.Lock()
+_local: tuple[float, dict] | None = None     # (expira en monotonic, entrada)
+
+
+def _entry(tick: PriceTick) -> dict:
+    from .serializers import PriceTickSerializer
+
+    data = PriceTickSerializer(tick).data
+    digest = hashlib.sha1(json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode()).hexdigest()
+    return {'data': data, 'etag': f'"{digest[:20]}"', 'last_modified': tick.ts.timestamp()}
+
+
+def _remember(entry: dict | None) -> None:
+    global _local
+    with _lock:
+        _local = (time.monotonic() + settings.PRICE_LATEST_LOCAL_TTL, entry) if entry else None
+
+
+def get_latest() -> dict | None:
+    """{'data', 'etag', 'last_modified'} del tick más reciente, o None si no hay ticks."""
+    local = _local
+    if local is not None and local[0] > time.monotonic():
+        return local[1]
+    entry = cache.get(CACHE_KEY)
+    if entry is None:
+        tick = PriceTick.objects.order_by('-ts', '-id').first()
+        if tick is None:
+            return None
+        entry = _entry(tick)
+        cache.set(CACHE_KEY, entry, settings.PRICE_LATEST_CACHE_TTL)
+    _remember(entry)
+    return entry
+
+
+def replace_latest(tick: PriceTick) -> None:
+    """Tras guardar un tick: si es más reciente que la entrada la reemplaza; si era la entrada, la invalida."""
+    current = cache.get(CACHE_KEY)
+    if current is None or current['data']['id'] == tick.id:
+        # Sin entrada, o se editó el tick vigente (quizá ya no es el último): la próxima lectura recalcula
+        invalidate_latest()
+        return
+    if (tick.ts.timestamp(), tick.id) < (current['last_modified'], current['data']['id']):
+        return
+    entry = _entry(tick)
+    cache.set(CACHE_KEY, entry, settings.PRICE_LATEST_CACHE_TTL)
+    _remember(entry)
+
+
+def invalidate_latest() -> None:
+    cache.delete(CACHE_KEY)
+    _remember(None)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from priceticks.candles import parse_ts, rebuild_candles
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula las velas OHLCV (1m, 5m, 1h, 1d) a partir de los PriceTick. Los días anteriores a la '
+        'retención de ticks (o ya podados) se conservan tal cual: sus velas compactadas son la única copia.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help='Fecha/hora ISO inicial (se alinea al día UTC).')
+        parser.add_argument('--to', dest='end', help='Fecha/hora ISO final (incluye ese día completo).')
+        parser.add_argument('--chunk', type=int, default=5000, help='Ticks leídos por consulta.')
+
+    def handle(self, *args, **options):
+        start = self._parse(options['start'])
+        end = self._parse(options['end'])
+        written = rebuild_candles(start, end, options['chunk'])
+        self.stdout.write(self.style.SUCCESS(f'Velas escritas: {written}.'))
+
+    def _parse(self, value):
+        try:
+            return parse_ts(value)
+        except ValueError:
+            raise CommandError(f'Fecha inválida: {value}')
@@ -0,0 +1,67 @@
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+
+from priceticks.downsample import load_series, lttb
+from priceticks.ingest import ingest_ticks
+from priceticks.models import PriceTick
+from priceticks.retention import purge
+
+
+class Command(BaseCommand):
+    help = (
+        'Latencia de /api/prices/series/ sobre una BD de prueba desechable con 10k, 100k y 1M ticks: '
+        'lectura a NumPy (load_series), LTTB y la petición completa (incluye JSON).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000,1000000')
+        parser.add_argument('--points', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        creation = connection.creation
+        old_name = creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                self._run(options)
+        finally:
+            creation.destroy_test_db(old_name, verbosity=0)
+
+    def _run(self, options) -> None:
+        rng = np.random.default_rng(42)
+        points = options['points']
+        client = Client()
+        self.stdout.write(f"{'ticks':>10} {'carga ms':>10} {'lttb ms':>10} {'petición ms':>12}")
+        for size in (int(s) for s in options['sizes'].split(',')):
+            # Un tick por segundo: 1M ticks caben en el rango máximo de /series/
+            start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+            end = start + timedelta(seconds=size - 1)
+            prices = 20 * np.exp(np.cumsum(rng.normal(0, 0.01, size)))
+            purge(PriceTick.objects.all(), batch_size=100000)      # sin señales: no recalcula velas por tick
+            ingest_ticks(
+                (PriceTick(ts=start + timedelta(seconds=i), price_usd=Decimal(f'{p:.2f}')) for i, p in enumerate(prices.tolist())),
+                batch_size=20000, candles=False,
+            )
+            params = {'from': start.isoformat(), 'to': end.isoformat(), 'points': points}
+            best_load = best_lttb = best_request = float('inf')
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                x, y = load_series(start, end)
+                loaded = time.perf_counter()
+                idx = lttb(x, y, points)
+                done = time.perf_counter()
+                response = client.get('/api/prices/series/', params)
+                answered = time.perf_counter()
+                best_load = min(best_load, (loaded - started) * 1000)
+                best_lttb = min(best_lttb, (done - loaded) * 1000)
+                best_request = min(best_request, (answered - done) * 1000)
+            assert len(idx) == min(points, size)
+            assert response.status_code == 200, response.content[:200]
+            self.stdout.write(f'{size:>10,} {best_load:>10.1f} {best_lttb:>10.1f} {best_request:>12.1f}')
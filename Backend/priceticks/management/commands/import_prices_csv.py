@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from priceticks.candles import apply_new_ticks
+from priceticks.ingest import ingest_ticks, read_csv
+from priceticks.models import PriceTick
+
+
+class Command(BaseCommand):
+    help = 'Carga histórica de PriceTick desde un CSV (ts, price_usd[, price_btc, volume_sim, notes]) por lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Ruta del CSV ('-' para stdin).")
+        parser.add_argument('--batch', type=int, default=5000, help='Ticks por bulk_create.')
+        parser.add_argument('--skip-candles', action='store_true',
+                            help='No recalcula las velas al terminar (usar backfill_candles después).')
+
+    def handle(self, *args, **options):
+        last_id = PriceTick.objects.aggregate(m=Max('id'))['m'] or 0
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        try:
+            # Las velas se actualizan una sola vez al final en vez de por lote
+            written = ingest_ticks(read_csv(stream), options['batch'], candles=False)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if not options['skip_candles']:
+                # También si el CSV falla a mitad: los lotes ya confirmados no pueden quedar sin velas.
+                # Se funde en las velas existentes: un CSV que pisa días ya podados no borra su historia compactada
+                applied = apply_new_ticks(last_id)
+                self.stdout.write(f'Ticks aplicados a las velas: {applied}.')
+        self.stdout.write(self.style.SUCCESS(f'Ticks insertados: {written}.'))
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from priceticks.retention import run_retention
+
+
+class Command(BaseCommand):
+    help = 'Compacta los PriceTick antiguos en velas y borra ticks y velas finas vencidos por lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tick-days', type=int, default=settings.PRICE_TICK_RETENTION_DAYS,
+                            help='Días de ticks crudos que se conservan.')
+        parser.add_argument('--batch', type=int, default=5000, help='Filas por DELETE.')
+        parser.add_argument('--pause-ms', type=int, default=0, help='Pausa entre lotes.')
+        parser.add_argument('--dry-run', action='store_true', help='Solo cuenta lo que se borraría.')
+
+    def handle(self, *args, **options):
+        if options['tick_days'] < 1:
+            raise CommandError('--tick-days debe ser al menos 1.')
+        report = run_retention(
+            timezone.now(), options['tick_days'], settings.PRICE_CANDLE_RETENTION,
+            options['batch'], options['pause_ms'] / 1000, options['dry_run'],
+        )
+        verb = 'Se borrarían' if options['dry_run'] else 'Borrados'
+        self.stdout.write(f"Corte de ticks: {report['cutoff'].isoformat()}")
+        if report['days_rebuilt']:
+            self.stdout.write(f"Días recompactados en velas: {report['days_rebuilt']}")
+        self.stdout.write(f"{verb}: {report['ticks']} ticks")
+        for interval, rows in report['candles'].items():
+            self.stdout.write(f'{verb}: {rows} velas {interval}')
+        total = report['ticks'] + sum(report['candles'].values())
+        self.stdout.write(self.style.SUCCESS(f'Filas recuperadas: {total}.'))
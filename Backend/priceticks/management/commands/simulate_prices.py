@@ -0,0 +1,52 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+
+from priceticks.candles import apply_new_ticks
+from priceticks.ingest import ingest_ticks
+from priceticks.models import PriceTick
+from priceticks.simulator import last_price, next_tick, random_walk
+
+
+class Command(BaseCommand):
+    help = 'Simulador de precios del servidor: un tick cada --interval segundos (o --history N ticks pasados).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=8.0, help='Segundos entre ticks.')
+        parser.add_argument('--history', type=int, default=0,
+                            help='Genera N ticks hacia atrás desde ahora con bulk_create y termina.')
+        parser.add_argument('--batch', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--once', action='store_true', help='Escribe un solo tick y termina.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        step = timedelta(seconds=options['interval'])
+
+        if options['history']:
+            count = options['history']
+            start = timezone.now() - step * count
+            ticks = random_walk(last_price(), start, count, step, rng)
+            last_id = PriceTick.objects.aggregate(m=Max('id'))['m'] or 0
+            written = ingest_ticks(ticks, options['batch'], candles=False)
+            apply_new_ticks(last_id)
+            self.stdout.write(self.style.SUCCESS(f'Ticks históricos insertados: {written}.'))
+            return
+
+        self.stdout.write(f"Simulador iniciado (cada {options['interval']} s).")
+        price = last_price()
+        try:
+            while True:
+                tick = next_tick(price, timezone.now(), rng)
+                ingest_ticks([tick])
+                price = tick.price_usd
+                if options['once']:
+                    self.stdout.write(f'Tick {tick.ts.isoformat()} → ${tick.price_usd}')
+                    return
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Simulador detenido.')
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('priceticks', '0003_auto_add_extra_columns'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pricetick',
+            index=models.Index(fields=['-ts', '-id'], name='priceticks__ts_5339ba_idx'),
+        ),
+    ]
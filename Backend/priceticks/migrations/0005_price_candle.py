@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('priceticks', '0004_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceCandle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('interval', models.CharField(choices=[('1m', '1m'), ('5m', '5m'), ('1h', '1h'), ('1d', '1d')], max_length=3)),
+                ('bucket', models.DateTimeField()),
+                ('open', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('high', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('low', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('close', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('volume', models.DecimalField(decimal_places=2, default=0, max_digits=28)),
+                ('ticks', models.PositiveIntegerField(default=0)),
+                ('open_ts', models.DateTimeField()),
+                ('close_ts', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['interval', 'bucket'],
+                'constraints': [models.UniqueConstraint(fields=('interval', 'bucket'), name='uniq_price_candle_bucket')],
+            },
+        ),
+    ]
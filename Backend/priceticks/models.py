@@ -11,7 +11,38 @@ class PriceTick(models.Model):
         ordering = ['-ts']
         indexes = [
             models.Index(fields=['ts']),
+            models.Index(fields=['-ts', '-id']),   # paginación por cursor
         ]
 
     def __str__(self):
         return f'{self.ts.isoformat()} → ${self.price_usd}'
+
+
+class PriceCandle(models.Model):
+    """Vela OHLCV por intervalo, actualizada incrementalmente con cada PriceTick (ver candles.py)."""
+    INTERVAL_CHOICES = [
+        ('1m', '1m'),
+        ('5m', '5m'),
+        ('1h', '1h'),
+        ('1d', '1d'),
+    ]
+
+    interval = models.CharField(max_length=3, choices=INTERVAL_CHOICES)
+    bucket = models.DateTimeField()                       # inicio del intervalo (UTC)
+    open = models.DecimalField(max_digits=18, decimal_places=2)
+    high = models.DecimalField(max_digits=18, decimal_places=2)
+    low = models.DecimalField(max_digits=18, decimal_places=2)
+    close = models.DecimalField(max_digits=18, decimal_places=2)
+    volume = models.DecimalField(max_digits=28, decimal_places=2, default=0)
+    ticks = models.PositiveIntegerField(default=0)
+    open_ts = models.DateTimeField()                      # ts del tick que fijó open (ticks fuera de orden)
+    close_ts = models.DateTimeField()                     # ts del tick que fijó close
+
+    class Meta:
+        ordering = ['interval', 'bucket']
+        constraints = [
+            models.UniqueConstraint(fields=['interval', 'bucket'], name='uniq_price_candle_bucket'),
+        ]
+
+    def __str__(self):
+        return f'{self.interval} {self.bucket.isoformat()} O{self.open} H{self.high} L{self.low} C{self.close}'
@@ -0,0 +1,90 @@
+"""
+Retención de PriceTick y PriceCandle.
+
+Los ticks crudos anteriores al corte (alineado al día UTC) se compactan en velas y se borran por
+lotes de ids, cada lote en su propia transacción corta: nunca se bloquea la tabla completa y la
+ingesta (que solo escribe ticks recientes) sigue en paralelo. Las velas finas se podan según
+PRICE_CANDLE_RETENTION; las diarias se conservan siempre.
+"""
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection, transaction as dbtx
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay
+
+from .analytics import bump_version
+from .candles import bucket_start, rebuild_day
+from .models import PriceCandle, PriceTick
+
+
+def tick_cutoff(now: datetime, days: int) -> datetime:
+    return bucket_start(now - timedelta(days=days), '1d')
+
+
+def compact_ticks(cutoff: datetime) -> int:
+    """
+    Garantiza que los días anteriores a `cutoff` estén en las velas antes de borrar sus ticks.
+    Un día se recalcula solo si su vela diaria cuenta menos ticks que los que hay crudos (p. ej. una
+    carga con --skip-candles); si ya se borró parte del día, la vela cuenta más y se respeta.
+    Devuelve días recalculados.
+    """
+    raw = (
+        PriceTick.objects.filter(ts__lt=cutoff)
+        .annotate(day=TruncDay('ts', tzinfo=dt_timezone.utc))
+        .values('day').annotate(n=Count('id')).order_by('day')
+    )
+    covered = dict(
+        PriceCandle.objects.filter(interval='1d', bucket__lt=cutoff)
+        .values('bucket').annotate(n=Sum('ticks')).values_list('bucket', 'n')
+    )
+    rebuilt = 0
+    for row in raw:
+        if covered.get(row['day'], 0) < row['n']:
+            rebuild_day(row['day'])
+            rebuilt += 1
+    return rebuilt
+
+
+def _delete_ids(model, ids: list[int]) -> int:
+    # SQL directo: delete() del ORM cargaría cada fila para enviar post_delete (ver signals.py)
+    table = connection.ops.quote_name(model._meta.db_table)
+    with dbtx.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+        return cursor.rowcount
+
+
+def purge(queryset, batch_size: int = 5000, pause: float = 0.0) -> int:
+    """Borra las filas del queryset por lotes de ids. Devuelve filas eliminadas."""
+    deleted = 0
+    while ids := list(queryset.order_by('id').values_list('id', flat=True)[:batch_size]):
+        deleted += _delete_ids(queryset.model, ids)
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+
+def run_retention(now: datetime, tick_days: int, candle_policy: dict[str, int],
+                  batch_size: int = 5000, pause: float = 0.0, dry_run: bool = False) -> dict:
+    """Aplica la política completa y devuelve el detalle de filas recuperadas."""
+    cutoff = tick_cutoff(now, tick_days)
+    ticks = PriceTick.objects.filter(ts__lt=cutoff)
+    candles = {
+        interval: PriceCandle.objects.filter(interval=interval, bucket__lt=bucket_start(now - timedelta(days=days), '1d'))
+        for interval, days in candle_policy.items() if interval != '1d'
+    }
+    if dry_run:
+        return {
+            'cutoff': cutoff, 'days_rebuilt': 0, 'ticks': ticks.count(),
+            'candles': {interval: qs.count() for interval, qs in candles.items()},
+        }
+    days_rebuilt = compact_ticks(cutoff)
+    purged = purge(ticks, batch_size, pause)
+    if purged:
+        bump_version()      # el SQL directo no envía post_delete
+    return {
+        'cutoff': cutoff,
+        'days_rebuilt': days_rebuilt,
+        'ticks': purged,
+        'candles': {interval: purge(qs, batch_size, pause) for interval, qs in candles.items()},
+    }
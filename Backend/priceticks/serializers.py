@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from decimal import Decimal, ROUND_HALF_UP
-from .models import PriceTick
+from .models import PriceTick, PriceCandle
 
 class PriceTickSerializer(serializers.ModelSerializer):
     class Meta:
@@ -20,3 +20,9 @@ class PriceTickSerializer(serializers.ModelSerializer):
         if value in (None, ''):
             return None
         return Decimal(str(value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+class PriceCandleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PriceCandle
+        fields = ('bucket', 'open', 'high', 'low', 'close', 'volume', 'ticks')
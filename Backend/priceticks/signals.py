@@ -0,0 +1,59 @@
+from django.db import transaction as dbtx
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .analytics import bump_version
+from .candles import apply_tick, bucket_start, day_is_complete, rebuild_day
+from .latest import invalidate_latest, replace_latest
+from .models import PriceTick
+
+
+@receiver(pre_save, sender=PriceTick)
+def remember_candle_days(sender, instance: PriceTick, **_kwargs) -> None:
+    """Antes de editar un tick: su día anterior y el nuevo, y si cada uno se puede recalcular."""
+    old_ts = PriceTick.objects.filter(pk=instance.pk).values_list('ts', flat=True).first() if instance.pk else None
+    if old_ts is None:
+        return
+    instance._old_day = bucket_start(old_ts, '1d')
+    days = {instance._old_day, bucket_start(instance.ts, '1d')}
+    instance._candle_days = {day: day_is_complete(day) for day in days}
+
+
+@receiver(pre_delete, sender=PriceTick)
+def remember_candle_day(sender, instance: PriceTick, **_kwargs) -> None:
+    day = bucket_start(instance.ts, '1d')
+    instance._candle_days = {day: day_is_complete(day)}
+
+
+@receiver(post_save, sender=PriceTick)
+def update_candles(sender, instance: PriceTick, created: bool, **_kwargs) -> None:
+    """Mantiene las velas OHLCV al día: un tick nuevo se funde; una edición recalcula los días afectados."""
+    if created:
+        apply_tick(instance.ts, instance.price_usd, instance.volume_sim)
+        return
+    for day, complete in getattr(instance, '_candle_days', {}).items():
+        if complete:
+            rebuild_day(day)
+        elif day != instance._old_day:
+            # Día ya compactado: sus velas son la única copia, solo se puede sumar el tick que llega
+            apply_tick(instance.ts, instance.price_usd, instance.volume_sim)
+
+
+@receiver(post_delete, sender=PriceTick)
+def drop_candles(sender, instance: PriceTick, **_kwargs) -> None:
+    for day, complete in getattr(instance, '_candle_days', {}).items():
+        if complete:
+            rebuild_day(day)
+
+
+@receiver(post_save, sender=PriceTick)
+def refresh_latest(sender, instance: PriceTick, created: bool, **_kwargs) -> None:
+    dbtx.on_commit(lambda: replace_latest(instance))
+    if not created:
+        dbtx.on_commit(bump_version)      # una edición no cambia el id máximo
+
+
+@receiver(post_delete, sender=PriceTick)
+def drop_latest(sender, instance: PriceTick, **_kwargs) -> None:
+    dbtx.on_commit(invalidate_latest)
+    dbtx.on_commit(bump_version)
@@ -0,0 +1,50 @@
+"""Generador único de precios simulados (random walk) que antes corría en cada navegador."""
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from .models import PriceTick
+
+BTC_USD = 68000
+MIN_PRICE = Decimal('0.10')
+NOTES = [
+    'Volumen institucional destacado',
+    'Mercado asiático en sesión alcista',
+    'Cobertura tras publicación de PMI',
+    'Rumores de ETF impulsan compras',
+    'Corrección técnica intradía',
+    'Entrada de liquidez desde OTC',
+    'Sesión europea con fuerte volatilidad',
+    'Rebalanceo de portafolios de fondos',
+    'Soporte crítico defendido por traders',
+    'Flujo mixto en exchanges locales',
+]
+
+
+def last_price(default: Decimal = Decimal('20')) -> Decimal:
+    price = PriceTick.objects.order_by('-ts', '-id').values_list('price_usd', flat=True).first()
+    return price if price is not None else default
+
+
+def next_tick(price: Decimal, ts: datetime, rng: random.Random = random) -> PriceTick:
+    """Siguiente tick: variación entre -3% y +3% sobre `price`."""
+    pct = Decimal(str((rng.random() - 0.5) * 0.06))
+    usd = max(MIN_PRICE, (price * (1 + pct)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+    btc = Decimal(str(float(usd) / BTC_USD * (1 + (rng.random() - 0.5) * 0.02)))
+    return PriceTick(
+        ts=ts,
+        price_usd=usd,
+        price_btc=btc.quantize(Decimal('0.00000001'), rounding=ROUND_HALF_UP),
+        volume_sim=Decimal(str(12000 + rng.random() * 15000)).quantize(Decimal('0.01')),
+        notes=rng.choice(NOTES),
+    )
+
+
+def random_walk(price: Decimal, start: datetime, count: int, step: timedelta, rng: random.Random = random):
+    """`count` ticks consecutivos desde `start` cada `step`."""
+    ts = start
+    for _ in range(count):
+        tick = next_tick(price, ts, rng)
+        yield tick
+        price = tick.price_usd
+        ts += step
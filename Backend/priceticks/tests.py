@@ -1,3 +1,263 @@
-from django.test import TestCase
+import os
+import tempfile
+from unittest import mock
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .analytics import price_analytics
+from .candles import apply_new_ticks, bucket_start
+from .ingest import ingest_ticks
+from .latest import get_latest, invalidate_latest
+from .models import PriceCandle, PriceTick
+from .retention import run_retention
+
+
+@override_settings(PRICE_TICK_RETENTION_DAYS=7)
+class CompactedCandlesSurviveRebuildTests(TestCase):
+    """Tras prune_prices, backfill/importaciones no deben borrar la historia que solo vive en velas."""
+
+    def setUp(self):
+        self.now = timezone.now()
+        ticks = []
+        for days_ago in (12, 10, 5, 0):
+            day = bucket_start(self.now - timedelta(days=days_ago), '1d') + timedelta(hours=1)
+            for n in range(6):
+                ticks.append(PriceTick(ts=day + timedelta(minutes=7 * n), price_usd=Decimal(100 + days_ago + n),
+                                       volume_sim=Decimal('1.00')))
+        ingest_ticks(ticks)
+
+    def _snapshot(self):
+        return sorted(PriceCandle.objects.values_list('interval', 'bucket', 'open', 'high', 'low', 'close', 'volume', 'ticks'))
+
+    def test_backfill_after_prune_keeps_compacted_candles(self):
+        run_retention(self.now, 7, {'1m': 7, '5m': 30, '1h': 365})
+        self.assertFalse(PriceTick.objects.filter(ts__lt=self.now - timedelta(days=8)).exists())
+        before = self._snapshot()
+        self.assertEqual(PriceCandle.objects.filter(interval='1d').count(), 4)
+
+        call_command('backfill_candles', stdout=StringIO())
+
+        self.assertEqual(self._snapshot(), before)
+
+    def test_backfill_skips_days_pruned_inside_the_window(self):
+        # prune con menos días que PRICE_TICK_RETENTION_DAYS: el día de hace 5 días queda solo en velas
+        run_retention(self.now, 3, {'1m': 30, '5m': 30, '1h': 365})
+        before = self._snapshot()
+
+        call_command('backfill_candles', stdout=StringIO())
+
+        self.assertEqual(self._snapshot(), before)
+
+    def test_import_into_pruned_day_merges(self):
+        run_retention(self.now, 7, {'1m': 7, '5m': 30, '1h': 365})
+        day = bucket_start(self.now - timedelta(days=12), '1d')
+        daily = PriceCandle.objects.get(interval='1d', bucket=day)
+
+        last_id = PriceTick.objects.order_by('-id').values_list('id', flat=True).first()
+        ingest_ticks([PriceTick(ts=day + timedelta(hours=3), price_usd=Decimal('500'), volume_sim=Decimal('2.00'))],
+                     candles=False)
+        apply_new_ticks(last_id)
+
+        merged = PriceCandle.objects.get(interval='1d', bucket=day)
+        self.assertEqual(merged.ticks, daily.ticks + 1)
+        self.assertEqual(merged.high, Decimal('500'))
+        self.assertEqual(merged.open, daily.open)
+        self.assertEqual(merged.volume, daily.volume + 2)
+
+
+class ImportPricesCsvTests(TestCase):
+
+    def test_failed_import_keeps_candles_for_committed_batches(self):
+        start = bucket_start(timezone.now() - timedelta(days=1), '1d')
+        rows = [f'{(start + timedelta(minutes=n)).isoformat()},{100 + n}' for n in range(4)] + ['no-es-fecha,1']
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as fh:
+            fh.write('ts,price_usd\n' + '\n'.join(rows) + '\n')
+        self.addCleanup(os.unlink, fh.name)
+
+        with self.assertRaises(CommandError):
+            call_command('import_prices_csv', fh.name, batch=2, stdout=StringIO())
+
+        self.assertEqual(PriceTick.objects.count(), 4)
+        self.assertEqual(PriceCandle.objects.get(interval='1d', bucket=start).ticks, 4)
+
+
+class SeriesRangeTests(TestCase):
+
+    def test_series_rejects_ranges_over_the_cap(self):
+        now = timezone.now()
+        params = {'from': (now - timedelta(days=40)).isoformat(), 'to': now.isoformat()}
+
+        response = self.client.get('/api/prices/series/', params)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_series_without_from_uses_the_recent_window(self):
+        now = timezone.now()
+        ingest_ticks([PriceTick(ts=now - timedelta(days=days), price_usd=Decimal('10')) for days in (60, 2, 1)])
+
+        response = self.client.get('/api/prices/series/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['source_points'], 2)
+
+
+class AnalyticsCacheVersionTests(TestCase):
+    """Editar, borrar o purgar ticks viejos no cambia el id máximo: el LRU no debe servir lo anterior."""
+
+    def setUp(self):
+        self.now = timezone.now()
+        ingest_ticks([PriceTick(ts=self.now - timedelta(days=days), price_usd=Decimal(10 + days)) for days in (20, 3, 2, 1)])
+        self.oldest = PriceTick.objects.order_by('ts').first()
+
+    def _points(self) -> int:
+        return price_analytics(None, None, 2, 100)['source_points']
+
+    def test_update_and_delete_of_old_ticks_refresh_analytics(self):
+        first = price_analytics(None, None, 2, 100)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.oldest.price_usd = Decimal('99')
+            self.oldest.save()
+        self.assertNotEqual(price_analytics(None, None, 2, 100)['series'], first['series'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.oldest.delete()
+        self.assertEqual(self._points(), 3)
+
+    def test_retention_purge_refreshes_analytics(self):
+        self.assertEqual(self._points(), 4)
+
+        run_retention(self.now, 7, {}, batch_size=100, pause=0)
+
+        self.assertEqual(self._points(), 3)
+
+
+@override_settings(PRICE_TICK_RETENTION_DAYS=7)
+class CandleEditTests(TestCase):
+    """Editar o borrar un tick recalcula las velas de su día (y del día al que se mueve)."""
+
+    def setUp(self):
+        self.day = bucket_start(timezone.now() - timedelta(days=2), '1d')
+        self.ticks = [PriceTick.objects.create(ts=self.day + timedelta(hours=n), price_usd=Decimal(10 + n),
+                                               volume_sim=Decimal('1.00')) for n in range(4)]
+
+    def _daily(self, day) -> PriceCandle | None:
+        return PriceCandle.objects.filter(interval='1d', bucket=day).first()
+
+    def test_update_rebuilds_the_day(self):
+        tick = self.ticks[3]
+        tick.price_usd = Decimal('5')
+        tick.save()
+
+        daily = self._daily(self.day)
+        self.assertEqual((daily.high, daily.low, daily.close, daily.ticks), (Decimal('12'), Decimal('5'), Decimal('5'), 4))
+        self.assertFalse(PriceCandle.objects.filter(interval='1h', bucket=self.day, high=Decimal('13')).exists())
+
+    def test_moving_a_tick_rebuilds_both_days(self):
+        tick = self.ticks[0]
+        tick.ts += timedelta(days=1)
+        tick.save()
+
+        self.assertEqual(self._daily(self.day).ticks, 3)
+        self.assertEqual(self._daily(self.day).open, Decimal('11'))
+        self.assertEqual(self._daily(self.day + timedelta(days=1)).ticks, 1)
+
+    def test_delete_rebuilds_the_day(self):
+        self.ticks[3].delete()
+        daily = self._daily(self.day)
+        self.assertEqual((daily.close, daily.high, daily.ticks), (Decimal('12'), Decimal('12'), 3))
+
+        PriceTick.objects.all().delete()
+        self.assertIsNone(self._daily(self.day))
+
+    def test_compacted_day_is_not_rebuilt(self):
+        old = bucket_start(timezone.now() - timedelta(days=12), '1d')
+        for n in range(3):
+            PriceTick.objects.create(ts=old + timedelta(hours=n), price_usd=Decimal(20 + n))
+        run_retention(timezone.now(), 7, {})
+        tick = PriceTick.objects.create(ts=old + timedelta(hours=5), price_usd=Decimal('30'))
+
+        tick.price_usd = Decimal('40')
+        tick.save()
+        tick.delete()
+
+        self.assertEqual(self._daily(old).ticks, 4)      # las velas compactadas no se pierden
+
+
+class AnalyticsRangeTests(TestCase):
+    """/analytics/ es público: mismo tope de rango y de ticks que /series/."""
+
+    def setUp(self):
+        now = timezone.now()
+        ingest_ticks([PriceTick(ts=now - timedelta(days=days), price_usd=Decimal(10 + days)) for days in (60, 3, 2, 1)])
+
+    def test_analytics_rejects_ranges_over_the_cap(self):
+        now = timezone.now()
+        params = {'from': (now - timedelta(days=40)).isoformat()}
+
+        response = self.client.get('/api/prices/analytics/', params)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_analytics_without_from_uses_the_recent_window(self):
+        response = self.client.get('/api/prices/analytics/', {'window': 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['source_points'], 3)
+
+    def test_analytics_rejects_too_many_ticks(self):
+        with mock.patch('priceticks.views.MAX_SERIES_TICKS', 2):
+            response = self.client.get('/api/prices/analytics/', {'window': 2})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class LatestPriceTests(TestCase):
+    """/api/prices/latest/ responde 304 mientras el tick no cambie y un 200 nuevo cuando llega otro."""
+
+    def setUp(self):
+        invalidate_latest()
+        self.addCleanup(invalidate_latest)
+        self.now = timezone.now().replace(microsecond=0)
+
+    def _tick(self, seconds_ago: int, price: str) -> PriceTick:
+        with self.captureOnCommitCallbacks(execute=True):
+            return PriceTick.objects.create(ts=self.now - timedelta(seconds=seconds_ago), price_usd=Decimal(price))
+
+    def test_without_ticks_is_404(self):
+        self.assertEqual(self.client.get('/api/prices/latest/').status_code, 404)
+
+    def test_conditional_get_returns_304(self):
+        tick = self._tick(10, '101.00')
+        first = self.client.get('/api/prices/latest/')
+        self.assertEqual((first.status_code, first.json()['id']), (200, tick.id))
+
+        for headers in ({'If-None-Match': first['ETag']}, {'If-None-Match': f'"otro", W/{first["ETag"]}'},
+                        {'If-Modified-Since': first['Last-Modified']}):
+            with self.subTest(headers=headers), self.assertNumQueries(0):
+                response = self.client.get('/api/prices/latest/', headers=headers)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b'')
+            self.assertEqual(response['ETag'], first['ETag'])
+
+    @override_settings(PRICE_LATEST_LOCAL_TTL=0)
+    def test_new_tick_changes_the_etag(self):
+        self._tick(10, '101.00')
+        etag = self.client.get('/api/prices/latest/')['ETag']
+
+        newer = self._tick(0, '102.00')
+        response = self.client.get('/api/prices/latest/', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], newer.id)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_older_tick_keeps_the_entry(self):
+        newest = self._tick(0, '102.00')
+        self._tick(30, '99.00')
+
+        self.assertEqual(get_latest()['data']['id'], newest.id)
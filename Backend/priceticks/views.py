@@ -1,28 +1,151 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date_safe
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
-from .models import PriceTick
-from .serializers import PriceTickSerializer
+from .models import PriceTick, PriceCandle
+from .serializers import PriceTickSerializer, PriceCandleSerializer
+from .candles import INTERVAL_SECONDS, bucket_start, parse_ts
+from .downsample import load_series, lttb
+from .ingest import build_tick, ingest_ticks
+from .latest import get_latest
+from .analytics import price_analytics
+from api.pagination import KeysetPagination
+from api.parsers import NDJSONParser
+
+MAX_CANDLES = 5000
+MAX_SERIES_POINTS = 5000
+MAX_SERIES_RANGE = timedelta(days=31)     # /series/ y /analytics/: sin from se usan los últimos 31 días
+MAX_SERIES_TICKS = 1_000_000              # /series/ y /analytics/: ticks leídos como máximo (rangos muy densos)
+MAX_BULK_TICKS = 10000
+MAX_ANALYTICS_WINDOW = 10000
 
 class PriceTickViewSet(viewsets.ModelViewSet):
     """
     /api/prices/            GET list (público), POST crear (auth)
     /api/prices/{id}/       GET retrieve (público), DELETE/PUT/PATCH (auth)
     /api/prices/latest/     GET último precio (público)
+    /api/prices/candles/?interval=1m|5m|1h|1d&from=&to=   GET velas OHLCV (público)
+    /api/prices/series/?from=&to=&points=N                GET serie reducida con LTTB, máx. 31 días (público)
+    /api/prices/analytics/?window=N&from=&to=&points=N    GET SMA, EMA, retornos, volatilidad, drawdown, VWAP, máx. 31 días (público)
+    /api/prices/bulk/       POST lote de ticks, arreglo JSON o NDJSON (auth)
+    Paginación opcional: ?limit=N[&cursor=...]
     """
     queryset = PriceTick.objects.all()
+    pagination_class = KeysetPagination
+    keyset_ordering = '-ts'
 
     def get_permissions(self):
         # Lectura pública; escritura requiere autenticación
-        if self.action in ('list', 'retrieve', 'latest'):
+        if self.action in ('list', 'retrieve', 'latest', 'candles', 'series', 'analytics'):
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
     serializer_class = PriceTickSerializer
 
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], authentication_classes=[])
     def latest(self, request):
-        obj = PriceTick.objects.order_by('-ts').first()
-        if not obj:
+        # Público y sin autenticación: un sondeo con token no consulta la tabla de usuarios
+        entry = get_latest()
+        if not entry:
             return Response({'detail': 'No hay datos de precio'}, status=404)
-        return Response(self.get_serializer(obj).data)
+        last_modified = int(entry['last_modified'])
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            not_modified = entry['etag'] in (tag.strip().removeprefix('W/') for tag in if_none_match.split(','))
+        else:
+            since = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+            not_modified = since is not None and since >= last_modified
+        response = Response(status=304) if not_modified else Response(entry['data'])
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    @action(detail=False, methods=['get'])
+    def candles(self, request):
+        interval = request.query_params.get('interval', '1m')
+        if interval not in INTERVAL_SECONDS:
+            return Response({'detail': 'Intervalo inválido. Usa 1m, 5m, 1h o 1d.'}, status=400)
+        try:
+            end = parse_ts(request.query_params.get('to')) or timezone.now()
+            start = parse_ts(request.query_params.get('from'))
+        except ValueError:
+            return Response({'detail': 'Fechas inválidas.'}, status=400)
+        step = timedelta(seconds=INTERVAL_SECONDS[interval])
+        if start is None:
+            start = end - step * MAX_CANDLES
+        if (end - start) / step > MAX_CANDLES:
+            return Response({'detail': f'Rango demasiado grande: máximo {MAX_CANDLES} velas.'}, status=400)
+        qs = PriceCandle.objects.filter(interval=interval, bucket__gte=start - step, bucket__lte=end).order_by('bucket')
+        return Response(PriceCandleSerializer(qs, many=True).data)
+
+    @action(detail=False, methods=['get'])
+    def series(self, request):
+        try:
+            end = parse_ts(request.query_params.get('to')) or timezone.now()
+            start = parse_ts(request.query_params.get('from'))
+            points = int(request.query_params.get('points', 500))
+        except ValueError:
+            return Response({'detail': 'Parámetros inválidos.'}, status=400)
+        if start is None:
+            start = end - MAX_SERIES_RANGE
+        if end - start > MAX_SERIES_RANGE:
+            return Response({'detail': f'Rango demasiado grande: máximo {MAX_SERIES_RANGE.days} días.'}, status=400)
+        points = min(max(points, 3), MAX_SERIES_POINTS)
+        x, y = load_series(start, end, limit=MAX_SERIES_TICKS + 1)
+        if len(x) > MAX_SERIES_TICKS:
+            return Response({'detail': f'Demasiados ticks en el rango (máximo {MAX_SERIES_TICKS}); acótalo o usa /candles/.'},
+                            status=400)
+        idx = lttb(x, y, points)
+        return Response({
+            'source_points': int(len(x)),
+            'points': [
+                {'ts': datetime.fromtimestamp(x[i], tz=dt_timezone.utc).isoformat(), 'price_usd': round(float(y[i]), 2)}
+                for i in idx
+            ],
+        })
+
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        try:
+            start = parse_ts(request.query_params.get('from'))
+            end = parse_ts(request.query_params.get('to'))
+            window = int(request.query_params.get('window', 20))
+            points = int(request.query_params.get('points', 500))
+        except ValueError:
+            return Response({'detail': 'Parámetros inválidos.'}, status=400)
+        if not 2 <= window <= MAX_ANALYTICS_WINDOW:
+            return Response({'detail': f'window debe estar entre 2 y {MAX_ANALYTICS_WINDOW}.'}, status=400)
+        now = timezone.now()
+        if start is None:
+            # Alineado al minuto: las peticiones repetidas sin from comparten la entrada del LRU
+            start = bucket_start((end or now) - MAX_SERIES_RANGE, '1m') + timedelta(minutes=1)
+        if (end or now) - start > MAX_SERIES_RANGE:
+            return Response({'detail': f'Rango demasiado grande: máximo {MAX_SERIES_RANGE.days} días.'}, status=400)
+        points = min(max(points, 3), MAX_SERIES_POINTS)
+        result = price_analytics(start, end, window, points, limit=MAX_SERIES_TICKS)
+        if result is None:
+            return Response({'detail': f'Demasiados ticks en el rango (máximo {MAX_SERIES_TICKS}); acótalo o usa /candles/.'},
+                            status=400)
+        return Response(result)
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({'detail': 'Se espera un arreglo JSON (o NDJSON) de ticks.'}, status=400)
+        if len(rows) > MAX_BULK_TICKS:
+            return Response({'detail': f'Máximo {MAX_BULK_TICKS} ticks por solicitud.'}, status=400)
+        ticks = []
+        for index, row in enumerate(rows):
+            if not isinstance(row, dict):
+                return Response({'detail': f'Elemento {index}: se espera un objeto.'}, status=400)
+            try:
+                ticks.append(build_tick(row))
+            except ValueError as exc:
+                return Response({'detail': f'Elemento {index}: {exc}'}, status=400)
+        created = ingest_ticks(ticks, batch_size=len(ticks))
+        return Response({'created': created}, status=201)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Transaction
+from .models import Order, Transaction
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
@@ -7,3 +7,10 @@ class TransactionAdmin(admin.ModelAdmin):
     list_filter  = ('status', 'created_at')
     search_fields = ('tx_hash', 'from_wallet__name', 'to_wallet__name')
     readonly_fields = ('tx_hash', 'created_at')
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'side', 'price', 'amount', 'filled', 'status', 'created_at')
+    list_filter = ('status', 'side')
+    search_fields = ('user__username',)
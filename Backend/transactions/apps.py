@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TransactionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'transactions'
+
+    def ready(self) -> None:
+        # Hooks de guardado que alimentan el stream SSE de notificaciones
+        from . import signals  # noqa: F401
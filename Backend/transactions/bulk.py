@@ -0,0 +1,165 @@
+"""
+Envíos masivos (POST /api/tx/bulk/).
+
+Todas las filas se validan en una pasada: las wallets y los destinatarios se resuelven con una
+consulta por tipo, el saldo se lee una vez por (wallet origen, moneda) y se va descontando en
+memoria en el orden de la lista. Las válidas se insertan con bulk_create dentro de un atomic, el
+libro de saldos se ajusta con un UPDATE por (wallet, moneda) y la bitácora se escribe en lote.
+"""
+import os
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from django.contrib.auth.models import User
+from django.db import transaction as dbtx
+from django.db.models import Q
+
+from auditlog.utils import log_actions
+from users.authentication import user_wallet_ids
+from wallets.defaults import default_wallet_ids
+from wallets.models import Wallet
+
+from .events import broker
+from .models import Transaction
+from .serializers import TWOPLACES, _compute_tx_hash
+from .utils import apply_balance_transitions, bulk_spendable_balances, lock_wallets
+
+MODE_ATOMIC = 'atomic'
+MODE_BEST_EFFORT = 'best_effort'
+CURRENCIES = {code for code, _ in Transaction.CURRENCY_CHOICES}
+
+
+def _money(value, default: Decimal | None = None) -> Decimal | None:
+    if value in (None, ''):
+        return default
+    try:
+        value = Decimal(str(value))
+        # NaN/Infinity: la comparación con 0 lanzaría InvalidOperation (500) en vez de un error por fila
+        if not value.is_finite():
+            return None
+        return value.quantize(TWOPLACES, rounding=ROUND_HALF_UP)
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _recipient_key(item: dict) -> tuple[str, str] | None:
+    if item.get('to_user'):
+        return 'id', str(item['to_user'])
+    if item.get('to_username'):
+        return 'username', str(item['to_username'])
+    return None
+
+
+def _resolve_recipients(items: list[dict]) -> dict[tuple[str, str], int]:
+    """Id de la wallet por defecto de cada to_user/to_username citado (usuarios: una consulta; wallets: caché)."""
+    keys = {_recipient_key(i) for i in items if not i.get('to_wallet')} - {None}
+    ids = [int(v) for k, v in keys if k == 'id' and v.isdigit()]
+    names = [v for k, v in keys if k == 'username']
+    if not ids and not names:
+        return {}
+    users = list(User.objects.filter(Q(id__in=ids) | Q(username__in=names)).values_list('id', 'username'))
+    default = default_wallet_ids(u for u, _ in users)
+    resolved = {}
+    for user_id, username in users:
+        if user_id in default:
+            resolved[('id', str(user_id))] = default[user_id]
+            resolved[('username', username)] = default[user_id]
+    return resolved
+
+
+def _validate(items: list, user, own_wallet_ids: set[int]) -> list[dict]:
+    """Una fila por item: {'tx': Transaction sin guardar} o {'errors': {...}}."""
+    dicts = [i if isinstance(i, dict) else {} for i in items]
+    recipients = _resolve_recipients(dicts)
+    wallet_ids = {int(v) for i in dicts for v in (i.get('from_wallet'), i.get('to_wallet')) if str(v or '').isdigit()}
+    wallet_ids |= set(recipients.values())
+    wallets = Wallet.objects.select_related('user').in_bulk(wallet_ids)
+
+    rows = []
+    for raw, item in zip(items, dicts):
+        if not isinstance(raw, dict):
+            rows.append({'errors': {'detail': 'Cada elemento debe ser un objeto.'}})
+            continue
+        errors = {}
+        from_w = wallets.get(int(item['from_wallet'])) if str(item.get('from_wallet') or '').isdigit() else None
+        if from_w is None:
+            errors['from_wallet'] = 'Wallet origen inválida.'
+        elif from_w.id not in own_wallet_ids:
+            errors['from_wallet'] = 'Solo puedes emitir desde tus propias wallets.'
+        if item.get('to_wallet'):
+            to_w = wallets.get(int(item['to_wallet'])) if str(item['to_wallet']).isdigit() else None
+            if to_w is None:
+                errors['to_wallet'] = 'Wallet destino inválida.'
+        else:
+            key = _recipient_key(item)
+            to_w = wallets.get(recipients.get(key)) if key else None
+            if key is None:
+                errors['to_wallet'] = 'Indica to_wallet, to_user o to_username.'
+            elif to_w is None:
+                errors['to_wallet'] = 'Usuario destino no encontrado o sin wallet.'
+        if from_w is not None and to_w is not None and from_w.id == to_w.id:
+            errors['to_wallet'] = 'from_wallet y to_wallet deben ser distintos.'
+        amount = _money(item.get('amount'))
+        if amount is None or amount <= 0:
+            errors['amount'] = 'amount debe ser un número > 0.'
+        fee = _money(item.get('fee'), Decimal('0'))
+        if fee is None or fee < 0:
+            errors['fee'] = 'fee debe ser un número >= 0.'
+        currency = str(item.get('currency') or Transaction.CURRENCY_SIM).upper()
+        if currency not in CURRENCIES:
+            errors['currency'] = 'Moneda inválida.'
+        if errors:
+            rows.append({'errors': errors})
+            continue
+        rows.append({'tx': Transaction(
+            from_wallet=from_w, to_wallet=to_w, amount=amount, fee=fee, currency=currency,
+            tx_hash=_compute_tx_hash(from_w.id, to_w.id, amount, fee, os.urandom(16)),
+        )})
+    return rows
+
+
+def _check_funds(rows: list[dict]) -> None:
+    """
+    Descuenta en orden contra un único saldo por (wallet, moneda), sin lo comprometido por órdenes
+    activas del libro; marca las que no alcanzan.
+    """
+    sources = {row['tx'].from_wallet_id for row in rows if 'tx' in row}
+    remaining = bulk_spendable_balances(sources)
+    for row in rows:
+        tx = row.get('tx')
+        if tx is None or tx.from_wallet.user.username == 'market':
+            continue
+        debit = tx.amount + tx.fee
+        if debit > remaining[tx.from_wallet_id][tx.currency]:
+            row.pop('tx')
+            row['errors'] = {'detail': 'Fondos insuficientes para completar la transacción.'}
+            continue
+        remaining[tx.from_wallet_id][tx.currency] -= debit
+
+
+def bulk_send(user, items: list, mode: str = MODE_ATOMIC) -> tuple[list[dict], list[Transaction]]:
+    """
+    Valida y crea los envíos. En modo atomic cualquier error cancela todo (no se inserta nada);
+    en best_effort se insertan las filas válidas. Devuelve (filas, transacciones creadas).
+    """
+    rows = _validate(items, user, set(user_wallet_ids(user)))
+    with dbtx.atomic():
+        # Saldo leído y descontado con las wallets origen bloqueadas (ver lock_wallets)
+        lock_wallets(row['tx'].from_wallet_id for row in rows if 'tx' in row)
+        _check_funds(rows)
+        txs = [row['tx'] for row in rows if 'tx' in row]
+        if not txs or (mode == MODE_ATOMIC and len(txs) != len(rows)):
+            return rows, []
+        Transaction.objects.bulk_create(txs)
+        apply_balance_transitions(txs, None, Transaction.STATUS_PENDING)
+        log_actions(user, 'TX_SEND', [{
+            'tx_id': tx.id,
+            'tx_hash': tx.tx_hash,
+            'from_wallet': tx.from_wallet_id,
+            'to_wallet': tx.to_wallet_id,
+            'amount': str(tx.amount),
+            'fee': str(tx.fee),
+        } for tx in txs])
+        # bulk_create no dispara post_save: se avisa al stream SSE a mano (ver signals.py)
+        user_ids = {w.user_id for tx in txs for w in (tx.from_wallet, tx.to_wallet)}
+        dbtx.on_commit(lambda: broker.publish(user_ids))
+    return rows, txs
@@ -0,0 +1,52 @@
+"""
+Pub/sub en proceso para el stream SSE de notificaciones (/api/notifications/stream/).
+
+Los hooks de guardado (signals.py) publican, tras el commit, "hay novedades para el usuario X".
+Cada conexión SSE abierta tiene una asyncio.Queue; al despertar consulta la BD desde su cursor
+(último id de Transaction y de TradeRequest ya enviados), así nunca envía duplicados y una
+reconexión con Last-Event-ID recibe solo lo que se perdió.
+"""
+import asyncio
+import threading
+from typing import Iterable
+
+
+class NotificationBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """Registra una conexión del usuario. Llamar desde el event loop que la atiende."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subs = self._subscribers.get(user_id, set())
+            for entry in [e for e in subs if e[1] is queue]:
+                subs.discard(entry)
+            if not subs:
+                self._subscribers.pop(user_id, None)
+
+    def publish(self, user_ids: Iterable[int]) -> None:
+        """Despierta las conexiones de esos usuarios. Seguro desde cualquier hilo."""
+        with self._lock:
+            targets = [entry for uid in set(user_ids) for entry in self._subscribers.get(uid, ())]
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(_wake, queue)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+
+def _wake(queue: asyncio.Queue) -> None:
+    # Una señal pendiente basta: la consulta desde el cursor trae todo lo nuevo
+    if queue.empty():
+        queue.put_nowait(True)
+
+
+broker = NotificationBroker()
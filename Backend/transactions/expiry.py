@@ -0,0 +1,71 @@
+"""
+Vencimiento de solicitudes P2P (TradeRequest).
+
+Una solicitud PENDING más vieja que TRADE_REQUEST_TTL_S ya no se puede aprobar, y el barrido
+(manage.py expire_trade_requests) la pasa a CANCELLED por lotes de ids acotados, cada uno en su
+propia transacción corta. Así la bandeja PENDING que consulta la barra superior solo contiene
+solicitudes vigentes. Cada barrido deja una sola entrada agregada en la bitácora.
+"""
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction as dbtx
+
+from auditlog.utils import log_action
+
+from .events import broker
+from .models import TradeRequest
+
+
+def expiry_cutoff(now: datetime) -> datetime | None:
+    """Las solicitudes PENDING creadas antes de este instante están vencidas (None = sin vencimiento)."""
+    if settings.TRADE_REQUEST_TTL_S <= 0:
+        return None
+    return now - timedelta(seconds=settings.TRADE_REQUEST_TTL_S)
+
+
+def is_expired(tr: TradeRequest, now: datetime) -> bool:
+    cutoff = expiry_cutoff(now)
+    return cutoff is not None and tr.created_at < cutoff
+
+
+def expire_trade_requests(now: datetime, batch: int = 1000, pause_s: float = 0.0, dry_run: bool = False) -> dict:
+    """Pasa a CANCELLED las PENDING vencidas. Devuelve {'cutoff', 'expired', 'batches'}."""
+    cutoff = expiry_cutoff(now)
+    report = {'cutoff': cutoff, 'expired': 0, 'batches': 0}
+    if cutoff is None:
+        return report
+    stale = TradeRequest.objects.filter(status=TradeRequest.STATUS_PENDING, created_at__lt=cutoff)
+    if dry_run:
+        report['expired'] = stale.count()
+        return report
+
+    first_id = last_id = None
+    while True:
+        with dbtx.atomic():
+            rows = list(stale.order_by('id').values_list('id', 'requester_id', 'counterparty_id')[:batch])
+            if not rows:
+                break
+            ids = [r[0] for r in rows]
+            # status=PENDING de nuevo en el UPDATE: una aprobación concurrente gana y no se pisa
+            updated = TradeRequest.objects.filter(id__in=ids, status=TradeRequest.STATUS_PENDING).update(
+                status=TradeRequest.STATUS_CANCELLED
+            )
+            user_ids = {uid for _, requester, counterparty in rows for uid in (requester, counterparty)}
+            dbtx.on_commit(lambda users=user_ids: broker.publish(users))
+        report['expired'] += updated
+        report['batches'] += 1
+        first_id = ids[0] if first_id is None else first_id
+        last_id = ids[-1]
+        if len(rows) < batch:
+            break
+        if pause_s:
+            time.sleep(pause_s)
+
+    if report['expired']:
+        log_action(None, 'TRADE_REQUEST_EXPIRE', {
+            'count': report['expired'], 'batches': report['batches'], 'cutoff': cutoff.isoformat(),
+            'first_id': first_id, 'last_id': last_id,
+        })
+    return report
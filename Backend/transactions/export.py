@@ -0,0 +1,144 @@
+"""
+Exportación del historial de transacciones (GET /api/tx/export/).
+
+Las filas salen de un .values() recorrido con .iterator(chunk_size): nunca se instancian modelos
+ni se arma la lista completa, así que la memoria no depende del tamaño del historial y (con
+cursores del lado del servidor, p. ej. PostgreSQL) el primer bloque sale antes de que termine la
+consulta. Con ASGI el cuerpo es un generador asíncrono que pide cada bloque con sync_to_async:
+Django consumiría entero un iterador síncrono antes de enviar el primer byte.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, time as dt_time, timedelta
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q, QuerySet
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Transaction
+
+EXPORT_CHUNK_SIZE = 2000
+
+COLUMNS = (
+    'id', 'created_at', 'direction', 'from_wallet', 'from_username', 'to_wallet', 'to_username',
+    'amount', 'fee', 'currency', 'status', 'tx_hash', 'block_height',
+)
+_VALUES = {
+    'id': 'id', 'created_at': 'created_at', 'from_wallet': 'from_wallet_id',
+    'from_username': 'from_wallet__user__username', 'to_wallet': 'to_wallet_id',
+    'to_username': 'to_wallet__user__username', 'amount': 'amount', 'fee': 'fee', 'currency': 'currency',
+    'status': 'status', 'tx_hash': 'tx_hash', 'block_height': 'block__height',
+}
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+def _parse_bound(raw: str) -> tuple[datetime, bool]:
+    """(instante, es_fecha_sola) para una fecha YYYY-MM-DD o una fecha-hora ISO. ValueError si no se entiende."""
+    # Primero la fecha sola: parse_datetime también acepta "YYYY-MM-DD" (como medianoche)
+    day = parse_date(raw)
+    is_day = day is not None
+    value = datetime.combine(day, dt_time.min) if is_day else parse_datetime(raw)
+    if value is None:
+        raise ValueError(raw)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value, is_day
+
+
+def export_queryset(wallet_ids: list[int], params) -> QuerySet:
+    """Filas de mis wallets según ?from=&to=&currency=&status=, en orden cronológico. ValueError si un filtro es inválido."""
+    qs = Transaction.objects.filter(Q(from_wallet_id__in=wallet_ids) | Q(to_wallet_id__in=wallet_ids))
+    if params.get('from'):
+        start, _ = _parse_bound(params['from'])
+        qs = qs.filter(created_at__gte=start)
+    if params.get('to'):
+        end, is_day = _parse_bound(params['to'])
+        # Con fecha sola, 'to' incluye ese día entero
+        qs = qs.filter(created_at__lt=end + timedelta(days=1)) if is_day else qs.filter(created_at__lte=end)
+    currency = (params.get('currency') or '').upper()
+    if currency:
+        if currency not in {c for c, _ in Transaction.CURRENCY_CHOICES}:
+            raise ValueError(currency)
+        qs = qs.filter(currency=currency)
+    if params.get('status'):
+        qs = qs.filter(status=params['status'])
+    return qs.order_by('created_at', 'id').values_list(*_VALUES.values())
+
+
+def _records(rows, own: set[int]):
+    for row in rows:
+        record = dict(zip(_VALUES, row))
+        outgoing, incoming = record['from_wallet'] in own, record['to_wallet'] in own
+        record['direction'] = 'self' if outgoing and incoming else ('out' if outgoing else 'in')
+        record['created_at'] = record['created_at'].isoformat()
+        for field in ('amount', 'fee'):
+            record[field] = format(record[field], '.2f')
+        yield {column: record[column] for column in COLUMNS}
+
+
+class _Encoder:
+    """Convierte bloques de registros a bytes del formato pedido, opcionalmente como un archivo gzip."""
+
+    def __init__(self, fmt: str, compress: bool):
+        self.fmt = fmt
+        self.gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def _out(self, data: bytes) -> bytes:
+        return self.gzip.compress(data) if self.gzip else data
+
+    def header(self) -> bytes:
+        return self._out(','.join(COLUMNS).encode() + b'\r\n') if self.fmt == 'csv' else b''
+
+    def chunk(self, records: list[dict]) -> bytes:
+        if self.fmt == 'csv':
+            buffer = io.StringIO()
+            csv.DictWriter(buffer, fieldnames=COLUMNS).writerows(records)
+            data = buffer.getvalue()
+        else:
+            data = ''.join(json.dumps(r, ensure_ascii=False, separators=(',', ':')) + '\n' for r in records)
+        return self._out(data.encode())
+
+    def tail(self) -> bytes:
+        return self.gzip.flush() if self.gzip else b''
+
+
+def _sync_body(records, encoder: _Encoder):
+    yield encoder.header()
+    while batch := list(islice(records, EXPORT_CHUNK_SIZE)):
+        yield encoder.chunk(batch)
+    yield encoder.tail()
+
+
+async def _async_body(records, encoder: _Encoder):
+    yield encoder.header()
+    # thread_sensitive (por defecto): todos los bloques se leen en el hilo y la conexión de la vista
+    take = sync_to_async(lambda: list(islice(records, EXPORT_CHUNK_SIZE)))
+    while batch := await take():
+        yield encoder.chunk(batch)
+    yield encoder.tail()
+
+
+def export_response(request, queryset, own_wallet_ids, fmt: str, compress: bool) -> StreamingHttpResponse:
+    records = _records(queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE), set(own_wallet_ids))
+    encoder = _Encoder(fmt, compress)
+    django_request = getattr(request, '_request', request)
+    body = _async_body if isinstance(django_request, ASGIRequest) else _sync_body
+    content_type, extension = FORMATS[fmt]
+    filename = f"transacciones-{timezone.now():%Y%m%d}.{extension}"
+    if compress:
+        content_type, filename = 'application/gzip', f'{filename}.gz'
+    response = StreamingHttpResponse(body(records, encoder), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    response['X-Accel-Buffering'] = 'no'
+    return response
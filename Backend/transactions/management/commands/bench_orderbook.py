@@ -0,0 +1,89 @@
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from transactions.matching import Matcher
+from transactions.models import Order, OrderFill, Transaction, WalletBalance
+from transactions.orderbook import BUY, SELL, OrderBook
+from transactions.utils import rebuild_wallet_balances
+from wallets.defaults import market_wallet_id
+from wallets.models import Wallet
+
+
+class Command(BaseCommand):
+    help = (
+        'Throughput del libro de órdenes en órdenes/s: el motor en memoria solo y, salvo --engine-only, '
+        'el emparejador completo (liquidación en BD) sobre una BD de prueba desechable.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=200_000, help='Órdenes para el motor en memoria.')
+        parser.add_argument('--db-orders', type=int, default=2_000, help='Órdenes para el emparejador con BD.')
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--engine-only', action='store_true')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def _random_orders(self, count: int, users: int, rng: random.Random):
+        # Precios alrededor de 100.00 con dispersión de ±2 %: la mitad cruza, la otra mitad queda en libro
+        for order_id in range(1, count + 1):
+            side = BUY if rng.random() < 0.5 else SELL
+            yield order_id, rng.randrange(users), side, 10_000 + rng.randint(-200, 200), rng.randint(1, 50) * 100
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        orders = list(self._random_orders(options['orders'], options['users'], rng))
+        book = OrderBook()
+        fills = 0
+        started = time.perf_counter()
+        for order in orders:
+            fills += len(book.submit(*order).fills)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Motor en memoria: {len(orders)} órdenes en {elapsed:.3f} s = {len(orders) / elapsed:,.0f} órdenes/s '
+            f'({fills} ejecuciones, {len(book)} en libro).'
+        )
+        if options['engine_only']:
+            return
+
+        creation = connection.creation
+        old_name = creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+        try:
+            self._run_db(options, rng)
+        finally:
+            creation.destroy_test_db(old_name, verbosity=0)
+
+    def _run_db(self, options, rng: random.Random) -> None:
+        users = [User.objects.create(username=f'bench{i}') for i in range(options['users'])]
+        # La señal de alta crea la wallet por defecto de cada usuario
+        wallets = list(Wallet.objects.filter(user__in=users, is_default=True).order_by('user_id'))
+        market = market_wallet_id()
+        # Fondos holgados en ambas monedas: se mide el emparejamiento, no los rechazos por saldo
+        Transaction.objects.bulk_create([
+            Transaction(from_wallet_id=market, to_wallet=w, amount=Decimal('1000000'), fee=0, currency=currency,
+                        tx_hash=f'fund-{w.id}-{currency}', status=Transaction.STATUS_CONFIRMED)
+            for w in wallets for currency in (Order.BASE_CURRENCY, Order.QUOTE_CURRENCY)
+        ])
+        rebuild_wallet_balances()
+
+        raw = list(self._random_orders(options['db_orders'], len(users), rng))
+        Order.objects.bulk_create([
+            Order(user=users[u], wallet=wallets[u], side=side, price=Decimal(price) / 100, amount=Decimal(qty) / 100)
+            for _, u, side, price, qty in raw
+        ], batch_size=1000)
+
+        matcher = Matcher()
+        matcher.load()
+        started = time.perf_counter()
+        while matcher.process_pending(500):
+            pass
+        elapsed = time.perf_counter() - started
+        negative = WalletBalance.objects.filter(wallet__in=wallets, available__lt=0).count()
+        self.stdout.write(
+            f'Emparejador con BD ({connection.vendor}): {matcher.processed} órdenes en {elapsed:.3f} s = '
+            f'{matcher.processed / elapsed:,.0f} órdenes/s ({matcher.fills} ejecuciones, '
+            f'{OrderFill.objects.count() * 2} transacciones, {negative} saldos negativos).'
+        )
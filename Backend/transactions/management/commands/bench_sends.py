@@ -0,0 +1,122 @@
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from rest_framework.exceptions import ValidationError
+
+from transactions.models import Transaction, WalletBalance
+from transactions.serializers import TransactionCreateSerializer
+from transactions.utils import apply_balance_transition, rebuild_wallet_balances
+from wallets.defaults import market_wallet_id
+
+
+class Command(BaseCommand):
+    help = (
+        'Envíos concurrentes desde pocas wallets (muchos hilos compitiendo por el mismo saldo) sobre una '
+        'BD de prueba desechable: reporta throughput y verifica que ninguna wallet quede en sobregiro.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--wallets', type=int, default=8, help='Wallets origen compartidas por los hilos.')
+        parser.add_argument('--sends', type=int, default=100, help='Intentos de envío por hilo.')
+        parser.add_argument('--funding', default='20.00', help='Saldo SIM confirmado inicial por wallet.')
+        parser.add_argument('--amount', default='1.00', help='Monto de cada envío.')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        # BD de prueba desechable: el benchmark no toca los datos reales
+        creation = connection.creation
+        old_name = creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+        try:
+            self._run(options)
+        finally:
+            creation.destroy_test_db(old_name, verbosity=0)
+
+    def _fund(self, wallets, funding: Decimal) -> None:
+        market = market_wallet_id()
+        for w in wallets:
+            s = TransactionCreateSerializer(data={'from_wallet': market, 'to_wallet': w.id, 'amount': funding})
+            s.is_valid(raise_exception=True)
+            tx = s.save()
+            tx.status = Transaction.STATUS_CONFIRMED
+            tx.save(update_fields=['status'])
+            apply_balance_transition(tx, Transaction.STATUS_PENDING, tx.status)
+
+    def _run(self, options):
+        funding = Decimal(options['funding'])
+        amount = Decimal(options['amount'])
+        users = [User.objects.create_user(f'bench{i}', password='bench') for i in range(options['wallets'])]
+        wallets = [u.wallets.order_by('created_at').first() for u in users]
+        self._fund(wallets, funding)
+        start_balance = {w.id: WalletBalance.objects.get(wallet=w, currency='SIM').available for w in wallets}
+
+        counters = {'ok': 0, 'rejected': 0, 'retries': 0, 'errors': []}
+        lock = threading.Lock()
+
+        def worker(n: int) -> None:
+            rng = random.Random(options['seed'] + n)
+            try:
+                for _ in range(options['sends']):
+                    src, dst = rng.sample(wallets, 2)
+                    data = {'from_wallet': src.id, 'to_wallet': dst.id, 'amount': amount}
+                    for attempt in range(100):
+                        try:
+                            s = TransactionCreateSerializer(data=data)
+                            s.is_valid(raise_exception=True)
+                            s.save()
+                            key = 'ok'
+                            break
+                        except ValidationError:
+                            key = 'rejected'
+                            break
+                        except OperationalError:
+                            # SQLite bloquea la BD completa ante escrituras simultáneas
+                            with lock:
+                                counters['retries'] += 1
+                            time.sleep(0.002 * (attempt + 1))
+                    else:
+                        key = 'rejected'
+                    with lock:
+                        counters[key] += 1
+            except Exception as exc:  # noqa: BLE001 - se reporta al final
+                with lock:
+                    counters['errors'].append(repr(exc))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options['threads'])]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        attempts = options['threads'] * options['sends']
+        self.stdout.write(f"Motor: {connection.vendor}  hilos={options['threads']}  wallets={options['wallets']}")
+        self.stdout.write(
+            f"{attempts} intentos en {elapsed:.2f}s → {attempts / elapsed:,.0f} intentos/s, "
+            f"{counters['ok'] / elapsed:,.0f} envíos aceptados/s"
+        )
+        self.stdout.write(f"Aceptados: {counters['ok']}  rechazados por saldo: {counters['rejected']}  "
+                          f"reintentos por bloqueo: {counters['retries']}")
+        for err in counters['errors'][:5]:
+            self.stderr.write(err)
+
+        # Verificación: el libro recalculado desde el historial no debe tener saldos negativos
+        ledger = {w.id: WalletBalance.objects.get(wallet=w, currency='SIM').available for w in wallets}
+        rebuild_wallet_balances()
+        rebuilt = {w.id: WalletBalance.objects.get(wallet=w, currency='SIM').available for w in wallets}
+        overdrafts = [wid for wid, value in rebuilt.items() if value < 0]
+        max_sends = sum(int(b // amount) for b in start_balance.values())
+        self.stdout.write(f'Envíos posibles sin sobregiro: {max_sends}  aceptados: {counters["ok"]}')
+        if overdrafts or ledger != rebuilt or counters['ok'] > max_sends or counters['errors']:
+            self.stdout.write(self.style.ERROR(
+                f'FALLO: wallets en sobregiro={overdrafts} libro_consistente={ledger == rebuilt}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Sobregiros: 0 (libro incremental = libro recalculado).'))
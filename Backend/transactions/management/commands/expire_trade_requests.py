@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from transactions.expiry import expire_trade_requests
+
+
+class Command(BaseCommand):
+    help = 'Pasa a CANCELLED las solicitudes P2P que siguen PENDING tras TRADE_REQUEST_TTL_S, por lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=1000, help='Filas por UPDATE.')
+        parser.add_argument('--pause-ms', type=int, default=0, help='Pausa entre lotes.')
+        parser.add_argument('--dry-run', action='store_true', help='Solo cuenta las vencidas.')
+
+    def handle(self, *args, **options):
+        report = expire_trade_requests(timezone.now(), options['batch'], options['pause_ms'] / 1000, options['dry_run'])
+        if report['cutoff'] is None:
+            self.stdout.write('TRADE_REQUEST_TTL_S=0: las solicitudes no vencen.')
+            return
+        self.stdout.write(f"Corte: {report['cutoff'].isoformat()} (TTL {settings.TRADE_REQUEST_TTL_S} s)")
+        verb = 'Vencerían' if options['dry_run'] else 'Vencidas'
+        self.stdout.write(self.style.SUCCESS(f"{verb}: {report['expired']} solicitudes ({report['batches']} lotes)."))
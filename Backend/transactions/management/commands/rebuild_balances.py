@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from transactions.utils import rebuild_wallet_balances
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el libro WalletBalance (saldos por wallet y moneda) desde el historial de transacciones.'
+
+    def handle(self, *args, **options):
+        rows = rebuild_wallet_balances()
+        self.stdout.write(self.style.SUCCESS(f'Saldos reconstruidos: {rows} filas.'))
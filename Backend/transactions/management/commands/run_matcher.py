@@ -0,0 +1,33 @@
+import threading
+
+from django.core.management.base import BaseCommand
+
+from transactions.matching import Matcher, run_matcher
+
+
+class Command(BaseCommand):
+    help = 'Motor del libro de órdenes: reconstruye el libro desde la BD y empareja las órdenes NEW en orden de llegada.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=500, help='Órdenes NEW leídas por ciclo.')
+        parser.add_argument('--poll-ms', type=int, default=50, help='Intervalo de sondeo cuando no hay órdenes.')
+        parser.add_argument('--once', action='store_true', help='Procesa lo pendiente y termina.')
+
+    def handle(self, *args, **options):
+        def report(matcher, done):
+            self.stdout.write(f'{done} órdenes procesadas ({matcher.fills} ejecuciones acumuladas, {len(matcher.book)} en libro).')
+
+        if options['once']:
+            matcher = Matcher()
+            matcher.load()
+            while done := matcher.process_pending(options['batch']):
+                report(matcher, done)
+            return
+
+        stop = threading.Event()
+        self.stdout.write('Emparejador iniciado.')
+        try:
+            run_matcher(stop, options['poll_ms'], options['batch'], on_cycle=report)
+        except KeyboardInterrupt:
+            stop.set()
+            self.stdout.write('Emparejador detenido.')
@@ -0,0 +1,209 @@
+"""
+Libro de órdenes abierto: persistencia y liquidación alrededor del motor en memoria (orderbook.py).
+
+La API solo inserta órdenes NEW. Un único proceso emparejador (manage.py run_matcher) reconstruye el
+libro desde las órdenes OPEN al arrancar, procesa las NEW en orden de id y liquida las ejecuciones
+de cada orden entrante en un atomic: dos Transaction por ejecución (SIM del vendedor al comprador,
+USD del comprador al vendedor) insertadas con bulk_create, un bloque para todo el lote y el libro de
+saldos ajustado una vez por (wallet, moneda). Si al liquidar alguna parte ya no tiene fondos o una
+orden fue cancelada, esa orden sale del libro y la entrante se vuelve a emparejar.
+"""
+import logging
+import os
+import threading
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction as dbtx
+from django.utils import timezone
+
+from auditlog.utils import log_action
+from blocks.utils import create_block
+
+from .events import broker
+from .models import Order, OrderFill, Transaction
+from .orderbook import MatchResult, OrderBook
+from .serializers import TWOPLACES, _compute_tx_hash
+from .utils import apply_balance_transitions, bulk_wallet_balances, lock_wallets, quote_amount
+
+logger = logging.getLogger(__name__)
+
+MAX_REMATCH = 5
+
+
+def to_cents(value: Decimal) -> int:
+    return int((value * 100).to_integral_value())
+
+
+def from_cents(value: int) -> Decimal:
+    return (Decimal(value) / 100).quantize(TWOPLACES)
+
+
+def cancel_order(order_id: int, user=None) -> bool:
+    """Cancela si sigue activa (UPDATE condicional; el motor la retira en su próxima sincronización)."""
+    qs = Order.objects.filter(id=order_id, status__in=Order.ACTIVE_STATUSES)
+    if user is not None:
+        qs = qs.filter(user=user)
+    return qs.update(status=Order.STATUS_CANCELLED, updated_at=timezone.now()) == 1
+
+
+class _Rematch(Exception):
+    """La liquidación encontró una orden inválida: se revierte, se cancela `cancel_id` (si hay) y se reintenta."""
+
+    def __init__(self, cancel_id: int | None = None):
+        super().__init__(cancel_id)
+        self.cancel_id = cancel_id
+
+
+class Matcher:
+    def __init__(self):
+        self.book = OrderBook()
+        self.synced_at = timezone.now()
+        self.processed = 0
+        self.fills = 0
+
+    def load(self) -> int:
+        """Reconstruye el libro desde las órdenes OPEN (ya no se cruzan entre sí)."""
+        self.book = OrderBook()
+        self.synced_at = timezone.now()
+        rows = (
+            Order.objects.filter(status=Order.STATUS_OPEN).order_by('id')
+            .values_list('id', 'user_id', 'side', 'price', 'amount', 'filled')
+        )
+        for order_id, user_id, side, price, amount, filled in rows.iterator(chunk_size=5000):
+            self.book.rest(order_id, user_id, side, to_cents(price), to_cents(amount - filled))
+        return len(self.book)
+
+    def sync_cancellations(self) -> int:
+        now = timezone.now()
+        ids = Order.objects.filter(
+            status=Order.STATUS_CANCELLED, updated_at__gte=self.synced_at
+        ).values_list('id', flat=True)
+        removed = sum(self.book.cancel(order_id) for order_id in ids)
+        self.synced_at = now
+        return removed
+
+    def process_pending(self, limit: int = 500) -> int:
+        """Procesa hasta `limit` órdenes NEW en orden de llegada, liquidadas en un solo atomic. Devuelve cuántas."""
+        self.sync_cancellations()
+        orders = list(Order.objects.filter(status=Order.STATUS_NEW).order_by('id')[:limit])
+        if orders:
+            self.process(orders)
+        return len(orders)
+
+    def process(self, orders: list[Order]) -> None:
+        for _ in range(MAX_REMATCH):
+            batch = [
+                (o, self.book.submit(o.id, o.user_id, o.side, to_cents(o.price), to_cents(o.remaining)))
+                for o in orders
+            ]
+            try:
+                self._settle(batch)
+                self.processed += len(batch)
+                self.fills += sum(len(result.fills) for _, result in batch)
+                return
+            except _Rematch as exc:
+                # El libro en memoria ya no coincide con la BD (o alguien no tenía fondos): todo el lote se
+                # revirtió; se recarga el libro y se reintentan las que sigan NEW
+                if exc.cancel_id is not None:
+                    cancel_order(exc.cancel_id)
+                self.load()
+                orders = list(Order.objects.filter(id__in=[o.id for o in orders], status=Order.STATUS_NEW).order_by('id'))
+                if not orders:
+                    return
+        if len(orders) > 1:
+            for order in orders:          # lote conflictivo: se aísla la orden problemática
+                self.process([order])
+            return
+        cancel_order(orders[0].id)
+        logger.warning('Orden %s cancelada: no se pudo emparejar tras %s intentos.', orders[0].id, MAX_REMATCH)
+
+    @dbtx.atomic
+    def _settle(self, batch: list[tuple[Order, MatchResult]]) -> None:
+        taker_ids = [order.id for order, _ in batch]
+        maker_ids = {fill.maker_id for _, result in batch for fill in result.fills}
+        orders = {
+            o.id: o for o in
+            Order.objects.select_for_update().filter(id__in={*taker_ids, *maker_ids}).order_by('id')
+        }
+        if any(orders.get(oid) is None or orders[oid].status != Order.STATUS_NEW for oid in taker_ids):
+            raise _Rematch
+        # Un maker puede ser una entrante anterior del mismo lote (aún NEW en la BD)
+        if any(orders.get(oid) is None or orders[oid].status not in Order.ACTIVE_STATUSES for oid in maker_ids):
+            raise _Rematch
+
+        # Fondos: una lectura por wallet con las filas bloqueadas, descontando ejecución por ejecución.
+        # Lo recibido dentro del lote no se acredita hasta la siguiente lectura (conservador)
+        wallet_ids = {o.wallet_id for o in orders.values()}
+        lock_wallets(wallet_ids)
+        balances = bulk_wallet_balances(wallet_ids)
+        txs, fills, matched = [], [], []
+        now = timezone.now()
+        for order, result in batch:
+            taker = orders[order.id]
+            for fill in result.fills:
+                maker = orders[fill.maker_id]
+                buyer, seller = (taker, maker) if taker.side == Order.SIDE_BUY else (maker, taker)
+                qty, price = from_cents(fill.qty), from_cents(fill.price)
+                quote = quote_amount(price, qty)
+                for party, currency, needed in ((seller, Order.BASE_CURRENCY, qty), (buyer, Order.QUOTE_CURRENCY, quote)):
+                    if balances[party.wallet_id][currency] < needed:
+                        raise _Rematch(cancel_id=party.id)
+                    balances[party.wallet_id][currency] -= needed
+                base_tx = self._tx(seller.wallet_id, buyer.wallet_id, qty, Order.BASE_CURRENCY)
+                quote_tx = self._tx(buyer.wallet_id, seller.wallet_id, quote, Order.QUOTE_CURRENCY)
+                txs += [base_tx, quote_tx]
+                fills.append(OrderFill(maker_id=maker.id, taker_id=taker.id, price=price, amount=qty,
+                                       base_tx=base_tx, quote_tx=quote_tx))
+                matched.append([maker.id, taker.id, format(qty, '.2f'), format(price, '.2f')])
+                maker.filled += qty
+                maker.status = Order.STATUS_FILLED if maker.filled >= maker.amount else Order.STATUS_OPEN
+                maker.updated_at = now
+            taker.filled = taker.amount - from_cents(result.remaining)
+            if result.remaining == 0:
+                taker.status = Order.STATUS_FILLED
+            elif result.self_trade:
+                taker.status = Order.STATUS_CANCELLED      # prevención de auto-ejecución: se cancela el resto
+            else:
+                taker.status = Order.STATUS_OPEN
+            taker.updated_at = now
+
+        if txs:
+            pending = settings.MEMPOOL_ENABLED
+            tx_status = Transaction.STATUS_PENDING if pending else Transaction.STATUS_CONFIRMED
+            block = None if pending else create_block(tx_hashes=[tx.tx_hash for tx in txs])
+            for tx in txs:
+                tx.status, tx.block = tx_status, block
+            Transaction.objects.bulk_create(txs, batch_size=1000)
+            apply_balance_transitions(txs, None, tx_status)
+            OrderFill.objects.bulk_create(fills, batch_size=1000)
+            log_action(None, 'ORDER_MATCH', {'fills': matched})
+            user_ids = {o.user_id for o in orders.values()}
+            dbtx.on_commit(lambda: broker.publish(user_ids))
+        # Un UPDATE por (estado, ejecutado) final: casi todas comparten FILLED o (OPEN, 0); bulk_update arma un CASE por fila
+        groups: dict[tuple[str, Decimal], list[int]] = {}
+        for o in orders.values():
+            groups.setdefault((o.status, o.filled), []).append(o.id)
+        for (status, filled), ids in groups.items():
+            Order.objects.filter(id__in=ids).update(status=status, filled=filled, updated_at=now)
+
+    @staticmethod
+    def _tx(from_id: int, to_id: int, amount: Decimal, currency: str) -> Transaction:
+        return Transaction(
+            from_wallet_id=from_id, to_wallet_id=to_id, amount=amount, fee=Decimal('0'), currency=currency,
+            tx_hash=_compute_tx_hash(from_id, to_id, amount, Decimal('0'), os.urandom(16)),
+        )
+
+
+def run_matcher(stop: threading.Event | None = None, poll_ms: int = 50, batch: int = 500, on_cycle=None) -> Matcher:
+    """Bucle del emparejador: procesa órdenes NEW hasta que `stop` se active."""
+    stop = stop or threading.Event()
+    matcher = Matcher()
+    matcher.load()
+    while not stop.is_set():
+        done = matcher.process_pending(batch)
+        if on_cycle and done:
+            on_cycle(matcher, done)
+        if not done:
+            stop.wait(poll_ms / 1000)
+    return matcher
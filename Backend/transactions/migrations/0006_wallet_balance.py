@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:27
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def backfill_wallet_balances(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    WalletBalance = apps.get_model('transactions', 'WalletBalance')
+    zero = Decimal('0')
+    totals = {}
+
+    def add(key, confirmed, pending_out):
+        row = totals.setdefault(key, [zero, zero])
+        row[0] += confirmed
+        row[1] += pending_out
+
+    confirmed = Transaction.objects.filter(status='CONFIRMED').order_by()
+    pending = Transaction.objects.filter(status='PENDING').order_by()
+    for r in confirmed.values('to_wallet_id', 'currency').annotate(total=Sum('amount')):
+        add((r['to_wallet_id'], r['currency']), r['total'] or zero, zero)
+    for r in confirmed.values('from_wallet_id', 'currency').annotate(total=Sum(F('amount') + F('fee'))):
+        add((r['from_wallet_id'], r['currency']), -(r['total'] or zero), zero)
+    for r in pending.values('from_wallet_id', 'currency').annotate(total=Sum(F('amount') + F('fee'))):
+        add((r['from_wallet_id'], r['currency']), zero, r['total'] or zero)
+
+    WalletBalance.objects.bulk_create([
+        WalletBalance(wallet_id=w, currency=cur, confirmed=c, pending_out=p, available=c - p)
+        for (w, cur), (c, p) in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0005_transaction_currency'),
+        ('wallets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(choices=[('SIM', 'SIM'), ('USD', 'USD'), ('BTC', 'BTC')], default='SIM', max_length=3)),
+                ('confirmed', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=28)),
+                ('pending_out', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=28)),
+                ('available', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=28)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='walletbalance',
+            name='wallet',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='wallets.wallet'),
+        ),
+        migrations.AddConstraint(
+            model_name='walletbalance',
+            constraint=models.UniqueConstraint(fields=('wallet', 'currency'), name='uniq_wallet_balance_currency'),
+        ),
+        migrations.RunPython(backfill_wallet_balances, migrations.RunPython.noop),
+    ]
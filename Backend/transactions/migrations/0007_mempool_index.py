@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blocks', '0002_miningreward'),
+        ('transactions', '0006_wallet_balance'),
+        ('wallets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', 'created_at'], name='transaction_status_d2f80b_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blocks', '0006_chaintip'),
+        ('transactions', '0007_mempool_index'),
+        ('wallets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['-created_at', '-id'], name='transaction_created_e749bf_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:55
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0008_keyset_pagination_indexes'),
+        ('wallets', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('side', models.CharField(choices=[('BUY', 'BUY'), ('SELL', 'SELL')], max_length=4)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=28)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=28)),
+                ('filled', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=28)),
+                ('status', models.CharField(choices=[('NEW', 'NEW'), ('OPEN', 'OPEN'), ('FILLED', 'FILLED'), ('CANCELLED', 'CANCELLED')], default='NEW', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='orders', to=settings.AUTH_USER_MODEL)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='orders', to='wallets.wallet')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderFill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=28)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=28)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('base_tx', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='transactions.transaction')),
+                ('maker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='maker_fills', to='transactions.order')),
+                ('quote_tx', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='transactions.transaction')),
+                ('taker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='taker_fills', to='transactions.order')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'id'], name='transaction_status_de81a5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'updated_at'], name='transaction_status_846199_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at'], name='transaction_user_id_944d67_idx'),
+        ),
+    ]
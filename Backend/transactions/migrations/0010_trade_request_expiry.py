@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0009_order_book'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='traderequest',
+            name='transaction_status_677e82_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='traderequest',
+            name='transaction_counter_1e5cc5_idx',
+        ),
+        migrations.AddIndex(
+            model_name='traderequest',
+            index=models.Index(fields=['status', 'created_at'], name='transaction_status_34ee31_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='traderequest',
+            index=models.Index(fields=['counterparty', 'status', 'created_at'], name='transaction_counter_ca4447_idx'),
+        ),
+    ]
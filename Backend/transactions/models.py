@@ -53,7 +53,9 @@ class Transaction(models.Model):
             models.Index(fields=['created_at']),
             models.Index(fields=['from_wallet']),
             models.Index(fields=['to_wallet']),
-            models.Index(fields=['currency']),
+            models.Index(fields=['currency'], name='transaction_currency_idx'),
+            models.Index(fields=['status', 'created_at']),  # mempool: PENDING en orden de llegada
+            models.Index(fields=['-created_at', '-id']),     # paginación por cursor
         ]
 
     def __str__(self):
@@ -92,7 +94,104 @@ class TradeRequest(models.Model):
 
     class Meta:
         ordering = ['-created_at']
-        indexes = [models.Index(fields=['status']), models.Index(fields=['counterparty'])]
+        indexes = [
+            models.Index(fields=['status', 'created_at']),                    # barrido de vencidas
+            models.Index(fields=['counterparty', 'status', 'created_at']),    # bandeja entrante (?scope=incoming&status=PENDING)
+        ]
 
     def __str__(self):
         return f'{self.side} {self.amount} by {self.requester_id} -> {self.counterparty_id} ({self.status})'
+
+
+class WalletBalance(models.Model):
+    """
+    Libro de saldos materializado por (wallet, moneda).
+    Se mantiene en la misma transacción de BD que crea/confirma/falla cada Transaction,
+    así leer un saldo es una búsqueda por índice en vez de varios SUM sobre toda la tabla.
+    """
+    wallet = models.ForeignKey('wallets.Wallet', on_delete=models.CASCADE, related_name='balances')
+    currency = models.CharField(max_length=3, choices=Transaction.CURRENCY_CHOICES, default=Transaction.CURRENCY_SIM)
+
+    confirmed   = models.DecimalField(max_digits=28, decimal_places=2, default=Decimal('0'))  # entradas - salidas - fees confirmadas
+    pending_out = models.DecimalField(max_digits=28, decimal_places=2, default=Decimal('0'))  # salidas + fees pendientes
+    available   = models.DecimalField(max_digits=28, decimal_places=2, default=Decimal('0'))  # confirmed - pending_out
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['wallet', 'currency'], name='uniq_wallet_balance_currency'),
+        ]
+
+    def __str__(self):
+        return f'{self.wallet_id} {self.currency}: {self.available}'
+
+
+class Order(models.Model):
+    """
+    Orden límite del libro abierto SIM/USD: `amount` en SIM, `price` en USD por SIM.
+    NEW = recibida, aún no procesada por el motor (manage.py run_matcher); OPEN = en el libro.
+    """
+    BASE_CURRENCY = Transaction.CURRENCY_SIM
+    QUOTE_CURRENCY = Transaction.CURRENCY_USD
+
+    SIDE_BUY = 'BUY'
+    SIDE_SELL = 'SELL'
+    SIDE_CHOICES = [
+        (SIDE_BUY, 'BUY'),
+        (SIDE_SELL, 'SELL'),
+    ]
+
+    STATUS_NEW = 'NEW'
+    STATUS_OPEN = 'OPEN'
+    STATUS_FILLED = 'FILLED'
+    STATUS_CANCELLED = 'CANCELLED'
+    STATUS_CHOICES = [
+        (STATUS_NEW, 'NEW'),
+        (STATUS_OPEN, 'OPEN'),
+        (STATUS_FILLED, 'FILLED'),
+        (STATUS_CANCELLED, 'CANCELLED'),
+    ]
+    ACTIVE_STATUSES = (STATUS_NEW, STATUS_OPEN)
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
+    wallet = models.ForeignKey('wallets.Wallet', on_delete=models.PROTECT, related_name='orders')
+    side = models.CharField(max_length=4, choices=SIDE_CHOICES)
+    price = models.DecimalField(max_digits=28, decimal_places=2)
+    amount = models.DecimalField(max_digits=28, decimal_places=2)
+    filled = models.DecimalField(max_digits=28, decimal_places=2, default=Decimal('0'))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_NEW)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'id']),             # cola NEW del motor y carga del libro
+            models.Index(fields=['status', 'updated_at']),     # cancelaciones desde la última sincronización
+            models.Index(fields=['user', '-created_at']),
+        ]
+
+    @property
+    def remaining(self) -> Decimal:
+        return self.amount - self.filled
+
+    def __str__(self):
+        return f'{self.side} {self.amount} @ {self.price} by {self.user_id} ({self.status})'
+
+
+class OrderFill(models.Model):
+    """Ejecución entre dos órdenes, liquidada con dos Transaction (SIM y USD)."""
+    maker = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='maker_fills')
+    taker = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='taker_fills')
+    price = models.DecimalField(max_digits=28, decimal_places=2)
+    amount = models.DecimalField(max_digits=28, decimal_places=2)
+    base_tx = models.ForeignKey(Transaction, on_delete=models.PROTECT, related_name='+')
+    quote_tx = models.ForeignKey(Transaction, on_delete=models.PROTECT, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.amount} @ {self.price} (maker {self.maker_id}, taker {self.taker_id})'
@@ -0,0 +1,110 @@
+"""
+Motor de emparejamiento en memoria (prioridad precio-tiempo).
+
+Un heap por lado: compras como (-precio, id) y ventas como (precio, id); el id de la orden es su
+prioridad temporal. Precios y cantidades son enteros (centavos) para no comparar Decimals en el
+heap. Las cancelaciones se marcan en el índice y las entradas muertas se descartan al llegar a la
+cima (borrado perezoso). No toca la BD: ver matching.py para la persistencia y la liquidación.
+"""
+import heapq
+from dataclasses import dataclass
+from typing import NamedTuple
+
+BUY = 'BUY'
+SELL = 'SELL'
+
+
+@dataclass(slots=True)
+class RestingOrder:
+    id: int
+    user_id: int
+    side: str
+    price: int
+    remaining: int
+
+
+class Fill(NamedTuple):
+    maker_id: int
+    taker_id: int
+    price: int        # precio de la orden en libro (maker)
+    qty: int
+
+
+class MatchResult(NamedTuple):
+    fills: list[Fill]
+    remaining: int        # cantidad del taker sin ejecutar
+    rested: bool          # el resto quedó en el libro
+    self_trade: bool      # se detuvo al cruzar con una orden propia (el resto se cancela)
+
+
+class OrderBook:
+    def __init__(self):
+        self._bids: list[tuple[int, int]] = []
+        self._asks: list[tuple[int, int]] = []
+        self._orders: dict[int, RestingOrder] = {}
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._orders
+
+    def rest(self, order_id: int, user_id: int, side: str, price: int, qty: int) -> None:
+        """Agrega una orden al libro sin emparejar (carga inicial desde la BD)."""
+        self._orders[order_id] = RestingOrder(order_id, user_id, side, price, qty)
+        if side == BUY:
+            heapq.heappush(self._bids, (-price, order_id))
+        else:
+            heapq.heappush(self._asks, (price, order_id))
+
+    def cancel(self, order_id: int) -> bool:
+        return self._orders.pop(order_id, None) is not None
+
+    def _top(self, heap: list[tuple[int, int]]) -> RestingOrder | None:
+        while heap:
+            order = self._orders.get(heap[0][1])
+            if order is not None:
+                return order
+            heapq.heappop(heap)
+        return None
+
+    def best_bid(self) -> int | None:
+        order = self._top(self._bids)
+        return order.price if order else None
+
+    def best_ask(self) -> int | None:
+        order = self._top(self._asks)
+        return order.price if order else None
+
+    def submit(self, order_id: int, user_id: int, side: str, price: int, qty: int) -> MatchResult:
+        """Empareja una orden límite entrante contra el lado contrario y deja el resto en el libro."""
+        heap = self._asks if side == BUY else self._bids
+        crosses = (lambda p: p <= price) if side == BUY else (lambda p: p >= price)
+        fills: list[Fill] = []
+        while qty > 0:
+            maker = self._top(heap)
+            if maker is None or not crosses(maker.price):
+                break
+            if maker.user_id == user_id:
+                return MatchResult(fills, qty, False, True)
+            traded = min(qty, maker.remaining)
+            fills.append(Fill(maker.id, order_id, maker.price, traded))
+            maker.remaining -= traded
+            qty -= traded
+            if maker.remaining == 0:
+                heapq.heappop(heap)
+                del self._orders[maker.id]
+        if qty > 0:
+            self.rest(order_id, user_id, side, price, qty)
+        return MatchResult(fills, qty, qty > 0, False)
+
+    def depth(self, levels: int = 10) -> dict[str, list[tuple[int, int]]]:
+        """Cantidad agregada por precio en los mejores `levels` niveles de cada lado."""
+        result = {}
+        for side, key in ((BUY, lambda p: -p), (SELL, lambda p: p)):
+            book: dict[int, int] = {}
+            for order in self._orders.values():
+                if order.side == side:
+                    book[order.price] = book.get(order.price, 0) + order.remaining
+            result[side] = sorted(book.items(), key=lambda kv: key(kv[0]))[:levels]
+        return result
@@ -1,12 +1,17 @@
 import os, hashlib
 from decimal import Decimal, ROUND_HALF_UP
 from django.db import transaction as dbtx
-from django.db.models import Max
 from rest_framework import serializers
-from .models import Transaction, TradeRequest
+from .models import Order, Transaction, TradeRequest
+from wallets.defaults import default_wallet_id
 from wallets.models import Wallet
 from blocks.models import Block
-from .utils import wallet_available_balance
+from blocks.merkle import build_levels, pack_levels
+from blocks.utils import MERKLE_LEAF_ORDER, create_block
+from .utils import (
+    MIN_NOTIONAL, apply_balance_transition, lock_wallets, order_free_balance, quote_amount, spendable_balance,
+)
+from users.stepup import confirm_trade, request_step_up
 
 TWOPLACES = Decimal('0.01')
 
@@ -65,10 +70,19 @@ class TransactionCreateSerializer(serializers.ModelSerializer):
         return data
 
     def _available_balance(self, wallet_id: int, currency: str) -> Decimal:
-        return wallet_available_balance(wallet_id, currency)
+        # Lo que respalda órdenes activas del libro no se puede enviar
+        return spendable_balance(wallet_id, currency)
 
     @dbtx.atomic
     def create(self, validated_data):
+        from_w: Wallet = validated_data['from_wallet']
+        if getattr(from_w.user, 'username', '') != 'market':
+            # Sección crítica por wallet origen: la validación de arriba es solo un filtro rápido;
+            # con la fila bloqueada se revalida el saldo, así dos envíos simultáneos no lo exceden
+            lock_wallets([from_w.id])
+            available = self._available_balance(from_w.id, validated_data['currency'])
+            if validated_data['amount'] + validated_data['fee'] > available:
+                raise serializers.ValidationError({'detail': 'Fondos insuficientes para completar la transacción.'})
         salt = os.urandom(16)
         txh = _compute_tx_hash(
             validated_data['from_wallet'].id,
@@ -78,7 +92,9 @@ class TransactionCreateSerializer(serializers.ModelSerializer):
             salt
         )
         # status arranca en PENDING; block = None
-        return Transaction.objects.create(tx_hash=txh, **validated_data)
+        tx = Transaction.objects.create(tx_hash=txh, **validated_data)
+        apply_balance_transition(tx, None, tx.status)
+        return tx
 
 class TransactionSerializer(serializers.ModelSerializer):
     from_wallet_name = serializers.CharField(source='from_wallet.name', read_only=True)
@@ -99,36 +115,41 @@ class TransactionSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'tx_hash', 'status', 'block', 'created_at')
 
 class TransactionConfirmSerializer(serializers.ModelSerializer):
-    """Solo cambia status→CONFIRMED. Si no se envía block, se crea uno nuevo."""
+    """
+    Solo cambia status→CONFIRMED. Si no se envía block, se crea uno nuevo.
+    Un bloque existente ya está sellado (su hash, y el prev_hash del siguiente, dependen de merkle_root):
+    solo se acepta si su merkle_root ya incluye esta transacción junto a las que tiene.
+    """
     block = serializers.PrimaryKeyRelatedField(queryset=Block.objects.all(), required=False, allow_null=True)
 
     class Meta:
         model = Transaction
         fields = ('block',)
 
+    def validate_block(self, block: Block | None):
+        if block is None:
+            return block
+        leaves = list(block.transactions.exclude(pk=self.instance.pk).values_list(*MERKLE_LEAF_ORDER, 'tx_hash'))
+        leaves.append((self.instance.created_at, self.instance.id, self.instance.tx_hash))
+        levels = build_levels(tx_hash for *_, tx_hash in sorted(leaves))
+        if levels[-1][0].hex() != block.merkle_root:
+            raise serializers.ValidationError('El bloque ya está sellado y su merkle_root no incluye esta transacción.')
+        self._merkle_tree = pack_levels(levels)
+        return block
+
     @dbtx.atomic
     def update(self, instance: Transaction, validated_data):
         block: Block | None = validated_data.get('block')
         if block is None:
-            from django.db.models import Max
-            last_height = Block.objects.aggregate(m=Max('height'))['m']
-            next_height = 0 if last_height is None else last_height + 1
-            if last_height is None:
-                prev_hash = '0' * 64
-            else:
-                prev_block = Block.objects.get(height=last_height)
-                prev_hash = prev_block.hash
-            merkle = (instance.tx_hash or '').ljust(64, '0')[:64]
-            nonce = os.urandom(8).hex()
-            block = Block.objects.create(
-                height=next_height,
-                prev_hash=prev_hash,
-                merkle_root=merkle,
-                nonce=nonce
-            )
+            block = create_block(tx_hashes=[instance.tx_hash])
+        else:
+            # El árbol guardado (si lo había) no tenía esta hoja
+            Block.objects.filter(pk=block.pk).update(merkle_tree=self._merkle_tree)
+        old_status = instance.status
         instance.block = block
         instance.status = Transaction.STATUS_CONFIRMED
         instance.save(update_fields=['block', 'status'])
+        apply_balance_transition(instance, old_status, instance.status)
         return instance
 
 class TransactionFailSerializer(serializers.ModelSerializer):
@@ -138,8 +159,10 @@ class TransactionFailSerializer(serializers.ModelSerializer):
 
     @dbtx.atomic
     def update(self, instance: Transaction, validated_data):
+        old_status = instance.status
         instance.status = Transaction.STATUS_FAILED
         instance.save(update_fields=['status'])
+        apply_balance_transition(instance, old_status, instance.status)
         return instance
 
 
@@ -156,7 +179,7 @@ class TradeRequestSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'token', 'status', 'created_at', 'requester')
 
 class TradeRequestCreateSerializer(serializers.ModelSerializer):
-    password = serializers.CharField(write_only=True)
+    password = serializers.CharField(write_only=True, required=False, allow_blank=True)
 
     class Meta:
         model = TradeRequest
@@ -168,18 +191,21 @@ class TradeRequestCreateSerializer(serializers.ModelSerializer):
         }
 
     def validate(self, attrs):
+        request = self.context.get('request')
         password = attrs.get('password')
-        if not password:
+        if not password and not (request and request_step_up(request)):
             raise serializers.ValidationError({'password': 'Debes ingresar tu contraseña.'})
         currency = (attrs.get('currency') or Transaction.CURRENCY_SIM).upper()
         valid_currencies = {choice[0] for choice in Transaction.CURRENCY_CHOICES}
         if currency not in valid_currencies:
             raise serializers.ValidationError({'currency': 'Moneda inválida.'})
         attrs['currency'] = currency
-        request = self.context.get('request')
         if not request or not getattr(request, 'user', None):
             raise serializers.ValidationError({'password': 'No se pudo validar la contraseña.'})
-        if not request.user.check_password(password):
+        failed = confirm_trade(request, password)
+        if failed == 'token':
+            raise serializers.ValidationError({'step_up_token': 'El token de confirmación es inválido o expiró.'})
+        if failed:
             raise serializers.ValidationError({'password': 'Contraseña incorrecta.'})
 
         amount = Decimal(str(attrs.get('amount', '0'))).quantize(TWOPLACES, rounding=ROUND_HALF_UP)
@@ -188,14 +214,13 @@ class TradeRequestCreateSerializer(serializers.ModelSerializer):
         attrs['fee'] = fee
 
         if attrs.get('side') == TradeRequest.SIDE_SELL:
-            wallets_qs = Wallet.objects.filter(user=request.user).order_by('created_at')
-            default_wallet = wallets_qs.filter(name__iexact='default').first() or wallets_qs.first()
-            if not default_wallet:
+            source_id = default_wallet_id(request.user.id)
+            if source_id is None:
                 raise serializers.ValidationError({'detail': 'No tienes una wallet disponible para vender.'})
-            available = wallet_available_balance(default_wallet.id, currency)
+            available = spendable_balance(source_id, currency)
             if amount + fee > available:
                 raise serializers.ValidationError({'amount': 'Fondos insuficientes para completar la venta.'})
-            attrs['source_wallet_id'] = default_wallet.id
+            attrs['source_wallet_id'] = source_id
         return attrs
 
     def create(self, validated_data):
@@ -205,3 +230,55 @@ class TradeRequestCreateSerializer(serializers.ModelSerializer):
         token = secrets.token_hex(16)
         validated_data.pop('source_wallet_id', None)
         return TradeRequest.objects.create(requester=requester, token=token, **validated_data)
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    remaining = serializers.DecimalField(max_digits=28, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ('id', 'wallet', 'side', 'price', 'amount', 'filled', 'remaining', 'status', 'created_at', 'updated_at')
+        read_only_fields = fields
+
+
+class OrderCreateSerializer(serializers.ModelSerializer):
+    """Orden límite SIM/USD. Sin wallet se usa la principal; el monto queda comprometido hasta ejecutarse o cancelarse."""
+    wallet = serializers.PrimaryKeyRelatedField(queryset=Wallet.objects.all(), required=False)
+
+    class Meta:
+        model = Order
+        fields = ('wallet', 'side', 'price', 'amount')
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        wallet = attrs.pop('wallet', None)
+        if wallet is None:
+            attrs['wallet_id'] = default_wallet_id(user.id)
+            if attrs['wallet_id'] is None:
+                raise serializers.ValidationError({'wallet': 'No tienes una wallet disponible.'})
+        elif wallet.user_id != user.id:
+            raise serializers.ValidationError({'wallet': 'La wallet no te pertenece.'})
+        else:
+            attrs['wallet_id'] = wallet.id
+        for field in ('price', 'amount'):
+            attrs[field] = Decimal(str(attrs[field])).quantize(TWOPLACES, rounding=ROUND_HALF_UP)
+            if attrs[field] <= 0:
+                raise serializers.ValidationError({field: 'Debe ser mayor a 0.'})
+        if attrs['price'] * attrs['amount'] < MIN_NOTIONAL:
+            raise serializers.ValidationError({'amount': f'El monto de la orden debe ser al menos {MIN_NOTIONAL} USD.'})
+        return attrs
+
+    def _check_funds(self, attrs) -> None:
+        needed = attrs['amount']
+        if attrs['side'] == Order.SIDE_BUY:
+            needed = quote_amount(attrs['price'], attrs['amount'])
+        currency, free = order_free_balance(attrs['wallet_id'], attrs['side'])
+        if needed > free:
+            raise serializers.ValidationError({'amount': f'Fondos {currency} insuficientes para la orden.'})
+
+    def create(self, validated_data):
+        # Misma wallet bloqueada mientras se comprueba y se inserta (dos órdenes simultáneas no comprometen doble)
+        with dbtx.atomic():
+            lock_wallets([validated_data['wallet_id']])
+            self._check_funds(validated_data)
+            return Order.objects.create(user=self.context['request'].user, **validated_data)
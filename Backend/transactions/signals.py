@@ -0,0 +1,33 @@
+from django.db import transaction as dbtx
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from wallets.models import Wallet
+
+from .events import broker
+from .models import Transaction, TradeRequest
+
+
+def _publish_wallet_owners(wallet_ids: set[int]) -> None:
+    # Sin conexiones SSE en este proceso no hay a quién despertar: se evita la consulta
+    if not broker.subscriber_count():
+        return
+    broker.publish(Wallet.objects.filter(id__in=wallet_ids).values_list('user_id', flat=True))
+
+
+@receiver(post_save, sender=Transaction)
+def notify_new_transaction(sender, instance: Transaction, created: bool, **_kwargs) -> None:
+    """Avisa al stream SSE de emisor y receptor cuando se crea una transacción."""
+    if not created:
+        return
+    wallet_ids = {instance.from_wallet_id, instance.to_wallet_id}
+    dbtx.on_commit(lambda: _publish_wallet_owners(wallet_ids))
+
+
+@receiver(post_save, sender=TradeRequest)
+def notify_new_trade_request(sender, instance: TradeRequest, created: bool, **_kwargs) -> None:
+    """Avisa a la contraparte de una nueva solicitud P2P."""
+    if not created:
+        return
+    user_ids = {instance.counterparty_id}
+    dbtx.on_commit(lambda: broker.publish(user_ids))
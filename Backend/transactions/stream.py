@@ -0,0 +1,194 @@
+"""
+POST /api/notifications/stream-ticket/   ticket de corta duración para abrir el stream (con JWT en cabecera)
+GET  /api/notifications/stream/?ticket=  Server-Sent Events (requiere servidor ASGI: config/asgi.py)
+
+Eventos:
+  event: tx             data: TransactionSerializer de una transacción nueva de mis wallets
+  event: trade_request  data: TradeRequestSerializer de una solicitud P2P entrante
+El id de cada evento es "<último tx id>-<último trade request id>". EventSource lo reenvía en
+Last-Event-ID al reconectar (o ?last_event_id=) y solo se envía lo que falta desde ese cursor.
+Los ids se asignan al insertar, no al confirmar: una fila de id menor puede hacerse visible después de
+otra mayor ya enviada. Cada consulta re-escanea LOOKBACK_IDS ids por debajo del cursor y descarta lo ya
+enviado en este stream (al abrirlo, lo que ya existía bajo el cursor se da por entregado).
+EventSource no permite cabeceras: en vez del JWT (que quedaría en los logs de acceso) la URL lleva un
+ticket firmado que solo sirve para abrir el stream durante TICKET_MAX_AGE_S. El stream se cierra con
+`event: expired` cuando vence el JWT que emitió el ticket; el cliente pide otro y reconecta.
+Con servidor WSGI (runserver) ambos endpoints responden 501 y el cliente vuelve al sondeo.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Max, Q
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .events import broker
+from .models import Transaction, TradeRequest
+from .serializers import TransactionSerializer, TradeRequestSerializer
+
+HEARTBEAT_SECONDS = 15   # keepalive; también re-consulta por si el evento vino de otro proceso
+BATCH = 100
+LOOKBACK_IDS = 500       # ids bajo el cursor que se vuelven a consultar (filas confirmadas tarde)
+TICKET_MAX_AGE_S = 30
+TICKET_SALT = 'notifications.stream'
+ASGI_REQUIRED = 'El stream de notificaciones requiere servidor ASGI; usa sondeo.'
+
+
+@api_view(['POST'])
+def stream_ticket(request):
+    """Ticket firmado (usuario + vencimiento del JWT) para abrir el stream sin poner el JWT en la URL."""
+    if not isinstance(request._request, ASGIRequest):
+        return Response({'detail': ASGI_REQUIRED}, status=status.HTTP_501_NOT_IMPLEMENTED)
+    ticket = signing.dumps({'u': request.user.id, 'exp': request.auth['exp']}, salt=TICKET_SALT)
+    return Response({'ticket': ticket, 'expires_in': TICKET_MAX_AGE_S})
+
+
+def _authenticate(request) -> tuple[int, float] | None:
+    """(user_id, vencimiento epoch del JWT) desde ?ticket= o, para clientes que sí envían cabeceras, Bearer."""
+    ticket = request.GET.get('ticket')
+    if ticket:
+        try:
+            data = signing.loads(ticket, salt=TICKET_SALT, max_age=TICKET_MAX_AGE_S)
+        except signing.BadSignature:
+            return None
+        user_id, expires_at = data['u'], data['exp']
+    else:
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if not header.startswith('Bearer '):
+            return None
+        try:
+            token = JWTAuthentication().get_validated_token(header[7:])
+        except (InvalidToken, TokenError):
+            return None
+        user_id, expires_at = token.get(jwt_settings.USER_ID_CLAIM), token['exp']
+    if not _is_active(user_id):
+        return None
+    return int(user_id), float(expires_at)
+
+
+def _is_active(user_id) -> bool:
+    return User.objects.filter(id=user_id, is_active=True).exists()
+
+
+def _parse_cursor(raw: str | None) -> tuple[int, int] | None:
+    try:
+        tx_id, tr_id = (raw or '').split('-', 1)
+        return int(tx_id), int(tr_id)
+    except ValueError:
+        return None
+
+
+def _current_cursor() -> tuple[int, int]:
+    tx_id = Transaction.objects.aggregate(m=Max('id'))['m'] or 0
+    tr_id = TradeRequest.objects.aggregate(m=Max('id'))['m'] or 0
+    return tx_id, tr_id
+
+
+def _user_txs(user_id: int):
+    return Transaction.objects.filter(Q(from_wallet__user_id=user_id) | Q(to_wallet__user_id=user_id))
+
+
+def _user_requests(user_id: int):
+    return TradeRequest.objects.filter(counterparty_id=user_id)
+
+
+def _delivered(user_id: int, cursor: tuple[int, int]) -> tuple[set[int], set[int]]:
+    """Ids de la ventana de re-escaneo que ya existían bajo el cursor al abrir el stream."""
+    tx_id, tr_id = cursor
+    return (
+        set(_user_txs(user_id).filter(id__gt=tx_id - LOOKBACK_IDS, id__lte=tx_id).values_list('id', flat=True)),
+        set(_user_requests(user_id).filter(id__gt=tr_id - LOOKBACK_IDS, id__lte=tr_id).values_list('id', flat=True)),
+    )
+
+
+def _pending_events(user_id: int, cursor: tuple[int, int], seen: tuple[set[int], set[int]]):
+    """
+    Eventos no enviados desde el cursor (incluida la ventana LOOKBACK_IDS), en orden de creación, cada uno
+    con su cursor resultante. Actualiza `seen` (ids enviados por este stream dentro de la ventana).
+    """
+    tx_id, tr_id = cursor
+    seen_txs, seen_reqs = seen
+    txs = list(
+        _user_txs(user_id)
+        .filter(id__gt=tx_id - LOOKBACK_IDS).exclude(id__in=seen_txs)
+        .select_related('from_wallet__user', 'to_wallet__user')
+        .order_by('id')[:BATCH]
+    )
+    reqs = list(
+        _user_requests(user_id)
+        .filter(id__gt=tr_id - LOOKBACK_IDS).exclude(id__in=seen_reqs)
+        .select_related('requester', 'counterparty')
+        .order_by('id')[:BATCH]
+    )
+    items = [('tx', t.created_at, t) for t in txs] + [('trade_request', r.created_at, r) for r in reqs]
+    items.sort(key=lambda item: item[1])
+    events = []
+    for kind, _, obj in items:
+        if kind == 'tx':
+            tx_id = max(tx_id, obj.id)
+            seen_txs.add(obj.id)
+            data = TransactionSerializer(obj).data
+        else:
+            tr_id = max(tr_id, obj.id)
+            seen_reqs.add(obj.id)
+            data = TradeRequestSerializer(obj).data
+        events.append((kind, f'{tx_id}-{tr_id}', data))
+    seen_txs.difference_update([i for i in seen_txs if i <= tx_id - LOOKBACK_IDS])
+    seen_reqs.difference_update([i for i in seen_reqs if i <= tr_id - LOOKBACK_IDS])
+    return events, (tx_id, tr_id)
+
+
+def _format(kind: str, event_id: str, data) -> str:
+    return f'id: {event_id}\nevent: {kind}\ndata: {json.dumps(data, default=str)}\n\n'
+
+
+async def _event_stream(user_id: int, cursor: tuple[int, int] | None, expires_at: float):
+    queue = broker.subscribe(user_id)
+    try:
+        if cursor is None:
+            cursor = await sync_to_async(_current_cursor)()
+        seen = await sync_to_async(_delivered)(user_id, cursor)
+        yield f'retry: 3000\nid: {cursor[0]}-{cursor[1]}\nevent: ready\ndata: {{}}\n\n'
+        while True:
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                yield 'event: expired\ndata: {}\n\n'   # JWT vencido: el cliente pide otro ticket
+                return
+            events, cursor = await sync_to_async(_pending_events)(user_id, cursor, seen)
+            for kind, event_id, data in events:
+                yield _format(kind, event_id, data)
+            if len(events) >= BATCH:
+                continue   # quedan más pendientes
+            try:
+                await asyncio.wait_for(queue.get(), timeout=min(HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                if not await sync_to_async(_is_active)(user_id):
+                    return
+                yield ': keepalive\n\n'
+    finally:
+        broker.unsubscribe(user_id, queue)
+
+
+async def notification_stream(request):
+    if not isinstance(request, ASGIRequest):
+        # Bajo WSGI el iterador asíncrono se consumiría entero antes de responder: la petición no termina nunca
+        return JsonResponse({'detail': ASGI_REQUIRED}, status=501)
+    auth = await sync_to_async(_authenticate)(request)
+    if auth is None:
+        return HttpResponse(status=401)
+    user_id, expires_at = auth
+    cursor = _parse_cursor(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id'))
+    response = StreamingHttpResponse(_event_stream(user_id, cursor, expires_at), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
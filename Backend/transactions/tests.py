@@ -1,3 +1,545 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import signing
+from django.db import connection, transaction as dbtx
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from wallets.defaults import default_wallet_id, market_wallet_id
+
+from .expiry import expire_trade_requests
+from .matching import Matcher, _Rematch, cancel_order, to_cents
+from .models import Order, OrderFill, TradeRequest, Transaction, WalletBalance
+from .orderbook import BUY, SELL, Fill, OrderBook
+from .stream import TICKET_SALT, _delivered, _pending_events
+from .serializers import TransactionCreateSerializer
+from .utils import bulk_wallet_balances, lock_wallets, rebuild_wallet_balances
+
+
+class OrderBookTests(SimpleTestCase):
+    """Motor en memoria: precios y cantidades en centavos."""
+
+    def test_price_then_time_priority(self):
+        book = OrderBook()
+        book.rest(1, 10, SELL, 105, 10)
+        book.rest(2, 11, SELL, 100, 10)
+        book.rest(3, 12, SELL, 100, 10)
+
+        result = book.submit(4, 20, BUY, 110, 15)
+
+        self.assertEqual(result.fills, [Fill(2, 4, 100, 10), Fill(3, 4, 100, 5)])
+        self.assertEqual((result.remaining, result.rested, result.self_trade), (0, False, False))
+        self.assertEqual(book.depth()[SELL], [(100, 5), (105, 10)])
+
+    def test_partial_fill_rests_remainder_at_limit(self):
+        book = OrderBook()
+        book.rest(1, 10, SELL, 100, 5)
+
+        result = book.submit(2, 20, BUY, 101, 8)
+
+        self.assertEqual(result.fills, [Fill(1, 2, 100, 5)])
+        self.assertEqual((result.remaining, result.rested), (3, True))
+        self.assertIsNone(book.best_ask())
+        self.assertEqual(book.best_bid(), 101)
+
+    def test_no_cross_rests_without_fills(self):
+        book = OrderBook()
+        book.rest(1, 10, SELL, 100, 5)
+
+        result = book.submit(2, 20, BUY, 99, 5)
+
+        self.assertEqual(result.fills, [])
+        self.assertTrue(result.rested)
+        self.assertEqual((book.best_bid(), book.best_ask()), (99, 100))
+
+    def test_self_trade_stops_matching_and_keeps_maker(self):
+        book = OrderBook()
+        book.rest(1, 30, SELL, 99, 2)
+        book.rest(2, 10, SELL, 100, 5)
+
+        result = book.submit(3, 10, BUY, 100, 5)
+
+        self.assertEqual(result.fills, [Fill(1, 3, 99, 2)])
+        self.assertEqual((result.remaining, result.rested, result.self_trade), (3, False, True))
+        self.assertEqual(book.depth()[SELL], [(100, 5)])
+        self.assertIsNone(book.best_bid())
+
+    def test_lazy_cancel_skips_cancelled_orders(self):
+        book = OrderBook()
+        book.rest(1, 10, SELL, 100, 5)
+        book.rest(2, 11, SELL, 101, 5)
+
+        self.assertTrue(book.cancel(1))
+        self.assertFalse(book.cancel(1))
+        self.assertEqual(book.best_ask(), 101)
+
+        result = book.submit(3, 20, BUY, 101, 5)
+
+        self.assertEqual(result.fills, [Fill(2, 3, 101, 5)])
+        self.assertEqual(len(book), 0)
+
+
+@override_settings(MEMPOOL_ENABLED=False, WALLET_DEFAULT_CACHE_TTL_S=0)
+class MatcherSettleTests(TestCase):
+    """Liquidación del emparejador: fondos al momento de liquidar y órdenes canceladas en carrera."""
+
+    def setUp(self):
+        # La señal de alta crea la wallet por defecto con 5 SIM; el comprador recibe además 100 USD
+        self.seller = User.objects.create_user('seller', password='Pw123456!')
+        self.buyer = User.objects.create_user('buyer', password='Pw123456!')
+        Transaction.objects.create(
+            from_wallet_id=market_wallet_id(), to_wallet_id=default_wallet_id(self.buyer.id), amount=Decimal('100'),
+            fee=0, currency=Order.QUOTE_CURRENCY, tx_hash='fund-buyer', status=Transaction.STATUS_CONFIRMED,
+        )
+        rebuild_wallet_balances()
+        self.matcher = Matcher()
+        self.matcher.load()
+
+    def _order(self, user, side, price, amount) -> Order:
+        return Order.objects.create(user=user, wallet_id=default_wallet_id(user.id), side=side,
+                                    price=Decimal(price), amount=Decimal(amount))
+
+    def _submit(self, order):
+        return self.matcher.book.submit(order.id, order.user_id, order.side, to_cents(order.price),
+                                        to_cents(order.remaining))
+
+    def test_fill_settles_both_legs(self):
+        sell = self._order(self.seller, Order.SIDE_SELL, '10', '2')
+        buy = self._order(self.buyer, Order.SIDE_BUY, '10', '2')
+
+        self.assertEqual(self.matcher.process_pending(), 2)
+
+        sell.refresh_from_db()
+        buy.refresh_from_db()
+        self.assertEqual((sell.status, buy.status), (Order.STATUS_FILLED, Order.STATUS_FILLED))
+        fill = OrderFill.objects.get()
+        self.assertEqual((fill.base_tx.amount, fill.quote_tx.amount), (Decimal('2.00'), Decimal('20.00')))
+
+    def test_insufficient_funds_raises_rematch_for_that_party(self):
+        sell = self._order(self.seller, Order.SIDE_SELL, '60', '2')
+        self.matcher.process_pending()
+        buy = self._order(self.buyer, Order.SIDE_BUY, '60', '2')      # 120 USD con 100 de saldo
+
+        with self.assertRaises(_Rematch) as ctx:
+            self.matcher._settle([(buy, self._submit(buy))])
+        self.assertEqual(ctx.exception.cancel_id, buy.id)
+        self.assertFalse(Transaction.objects.filter(currency=Order.QUOTE_CURRENCY).exclude(tx_hash='fund-buyer').exists())
+
+        self.matcher.load()
+        self.matcher.process([buy])
+
+        buy.refresh_from_db()
+        sell.refresh_from_db()
+        self.assertEqual(buy.status, Order.STATUS_CANCELLED)
+        self.assertEqual((sell.status, sell.filled), (Order.STATUS_OPEN, Decimal('0')))
+        self.assertFalse(OrderFill.objects.exists())
+
+    def test_maker_cancelled_after_load_is_rematched(self):
+        sell = self._order(self.seller, Order.SIDE_SELL, '10', '2')
+        self.matcher.process_pending()
+        self.assertTrue(cancel_order(sell.id))        # el libro en memoria aún la tiene
+        buy = self._order(self.buyer, Order.SIDE_BUY, '10', '2')
+
+        with self.assertRaises(_Rematch) as ctx:
+            self.matcher._settle([(buy, self._submit(buy))])
+        self.assertIsNone(ctx.exception.cancel_id)
+
+        self.matcher.load()
+        self.matcher.book.rest(sell.id, sell.user_id, sell.side, to_cents(sell.price), to_cents(sell.amount))
+        self.matcher.process([buy])
+
+        buy.refresh_from_db()
+        sell.refresh_from_db()
+        self.assertEqual(sell.status, Order.STATUS_CANCELLED)
+        self.assertEqual((buy.status, buy.filled), (Order.STATUS_OPEN, Decimal('0')))
+        self.assertFalse(OrderFill.objects.exists())
+
+    def test_sub_cent_fill_quote_rounds_up(self):
+        sell = self._order(self.seller, Order.SIDE_SELL, '0.49', '1.00')
+        self._order(self.buyer, Order.SIDE_BUY, '0.49', '0.99')
+        self.matcher.process_pending()
+        self._order(self.buyer, Order.SIDE_BUY, '0.49', '1.00')       # solo quedan 0.01 SIM a 0.49
+
+        self.matcher.process_pending()
+
+        sell.refresh_from_db()
+        self.assertEqual(sell.status, Order.STATUS_FILLED)
+        quotes = sorted(OrderFill.objects.values_list('quote_tx__amount', flat=True))
+        self.assertEqual(quotes, [Decimal('0.01'), Decimal('0.49')])
+
+    def test_process_settles_by_price_then_time_with_partial_fill(self):
+        first = self._order(self.seller, Order.SIDE_SELL, '10', '1')
+        second = self._order(self.seller, Order.SIDE_SELL, '10', '1')
+        cheaper = self._order(self.seller, Order.SIDE_SELL, '9', '1')
+        self.matcher.process_pending()
+        buy = self._order(self.buyer, Order.SIDE_BUY, '10', '2.5')
+
+        self.matcher.process([buy])
+
+        fills = list(OrderFill.objects.order_by('id').values_list('maker_id', 'price', 'amount', 'quote_tx__amount'))
+        self.assertEqual(fills, [
+            (cheaper.id, Decimal('9.00'), Decimal('1.00'), Decimal('9.00')),
+            (first.id, Decimal('10.00'), Decimal('1.00'), Decimal('10.00')),
+            (second.id, Decimal('10.00'), Decimal('0.50'), Decimal('5.00')),
+        ])
+        second.refresh_from_db()
+        buy.refresh_from_db()
+        self.assertEqual((second.status, second.filled), (Order.STATUS_OPEN, Decimal('0.50')))
+        self.assertEqual(buy.status, Order.STATUS_FILLED)
+
+    def test_self_trade_is_not_settled(self):
+        self._order(self.buyer, Order.SIDE_BUY, '1', '1')
+        self.matcher.process_pending()
+        sell = self._order(self.buyer, Order.SIDE_SELL, '1', '1')
+
+        self.matcher.process([sell])
+
+        self.assertFalse(OrderFill.objects.exists())
+        sell.refresh_from_db()
+        self.assertEqual(sell.filled, Decimal('0'))
+
+    def test_order_below_min_notional_is_rejected(self):
+        client = APIClient()
+        client.force_authenticate(self.buyer)
+
+        response = client.post('/api/orders/', {'side': Order.SIDE_BUY, 'price': '0.49', 'amount': '0.01'},
+                               format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('amount', response.data)
+        self.assertFalse(Order.objects.exists())
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=0)
+class NotificationStreamTests(TestCase):
+    """El stream SSE se abre con un ticket (no con el JWT en la URL) y solo bajo ASGI."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('streamer', password='Pw123456!')
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def test_wsgi_answers_501(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=self.auth['Authorization'])
+
+        self.assertEqual(client.post('/api/notifications/stream-ticket/').status_code, 501)
+        self.assertEqual(client.get('/api/notifications/stream/').status_code, 501)
+
+    async def test_ticket_opens_stream(self):
+        client = AsyncClient()
+        ticket = (await client.post('/api/notifications/stream-ticket/', headers=self.auth)).json()['ticket']
+        self.assertNotIn(str(AccessToken.for_user(self.user)), ticket)
+
+        response = await client.get(f'/api/notifications/stream/?ticket={ticket}')
+
+        self.assertEqual(response.status_code, 200)
+        first = await anext(aiter(response.streaming_content))
+        self.assertIn(b'event: ready', first)
+        await response.streaming_content.aclose()
+
+    async def test_stream_closes_when_jwt_expires(self):
+        ticket = signing.dumps({'u': self.user.id, 'exp': time.time() - 1}, salt=TICKET_SALT)
+
+        response = await AsyncClient().get(f'/api/notifications/stream/?ticket={ticket}')
+
+        chunks = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertIn(b'event: ready', chunks)
+        self.assertTrue(chunks.endswith(b'event: expired\ndata: {}\n\n'))
+
+    def test_row_committed_late_below_the_cursor_is_still_sent(self):
+        wallet = default_wallet_id(self.user.id)
+        market = market_wallet_id()
+        early, late = (Transaction.objects.create(from_wallet_id=market, to_wallet_id=wallet, amount=Decimal('1'),
+                                                  tx_hash=f'late-{n}') for n in range(2))
+        cursor = (late.id, 0)
+        seen = _delivered(self.user.id, cursor)
+        seen[0].discard(early.id)          # como si `early` se hubiera confirmado después de enviar `late`
+
+        events, cursor = _pending_events(self.user.id, cursor, seen)
+
+        self.assertEqual([data['id'] for kind, _, data in events], [early.id])
+        self.assertEqual(cursor, (late.id, 0))
+        self.assertEqual(_pending_events(self.user.id, cursor, seen)[0], [])
+
+    async def test_invalid_ticket_is_rejected(self):
+        response = await AsyncClient().get('/api/notifications/stream/?ticket=forged')
+
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=0, MEMPOOL_ENABLED=False)
+class BulkTransferTests(TestCase):
+
+    def setUp(self):
+        self.sender = User.objects.create_user('payer', password='Pw123456!')
+        User.objects.create_user('payee', password='Pw123456!')
+        self.client = APIClient()
+        self.client.force_authenticate(self.sender)
+
+    def test_non_finite_amounts_are_row_errors(self):
+        wallet = default_wallet_id(self.sender.id)
+        transfers = [
+            {'from_wallet': wallet, 'to_username': 'payee', 'amount': 'NaN'},
+            {'from_wallet': wallet, 'to_username': 'payee', 'amount': 'Infinity'},
+            {'from_wallet': wallet, 'to_username': 'payee', 'amount': '1.00', 'fee': '-inf'},
+            {'from_wallet': wallet, 'to_username': 'payee', 'amount': '1.00'},
+        ]
+
+        response = self.client.post('/api/tx/bulk/', {'transfers': transfers, 'mode': 'best_effort'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([r['status'] for r in response.data['results']], ['error', 'error', 'error', 'created'])
+        self.assertIn('amount', response.data['results'][0]['errors'])
+        self.assertIn('amount', response.data['results'][1]['errors'])
+        self.assertIn('fee', response.data['results'][2]['errors'])
+
+    def test_non_finite_amount_fails_atomic_batch_with_400(self):
+        wallet = default_wallet_id(self.sender.id)
+        transfers = [{'from_wallet': wallet, 'to_username': 'payee', 'amount': 'nan'}]
+
+        response = self.client.post('/api/tx/bulk/', {'transfers': transfers}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['failed'], 1)
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=0, MEMPOOL_ENABLED=False)
+class WalletBalanceLedgerTests(TestCase):
+    """El libro incremental (WalletBalance) coincide con el recalculado desde el historial."""
+
+    def setUp(self):
+        self.sender = User.objects.create_user('ledger-a', password='Pw123456!')
+        self.receiver = User.objects.create_user('ledger-b', password='Pw123456!')
+        self.client = APIClient()
+        self.client.force_authenticate(self.sender)
+
+    def _send(self, amount, fee='0') -> int:
+        response = self.client.post('/api/tx/', {'to_username': 'ledger-b', 'from_wallet': default_wallet_id(self.sender.id),
+                                                 'amount': amount, 'fee': fee}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data['id']
+
+    def _ledger(self) -> dict:
+        rows = WalletBalance.objects.values_list('wallet_id', 'currency', 'confirmed', 'pending_out', 'available')
+        return {(w, c): (conf, pend, avail) for w, c, conf, pend, avail in rows if conf or pend or avail}
+
+    def test_send_confirm_and_fail_match_a_rebuild(self):
+        confirmed = self._send('2.00', '0.10')
+        failed = self._send('1.50')
+        self._send('0.25')
+        self.assertEqual(self.client.post(f'/api/tx/{confirmed}/confirm/', {}, format='json').status_code, 200)
+        self.assertEqual(self.client.post(f'/api/tx/{failed}/fail/', {}, format='json').status_code, 200)
+
+        incremental = self._ledger()
+        rebuild_wallet_balances()
+
+        self.assertEqual(incremental, self._ledger())
+        sender = incremental[(default_wallet_id(self.sender.id), Transaction.CURRENCY_SIM)]
+        self.assertEqual(sender, (Decimal('2.90'), Decimal('0.25'), Decimal('2.65')))
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=0, MEMPOOL_ENABLED=False)
+class CommittedFundsTests(TestCase):
+    """Lo que respalda órdenes activas del libro no se puede enviar (ni en envíos masivos)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('committed', password='Pw123456!')     # 5 SIM de bienvenida
+        User.objects.create_user('payee2', password='Pw123456!')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/api/orders/', {'side': Order.SIDE_SELL, 'price': '1.00', 'amount': '4.00'},
+                                    format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.wallet = default_wallet_id(self.user.id)
+
+    def test_send_cannot_spend_committed_funds(self):
+        body = {'from_wallet': self.wallet, 'to_username': 'payee2'}
+
+        self.assertEqual(self.client.post('/api/tx/', {**body, 'amount': '2.00'}, format='json').status_code, 400)
+        self.assertEqual(self.client.post('/api/tx/', {**body, 'amount': '1.00'}, format='json').status_code, 201)
+
+    def test_bulk_send_cannot_spend_committed_funds(self):
+        transfers = [
+            {'from_wallet': self.wallet, 'to_username': 'payee2', 'amount': '0.60'},
+            {'from_wallet': self.wallet, 'to_username': 'payee2', 'amount': '0.60'},
+        ]
+
+        response = self.client.post('/api/tx/bulk/', {'transfers': transfers, 'mode': 'best_effort'}, format='json')
+
+        self.assertEqual([r['status'] for r in response.data['results']], ['created', 'error'])
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=0, MEMPOOL_ENABLED=False)
+class SendBalanceLockTests(TestCase):
+    """El saldo se revalida con la wallet origen bloqueada: dos envíos validados a la vez no la sobregiran."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('locked', password='Pw123456!')     # 5 SIM de bienvenida
+        self.payee = User.objects.create_user('payee3', password='Pw123456!')
+        self.wallet = default_wallet_id(self.user.id)
+
+    def _serializer(self, amount: str):
+        data = {'from_wallet': self.wallet, 'to_wallet': default_wallet_id(self.payee.id), 'amount': amount}
+        s = TransactionCreateSerializer(data=data)
+        self.assertTrue(s.is_valid(), s.errors)
+        return s
+
+    def test_recheck_under_lock_rejects_an_overdraft(self):
+        first, second = self._serializer('3.00'), self._serializer('3.00')     # ambos ven 5 SIM libres
+
+        first.save()
+        with self.assertRaises(serializers.ValidationError):
+            second.save()
+
+        self.assertEqual(Transaction.objects.filter(from_wallet_id=self.wallet).count(), 1)
+
+    def test_lock_is_a_no_op_on_sqlite(self):
+        other = default_wallet_id(self.payee.id)
+        with dbtx.atomic(), CaptureQueriesContext(connection) as queries:
+            self.assertEqual(lock_wallets([other, self.wallet, other]), sorted([self.wallet, other]))
+
+        if connection.vendor == 'sqlite':
+            self.assertFalse(any('FOR UPDATE' in q['sql'] for q in queries.captured_queries))
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=0, TRADE_REQUEST_TTL_S=3600)
+class TradeRequestExpiryTests(TestCase):
+    """expire_trade_requests cancela solo las PENDING vencidas y no pisa una aprobación concurrente."""
+
+    def setUp(self):
+        self.requester = User.objects.create_user('req', password='Pw123456!')
+        self.counterparty = User.objects.create_user('cp', password='Pw123456!')
+
+    def _request(self, age_s: int) -> TradeRequest:
+        tr = TradeRequest.objects.create(requester=self.requester, counterparty=self.counterparty,
+                                         side=TradeRequest.SIDE_BUY, amount=Decimal('1.00'), token=f'tok-{age_s}')
+        TradeRequest.objects.filter(id=tr.id).update(created_at=timezone.now() - timedelta(seconds=age_s))
+        return tr
+
+    def _status(self, tr: TradeRequest) -> str:
+        return TradeRequest.objects.get(id=tr.id).status
+
+    def test_only_stale_pending_requests_are_cancelled(self):
+        stale, fresh = self._request(7200), self._request(60)
+
+        self.assertEqual(expire_trade_requests(timezone.now(), dry_run=True)['expired'], 1)
+        self.assertEqual(self._status(stale), TradeRequest.STATUS_PENDING)
+
+        report = expire_trade_requests(timezone.now(), batch=1)
+
+        self.assertEqual(report['expired'], 1)
+        self.assertEqual(self._status(stale), TradeRequest.STATUS_CANCELLED)
+        self.assertEqual(self._status(fresh), TradeRequest.STATUS_PENDING)
+
+    def test_concurrent_approve_is_not_overridden(self):
+        stale = self._request(7200)
+        real_filter = TradeRequest.objects.filter
+
+        def approve_before_update(*args, **kwargs):
+            if 'id__in' in kwargs:      # entre la lectura del lote y el UPDATE: otro proceso aprueba
+                real_filter(id=stale.id).update(status=TradeRequest.STATUS_APPROVED)
+            return real_filter(*args, **kwargs)
+
+        with mock.patch.object(TradeRequest.objects, 'filter', side_effect=approve_before_update):
+            report = expire_trade_requests(timezone.now())
+
+        self.assertEqual(report['expired'], 0)
+        self.assertEqual(self._status(stale), TradeRequest.STATUS_APPROVED)
+
+    def test_stale_request_cannot_be_approved(self):
+        stale = self._request(7200)
+        client = APIClient()
+        client.force_authenticate(self.counterparty)
+
+        response = client.post(f'/api/tx-requests/{stale.id}/approve/', {'password': 'Pw123456!'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], 'La solicitud expiró.')
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=0, MEMPOOL_ENABLED=False)
+class ExportTests(TestCase):
+    """GET /api/tx/export/: solo mis wallets, filtros from/to/currency y 400 ante filtros inválidos."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('exporter', password='Pw123456!')     # + crédito de bienvenida
+        other = User.objects.create_user('other', password='Pw123456!')
+        User.objects.create_user('third', password='Pw123456!')
+        self.client = APIClient()
+        for sender, to in ((self.user, 'other'), (other, 'third')):
+            self.client.force_authenticate(sender)
+            body = {'from_wallet': default_wallet_id(sender.id), 'to_username': to, 'amount': '1.00'}
+            self.assertEqual(self.client.post('/api/tx/', body, format='json').status_code, 201)
+        self.client.force_authenticate(self.user)
+        self.wallet = default_wallet_id(self.user.id)
+
+    def _export(self, **params):
+        response = self.client.get('/api/tx/export/', params)
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content)
+        return gzip.decompress(body) if params.get('gzip') else body
+
+    def _ndjson(self, **params) -> list[dict]:
+        return [json.loads(line) for line in self._export(format='ndjson', **params).decode().splitlines()]
+
+    def test_only_my_wallets_are_exported(self):
+        rows = list(csv.DictReader(io.StringIO(self._export(format='csv').decode())))
+
+        self.assertEqual(sorted(r['direction'] for r in rows), ['in', 'out'])
+        for row in rows:
+            self.assertIn(self.wallet, (int(row['from_wallet']), int(row['to_wallet'])))
+
+    def test_gzip_ndjson_matches_plain(self):
+        self.assertEqual(self._export(format='ndjson', gzip='1'), self._export(format='ndjson'))
+
+    def test_date_and_currency_filters(self):
+        today = timezone.localdate()
+
+        self.assertEqual(len(self._ndjson(to=today.isoformat())), 2)
+        self.assertEqual(self._ndjson(**{'from': (today + timedelta(days=1)).isoformat()}), [])
+        self.assertEqual(len(self._ndjson(currency='sim')), 2)
+        self.assertEqual(self._ndjson(currency='USD'), [])
+
+    def test_invalid_filters_return_400(self):
+        for params in ({'from': 'ayer'}, {'to': '2026-13-40'}, {'currency': 'XYZ'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/tx/export/', {'format': 'csv', **params})
+                self.assertEqual(response.status_code, 400)
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=0, MEMPOOL_ENABLED=False)
+class TradeRequestApproveTests(TestCase):
+    """Al aprobar, la respuesta trae los saldos de ambas partes ya actualizados (una consulta para las dos)."""
+
+    def setUp(self):
+        self.requester = User.objects.create_user('seller', password='Pw123456!')     # 5 SIM de bienvenida
+        self.counterparty = User.objects.create_user('buyer', password='Pw123456!')
+        self.tr = TradeRequest.objects.create(requester=self.requester, counterparty=self.counterparty,
+                                              side=TradeRequest.SIDE_SELL, amount=Decimal('2.00'), token='tok-approve')
+        self.client = APIClient()
+        self.client.force_authenticate(self.counterparty)
+
+    def test_approve_returns_both_balances(self):
+        with mock.patch('transactions.views.bulk_wallet_balances', wraps=bulk_wallet_balances) as batched:
+            response = self.client.post(f'/api/tx-requests/{self.tr.id}/approve/', {'password': 'Pw123456!'},
+                                        format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        batched.assert_called_once()
+        wallets = response.data['wallets']
+        self.assertEqual(wallets['requester']['wallet_id'], default_wallet_id(self.requester.id))
+        self.assertEqual(wallets['requester']['balances']['SIM'], '3.00')
+        self.assertEqual(wallets['counterparty']['balances']['SIM'], '7.00')
+        self.assertEqual(wallets['counterparty']['balances']['USD'], '0.00')
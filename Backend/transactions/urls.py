@@ -1,11 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TransactionViewSet, TradeRequestViewSet
+from .views import OrderViewSet, TransactionViewSet, TradeRequestViewSet
+from .stream import notification_stream, stream_ticket
 
 router = DefaultRouter()
 router.register(r'tx', TransactionViewSet, basename='tx')
 router.register(r'tx-requests', TradeRequestViewSet, basename='tx-request')
+router.register(r'orders', OrderViewSet, basename='order')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('notifications/stream-ticket/', stream_ticket, name='notification-stream-ticket'),
+    path('notifications/stream/', notification_stream, name='notification-stream'),
 ]
@@ -1,36 +1,214 @@
-from decimal import Decimal
-from django.db.models import Sum
+from decimal import Decimal, ROUND_UP
+from django.db import connection, transaction as dbtx
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
 
-from .models import Transaction
+from .models import Order, Transaction, WalletBalance
+
+ZERO = Decimal('0')
+# Monto USD mínimo de una orden del libro (por debajo la cotización redondea a 0.00)
+MIN_NOTIONAL = Decimal('0.01')
+
+
+def quote_amount(price: Decimal, amount: Decimal) -> Decimal:
+    """USD que paga el comprador por `amount` SIM a `price`: se redondea hacia arriba, nunca queda en 0.00."""
+    return (price * amount).quantize(MIN_NOTIONAL, rounding=ROUND_UP)
+
+
+def _clamp(available: Decimal | None) -> Decimal:
+    if available is None or available < 0:
+        return Decimal('0')
+    return available.quantize(Decimal('0.01'))
 
 
 def wallet_available_balance(wallet_id: int, currency: str = Transaction.CURRENCY_SIM) -> Decimal:
     """
-    Calcula el saldo disponible de una wallet considerando:
+    Saldo disponible de una wallet leído del libro WalletBalance (una búsqueda por índice):
     - Entradas confirmadas
     - Salidas confirmadas (monto + fee)
     - Salidas pendientes (monto + fee)
     """
-    def aggregate_amount(queryset, field: str) -> Decimal:
-        return queryset.aggregate(total=Sum(field))['total'] or Decimal('0')
+    available = (
+        WalletBalance.objects
+        .filter(wallet_id=wallet_id, currency=currency)
+        .values_list('available', flat=True)
+        .first()
+    )
+    return _clamp(available)
 
-    confirmed = Transaction.objects.filter(status=Transaction.STATUS_CONFIRMED, currency=currency)
-    pending = Transaction.objects.filter(status=Transaction.STATUS_PENDING, currency=currency)
 
-    incoming = aggregate_amount(confirmed.filter(to_wallet_id=wallet_id), 'amount')
-    outgoing = aggregate_amount(confirmed.filter(from_wallet_id=wallet_id), 'amount')
-    outgoing_fee = aggregate_amount(confirmed.filter(from_wallet_id=wallet_id), 'fee')
-    pending_out = aggregate_amount(pending.filter(from_wallet_id=wallet_id), 'amount')
-    pending_fee = aggregate_amount(pending.filter(from_wallet_id=wallet_id), 'fee')
+def wallet_balances(wallet_id: int) -> dict[str, Decimal]:
+    balances: dict[str, Decimal] = {code: Decimal('0') for code, _ in Transaction.CURRENCY_CHOICES}
+    rows = WalletBalance.objects.filter(wallet_id=wallet_id).values_list('currency', 'available')
+    for code, available in rows:
+        balances[code] = _clamp(available)
+    return balances
 
-    available = incoming - outgoing - outgoing_fee - pending_out - pending_fee
-    if available < 0:
-        return Decimal('0')
-    return available.quantize(Decimal('0.01'))
 
+def bulk_wallet_balances(wallet_ids) -> dict[int, dict[str, Decimal]]:
+    """Saldos de varias wallets en todas las monedas con una sola consulta: {wallet_id: {moneda: saldo}}."""
+    ids = list(wallet_ids)
+    result: dict[int, dict[str, Decimal]] = {
+        wallet_id: {code: Decimal('0') for code, _ in Transaction.CURRENCY_CHOICES} for wallet_id in ids
+    }
+    if not ids:
+        return result
+    rows = WalletBalance.objects.filter(wallet_id__in=ids).values_list('wallet_id', 'currency', 'available')
+    for wallet_id, code, available in rows:
+        result[wallet_id][code] = _clamp(available)
+    return result
 
-def wallet_balances(wallet_id: int) -> dict[str, Decimal]:
-    balances: dict[str, Decimal] = {}
-    for code, _ in Transaction.CURRENCY_CHOICES:
-        balances[code] = wallet_available_balance(wallet_id, code)
+
+def lock_wallets(wallet_ids) -> list[int]:
+    """
+    Bloquea (SELECT ... FOR UPDATE) las filas Wallet indicadas hasta el fin del atomic() en curso.
+    Siempre en orden de id para que dos lotes con wallets en común no se bloqueen mutuamente.
+    Sin efecto en SQLite, que ya serializa las escrituras.
+    """
+    from wallets.models import Wallet
+
+    return list(
+        Wallet.objects.select_for_update().filter(id__in=set(wallet_ids)).order_by('id').values_list('id', flat=True)
+    )
+
+
+def bulk_open_commitments(wallet_ids) -> dict[int, dict[str, Decimal]]:
+    """Lo que las órdenes activas del libro pueden llegar a gastar de cada wallet: {wallet_id: {moneda: monto}}."""
+    ids = list(wallet_ids)
+    result = {wallet_id: {Order.BASE_CURRENCY: ZERO, Order.QUOTE_CURRENCY: ZERO} for wallet_id in ids}
+    if not ids:
+        return result
+    active = Order.objects.filter(wallet_id__in=ids, status__in=Order.ACTIVE_STATUSES).order_by().values('wallet_id')
+    remaining = F('amount') - F('filled')
+    sells = active.filter(side=Order.SIDE_SELL).annotate(t=Sum(remaining)).values_list('wallet_id', 't')
+    buys = active.filter(side=Order.SIDE_BUY).annotate(
+        t=Sum(ExpressionWrapper(remaining * F('price'), output_field=DecimalField(max_digits=38, decimal_places=4)))
+    ).values_list('wallet_id', 't')
+    for wallet_id, total in sells:
+        result[wallet_id][Order.BASE_CURRENCY] = total or ZERO
+    for wallet_id, total in buys:
+        result[wallet_id][Order.QUOTE_CURRENCY] = Decimal(total or ZERO).quantize(MIN_NOTIONAL, rounding=ROUND_UP)
+    return result
+
+
+def open_commitments(wallet_id: int) -> dict[str, Decimal]:
+    return bulk_open_commitments([wallet_id])[wallet_id]
+
+
+def spendable_balance(wallet_id: int, currency: str = Transaction.CURRENCY_SIM) -> Decimal:
+    """Saldo disponible menos lo comprometido por órdenes activas: lo que se puede enviar, vender u ofertar."""
+    return wallet_available_balance(wallet_id, currency) - open_commitments(wallet_id).get(currency, ZERO)
+
+
+def bulk_spendable_balances(wallet_ids) -> dict[int, dict[str, Decimal]]:
+    """spendable_balance de varias wallets en todas las monedas (tres consultas en total)."""
+    ids = list(wallet_ids)
+    balances = bulk_wallet_balances(ids)
+    for wallet_id, committed in bulk_open_commitments(ids).items():
+        for currency, amount in committed.items():
+            balances[wallet_id][currency] -= amount
     return balances
+
+
+def order_free_balance(wallet_id: int, side: str) -> tuple[str, Decimal]:
+    """(moneda, saldo no comprometido por otras órdenes) que respalda una orden nueva de ese lado."""
+    currency = Order.QUOTE_CURRENCY if side == Order.SIDE_BUY else Order.BASE_CURRENCY
+    return currency, spendable_balance(wallet_id, currency)
+
+
+# --- Mantenimiento del libro de saldos ---
+
+def _status_effect(tx: Transaction, status: str) -> dict[int, tuple[Decimal, Decimal]]:
+    """Efecto de una transacción en el libro según su estado: {wallet_id: (confirmed, pending_out)}."""
+    debit = tx.amount + tx.fee
+    if status == Transaction.STATUS_PENDING:
+        return {tx.from_wallet_id: (ZERO, debit)}
+    if status == Transaction.STATUS_CONFIRMED:
+        effect = {tx.from_wallet_id: (-debit, ZERO)}
+        confirmed_in, pending_in = effect.get(tx.to_wallet_id, (ZERO, ZERO))
+        effect[tx.to_wallet_id] = (confirmed_in + tx.amount, pending_in)
+        return effect
+    return {}
+
+
+def _bump_balance(wallet_id: int, currency: str, confirmed: Decimal, pending_out: Decimal) -> None:
+    if not confirmed and not pending_out:
+        return
+    WalletBalance.objects.get_or_create(wallet_id=wallet_id, currency=currency)
+    WalletBalance.objects.filter(wallet_id=wallet_id, currency=currency).update(
+        confirmed=F('confirmed') + confirmed,
+        pending_out=F('pending_out') + pending_out,
+        available=F('available') + confirmed - pending_out,
+        updated_at=timezone.now(),
+    )
+
+
+def apply_balance_transition(tx: Transaction, old_status: str | None, new_status: str) -> None:
+    """
+    Ajusta WalletBalance cuando `tx` pasa de `old_status` (None = recién creada) a `new_status`.
+    Debe llamarse dentro del mismo atomic() que guarda la transacción.
+    """
+    apply_balance_transitions([tx], old_status, new_status)
+
+
+def apply_balance_transitions(txs, old_status: str | None, new_status: str) -> None:
+    """Igual que apply_balance_transition para un lote: un UPDATE por (wallet, moneda) afectada."""
+    deltas: dict[tuple[int, str], list[Decimal]] = {}
+    for tx in txs:
+        before = _status_effect(tx, old_status) if old_status else {}
+        after = _status_effect(tx, new_status)
+        for wallet_id in set(before) | set(after):
+            c0, p0 = before.get(wallet_id, (ZERO, ZERO))
+            c1, p1 = after.get(wallet_id, (ZERO, ZERO))
+            row = deltas.setdefault((wallet_id, tx.currency), [ZERO, ZERO])
+            row[0] += c1 - c0
+            row[1] += p1 - p0
+    for (wallet_id, currency), (confirmed, pending_out) in deltas.items():
+        _bump_balance(wallet_id, currency, confirmed, pending_out)
+
+
+def _lock_ledger() -> None:
+    """
+    Bloquea WalletBalance (EXCLUSIVE: se puede leer, no escribir) hasta el fin del atomic() en curso.
+    Un envío o confirmación en vuelo termina antes de que se tome el bloqueo; los siguientes esperan en su
+    UPDATE del libro y se aplican sobre las filas ya reconstruidas. Sin efecto en SQLite, donde el DELETE
+    inicial de rebuild_wallet_balances ya toma el único bloqueo de escritura de la base.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {WalletBalance._meta.db_table} IN EXCLUSIVE MODE')
+
+
+@dbtx.atomic
+def rebuild_wallet_balances() -> int:
+    """
+    Recalcula todo el libro WalletBalance desde el historial de transacciones. Devuelve filas escritas.
+    Seguro con escritores activos: el libro queda bloqueado antes de leer los agregados (ver _lock_ledger).
+    """
+    _lock_ledger()
+    WalletBalance.objects.all().delete()
+    totals: dict[tuple[int, str], list[Decimal]] = {}
+
+    def add(wallet_id: int, currency: str, confirmed: Decimal, pending_out: Decimal) -> None:
+        row = totals.setdefault((wallet_id, currency), [ZERO, ZERO])
+        row[0] += confirmed
+        row[1] += pending_out
+
+    confirmed = Transaction.objects.filter(status=Transaction.STATUS_CONFIRMED).order_by()
+    pending = Transaction.objects.filter(status=Transaction.STATUS_PENDING).order_by()
+
+    for r in confirmed.values('to_wallet_id', 'currency').annotate(total=Sum('amount')):
+        add(r['to_wallet_id'], r['currency'], r['total'] or ZERO, ZERO)
+    for r in confirmed.values('from_wallet_id', 'currency').annotate(total=Sum(F('amount') + F('fee'))):
+        add(r['from_wallet_id'], r['currency'], -(r['total'] or ZERO), ZERO)
+    for r in pending.values('from_wallet_id', 'currency').annotate(total=Sum(F('amount') + F('fee'))):
+        add(r['from_wallet_id'], r['currency'], ZERO, r['total'] or ZERO)
+
+    WalletBalance.objects.bulk_create([
+        WalletBalance(
+            wallet_id=wallet_id, currency=currency,
+            confirmed=c, pending_out=p, available=c - p,
+        )
+        for (wallet_id, currency), (c, p) in totals.items()
+    ], batch_size=1000)
+    return len(totals)
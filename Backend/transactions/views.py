@@ -1,14 +1,21 @@
+from django.conf import settings
 from django.db import models
 from django.db.models import Q
+from django.utils import timezone
 from django.contrib.auth.models import User
 from decimal import Decimal, ROUND_HALF_UP
-import secrets
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from auditlog.utils import log_action
+from api.idempotency import idempotent
+from api.pagination import KeysetPagination
+from api.renderers import CSVRenderer, NDJSONRenderer
+from users.authentication import user_wallet_ids
+from users.stepup import confirm_trade, request_step_up
 
-from .models import Transaction, TradeRequest
+from .models import Order, Transaction, TradeRequest
+from wallets.defaults import default_wallet_id, default_wallet_ids, market_wallet_id
 from wallets.models import Wallet
 from .serializers import (
     TransactionSerializer,
@@ -17,8 +24,37 @@ from .serializers import (
     TransactionFailSerializer,
     TradeRequestSerializer,
     TradeRequestCreateSerializer,
+    OrderSerializer,
+    OrderCreateSerializer,
 )
-from .utils import wallet_balances
+from .utils import bulk_wallet_balances
+from .bulk import MODE_ATOMIC, MODE_BEST_EFFORT, bulk_send
+from .matching import cancel_order
+from .expiry import expiry_cutoff, is_expired
+from .export import export_queryset, export_response
+
+MAX_BULK_TRANSFERS = 1000
+MAX_BOOK_LEVELS = 100
+
+def _settle(tx: Transaction) -> None:
+    """Confirma en línea, salvo que el mempool esté activo: entonces la sella el ensamblador de bloques."""
+    if settings.MEMPOOL_ENABLED:
+        return
+    confirm = TransactionConfirmSerializer(tx, data={}, partial=True)
+    confirm.is_valid(raise_exception=True)
+    confirm.save()
+
+def _confirm_trade(request, password, missing_detail: str) -> Response | None:
+    """Contraseña o token step-up (ver users/stepup.py). Devuelve la respuesta de error o None."""
+    if not password and not request_step_up(request):
+        return Response({'detail': missing_detail}, status=status.HTTP_400_BAD_REQUEST)
+    failed = confirm_trade(request, password)
+    if failed == 'token':
+        return Response({'detail': 'El token de confirmación es inválido o expiró.'}, status=status.HTTP_403_FORBIDDEN)
+    if failed:
+        return Response({'detail': 'Contraseña incorrecta.'}, status=status.HTTP_403_FORBIDDEN)
+    return None
+
 
 class TransactionViewSet(viewsets.ModelViewSet):
     """
@@ -27,12 +63,16 @@ class TransactionViewSet(viewsets.ModelViewSet):
     /api/tx/{id}/confirm/   POST -> marcar CONFIRMED + asignar block
     /api/tx/{id}/fail/      POST -> marcar FAILED
     Filtros: ?status=...  | ?wallet=<id> (involucrada como from o to)
+    Paginación opcional: ?limit=N[&cursor=...]
+    /api/tx/export/         GET -> historial completo en streaming (?format=csv|ndjson&from=&to=&currency=&gzip=1)
     """
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = '-created_at'
 
     def get_queryset(self):
         user = self.request.user
-        my_wallet_ids = list(user.wallets.values_list('id', flat=True))
+        my_wallet_ids = user_wallet_ids(user)
         qs = Transaction.objects.filter(
             Q(from_wallet_id__in=my_wallet_ids) | Q(to_wallet_id__in=my_wallet_ids)
         )
@@ -42,7 +82,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
             qs = qs.filter(status=status_f)
         if wallet_f:
             qs = qs.filter(Q(from_wallet_id=wallet_f) | Q(to_wallet_id=wallet_f))
-        return qs.select_related('from_wallet', 'to_wallet', 'block')
+        return qs.select_related('from_wallet__user', 'to_wallet__user', 'block')
 
     def get_serializer_class(self):
         return {
@@ -52,6 +92,50 @@ class TransactionViewSet(viewsets.ModelViewSet):
         }.get(self.action, TransactionSerializer)
 
     # acciones de negocio
+    @action(detail=False, methods=['get'], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """El formato sale de la negociación de DRF (?format= o Accept); las filas nunca pasan por el serializer."""
+        wallet_ids = user_wallet_ids(request.user)
+        try:
+            qs = export_queryset(wallet_ids, request.query_params)
+        except ValueError:
+            return Response(
+                {'detail': 'Filtros inválidos: from/to deben ser fechas ISO y currency una moneda válida.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        compress = request.query_params.get('gzip') in ('1', 'true')
+        return export_response(request, qs, wallet_ids, request.accepted_renderer.format, compress)
+
+    @action(detail=False, methods=['post'])
+    @idempotent
+    def bulk(self, request):
+        """
+        Envíos masivos. Body: { transfers: [{ from_wallet, to_wallet | to_user | to_username, amount, fee?, currency? }],
+        mode?: 'atomic' (todo o nada, por defecto) | 'best_effort' }. También acepta el arreglo directo.
+        """
+        data = request.data
+        items = data if isinstance(data, list) else data.get('transfers')
+        mode = MODE_ATOMIC if isinstance(data, list) else data.get('mode', MODE_ATOMIC)
+        if mode not in (MODE_ATOMIC, MODE_BEST_EFFORT):
+            return Response({'detail': "mode debe ser 'atomic' o 'best_effort'."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(items, list) or not items:
+            return Response({'detail': 'transfers debe ser una lista no vacía.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_BULK_TRANSFERS:
+            return Response({'detail': f'Máximo {MAX_BULK_TRANSFERS} envíos por solicitud.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows, created = bulk_send(request.user, items, mode)
+        results = []
+        for index, row in enumerate(rows):
+            if 'errors' in row:
+                results.append({'index': index, 'status': 'error', 'errors': row['errors']})
+            elif created:
+                results.append({'index': index, 'status': 'created', 'transaction': TransactionSerializer(row['tx']).data})
+            else:
+                results.append({'index': index, 'status': 'skipped'})
+        failed = sum(1 for row in rows if 'errors' in row)
+        body = {'mode': mode, 'created': len(created), 'failed': failed, 'results': results}
+        return Response(body, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+
     @action(detail=True, methods=['post'])
     def confirm(self, request, pk=None):
         tx = self.get_object()
@@ -68,28 +152,25 @@ class TransactionViewSet(viewsets.ModelViewSet):
         s.save()
         return Response(TransactionSerializer(tx).data, status=status.HTTP_200_OK)
     
+    @idempotent
     def create(self, request, *args, **kwargs):
         data = request.data.copy()
         # Permitir especificar usuario destino (id o username) en vez de wallet destino
         to_user = data.get('to_user')
         to_username = data.get('to_username')
         if 'to_wallet' not in data and (to_user or to_username):
-            try:
-                if to_user and str(to_user).isdigit():
-                    u = User.objects.get(id=int(to_user))
-                elif to_username:
-                    u = User.objects.get(username=str(to_username))
-                else:
-                    u = None
-            except User.DoesNotExist:
+            if to_user and str(to_user).isdigit():
+                u = User.objects.filter(id=int(to_user)).values_list('id', flat=True).first()
+            elif to_username:
+                u = User.objects.filter(username=str(to_username)).values_list('id', flat=True).first()
+            else:
                 u = None
             if not u:
                 return Response({'detail': 'Usuario destino no encontrado.'}, status=status.HTTP_400_BAD_REQUEST)
-            target = Wallet.objects.filter(user=u).order_by('created_at')
-            w = target.filter(name__iexact='default').first() or target.first()
-            if not w:
+            to_wallet_id = default_wallet_id(u)
+            if to_wallet_id is None:
                 return Response({'detail': 'El usuario destino no tiene wallet.'}, status=status.HTTP_400_BAD_REQUEST)
-            data['to_wallet'] = w.id
+            data['to_wallet'] = to_wallet_id
             data.pop('to_user', None); data.pop('to_username', None)
 
         s = TransactionCreateSerializer(data=data)
@@ -123,28 +204,13 @@ class TransactionViewSet(viewsets.ModelViewSet):
         return Response(TransactionSerializer(tx).data)
 
     # --- Trading simplificado (compra/venta a "mercado") ---
-    def _get_market_wallet(self) -> Wallet:
-        user, _ = User.objects.get_or_create(username='market', defaults={'email': 'market@example.com'})
-        w, created = Wallet.objects.get_or_create(
-            user=user,
-            name='Exchange',
-            defaults={
-                'pub_key': secrets.token_hex(16),
-                'priv_key_enc': 'enc:' + secrets.token_hex(32),
-            }
-        )
-        if created:
-            log_action(user, 'WALLET_CREATE', {'wallet_id': w.id, 'name': w.name})
-        return w
-
     @action(detail=False, methods=['post'])
+    @idempotent
     def buy(self, request):
         """Compra activos: el exchange envía a tu wallet. Body: { wallet, amount, fee?, currency?, method?, reference? }"""
-        password = request.data.get('password')
-        if not password:
-            return Response({'detail': 'Debes ingresar tu contraseña para confirmar la compra.'}, status=status.HTTP_400_BAD_REQUEST)
-        if not request.user.check_password(password):
-            return Response({'detail': 'Contraseña incorrecta.'}, status=status.HTTP_403_FORBIDDEN)
+        denied = _confirm_trade(request, request.data.get('password'), 'Debes ingresar tu contraseña para confirmar la compra.')
+        if denied:
+            return denied
 
         wallet_id = request.data.get('wallet')
         amount = request.data.get('amount')
@@ -167,9 +233,8 @@ class TransactionViewSet(viewsets.ModelViewSet):
         except Exception:
             return Response({'detail': 'Parámetros inválidos.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        market = self._get_market_wallet()
         payload = {
-            'from_wallet': market.id,
+            'from_wallet': market_wallet_id(),
             'to_wallet': wallet.id,
             'amount': amount_d,
             'fee': fee_d,
@@ -178,9 +243,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
         s = TransactionCreateSerializer(data=payload)
         s.is_valid(raise_exception=True)
         tx = s.save()
-        confirm = TransactionConfirmSerializer(tx, data={}, partial=True)
-        confirm.is_valid(raise_exception=True)
-        confirm.save()
+        _settle(tx)
         log_action(request.user, 'TRADE_BUY', {
             'tx_id': tx.id,
             'amount': format(amount_d, '.2f'),
@@ -191,13 +254,12 @@ class TransactionViewSet(viewsets.ModelViewSet):
         return Response(TransactionSerializer(tx).data, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=['post'])
+    @idempotent
     def sell(self, request):
         """Vende activos: tu wallet envía al exchange. Body: { wallet, amount, fee?, currency?, method?, reference? }"""
-        password = request.data.get('password')
-        if not password:
-            return Response({'detail': 'Debes ingresar tu contraseña para confirmar la venta.'}, status=status.HTTP_400_BAD_REQUEST)
-        if not request.user.check_password(password):
-            return Response({'detail': 'Contraseña incorrecta.'}, status=status.HTTP_403_FORBIDDEN)
+        denied = _confirm_trade(request, request.data.get('password'), 'Debes ingresar tu contraseña para confirmar la venta.')
+        if denied:
+            return denied
 
         wallet_id = request.data.get('wallet')
         amount = request.data.get('amount')
@@ -220,10 +282,9 @@ class TransactionViewSet(viewsets.ModelViewSet):
         except Exception:
             return Response({'detail': 'Parámetros inválidos.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        market = self._get_market_wallet()
         payload = {
             'from_wallet': wallet.id,
-            'to_wallet': market.id,
+            'to_wallet': market_wallet_id(),
             'amount': amount_d,
             'fee': fee_d,
             'currency': currency,
@@ -231,9 +292,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
         s = TransactionCreateSerializer(data=payload)
         s.is_valid(raise_exception=True)
         tx = s.save()
-        confirm = TransactionConfirmSerializer(tx, data={}, partial=True)
-        confirm.is_valid(raise_exception=True)
-        confirm.save()
+        _settle(tx)
         log_action(request.user, 'TRADE_SELL', {
             'tx_id': tx.id,
             'amount': format(amount_d, '.2f'),
@@ -259,6 +318,10 @@ class TradeRequestViewSet(viewsets.ModelViewSet):
         status_f = self.request.query_params.get('status')
         if status_f:
             qs = qs.filter(status=status_f)
+            cutoff = expiry_cutoff(timezone.now())
+            if status_f == TradeRequest.STATUS_PENDING and cutoff:
+                # Las vencidas que el barrido aún no cerró ya no se muestran como pendientes
+                qs = qs.filter(created_at__gte=cutoff)
         return qs.select_related('requester', 'counterparty')
 
     def get_serializer_class(self):
@@ -272,47 +335,46 @@ class TradeRequestViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def approve(self, request, pk=None):
         tr: TradeRequest = self.get_object()
         if tr.counterparty_id != request.user.id:
             return Response({'detail': 'No autorizado.'}, status=status.HTTP_403_FORBIDDEN)
         if tr.status != 'PENDING':
             return Response({'detail': 'Solicitud no está pendiente.'}, status=status.HTTP_400_BAD_REQUEST)
+        if is_expired(tr, timezone.now()):
+            return Response({'detail': 'La solicitud expiró.'}, status=status.HTTP_400_BAD_REQUEST)
         password = str(request.data.get('password', '')).strip()
-        if not password:
-            return Response({'detail': 'Debes ingresar tu contraseña para aprobar la solicitud.'}, status=status.HTTP_400_BAD_REQUEST)
-        if not request.user.check_password(password):
-            return Response({'detail': 'Contraseña incorrecta.'}, status=status.HTTP_403_FORBIDDEN)
+        denied = _confirm_trade(request, password, 'Debes ingresar tu contraseña para aprobar la solicitud.')
+        if denied:
+            return denied
         # Crear transacción según lado
-        req_default = Wallet.objects.filter(user=tr.requester).order_by('created_at')
-        req_w = req_default.filter(name__iexact='default').first() or req_default.first()
-        cpty_default = Wallet.objects.filter(user=tr.counterparty).order_by('created_at')
-        cpty_w = cpty_default.filter(name__iexact='default').first() or cpty_default.first()
+        defaults = default_wallet_ids([tr.requester_id, tr.counterparty_id])
+        req_w, cpty_w = defaults.get(tr.requester_id), defaults.get(tr.counterparty_id)
         if not req_w or not cpty_w:
             return Response({'detail': 'Alguna de las partes no tiene wallet.'}, status=status.HTTP_400_BAD_REQUEST)
         if tr.side == 'SELL':
-            payload = {'from_wallet': req_w.id, 'to_wallet': cpty_w.id, 'amount': tr.amount, 'fee': tr.fee, 'currency': tr.currency}
+            payload = {'from_wallet': req_w, 'to_wallet': cpty_w, 'amount': tr.amount, 'fee': tr.fee, 'currency': tr.currency}
         else:
-            payload = {'from_wallet': cpty_w.id, 'to_wallet': req_w.id, 'amount': tr.amount, 'fee': tr.fee, 'currency': tr.currency}
+            payload = {'from_wallet': cpty_w, 'to_wallet': req_w, 'amount': tr.amount, 'fee': tr.fee, 'currency': tr.currency}
         s = TransactionCreateSerializer(data=payload)
         s.is_valid(raise_exception=True)
         tx = s.save()
-        confirm = TransactionConfirmSerializer(tx, data={}, partial=True)
-        confirm.is_valid(raise_exception=True)
-        confirm.save()
+        _settle(tx)
         tr.status = 'APPROVED'
         tr.save(update_fields=['status'])
         log_action(request.user, 'TRADE_REQUEST_APPROVE', {'request_id': tr.id, 'tx_id': tx.id, 'currency': tr.currency})
+        balances = bulk_wallet_balances([req_w, cpty_w])
         wallets_payload = {
             'requester': {
-                'wallet_id': req_w.id,
-                'user_id': req_w.user_id,
-                'balances': {cur: format(balance, '.2f') for cur, balance in wallet_balances(req_w.id).items()}
+                'wallet_id': req_w,
+                'user_id': tr.requester_id,
+                'balances': {cur: format(balance, '.2f') for cur, balance in balances[req_w].items()}
             },
             'counterparty': {
-                'wallet_id': cpty_w.id,
-                'user_id': cpty_w.user_id,
-                'balances': {cur: format(balance, '.2f') for cur, balance in wallet_balances(cpty_w.id).items()}
+                'wallet_id': cpty_w,
+                'user_id': tr.counterparty_id,
+                'balances': {cur: format(balance, '.2f') for cur, balance in balances[cpty_w].items()}
             }
         }
         return Response({
@@ -331,3 +393,64 @@ class TradeRequestViewSet(viewsets.ModelViewSet):
         log_action(request.user, 'TRADE_REQUEST_REJECT', {'request_id': tr.id})
         return Response(TradeRequestSerializer(tr).data)
 TWOPLACES = Decimal('0.01')
+
+
+class OrderViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Libro de órdenes SIM/USD (lo empareja manage.py run_matcher).
+    /api/orders/              GET -> mis órdenes (?status=) | POST -> nueva orden límite (queda NEW)
+    /api/orders/{id}/cancel/  POST -> cancelar si sigue NEW u OPEN
+    /api/orders/book/         GET -> profundidad agregada por precio (?levels=N)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = '-created_at'
+
+    def get_queryset(self):
+        qs = Order.objects.filter(user=self.request.user)
+        status_f = self.request.query_params.get('status')
+        if status_f:
+            qs = qs.filter(status=status_f)
+        return qs
+
+    def get_serializer_class(self):
+        return OrderCreateSerializer if self.action == 'create' else OrderSerializer
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        s = OrderCreateSerializer(data=request.data, context={'request': request})
+        s.is_valid(raise_exception=True)
+        order = s.save()
+        log_action(request.user, 'ORDER_PLACE', {
+            'id': order.id, 'side': order.side, 'price': str(order.price), 'amount': str(order.amount),
+        })
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        order = self.get_object()
+        if not cancel_order(order.id, user=request.user):
+            return Response({'detail': 'La orden ya no está activa.'}, status=status.HTTP_400_BAD_REQUEST)
+        order.refresh_from_db()
+        log_action(request.user, 'ORDER_CANCEL', {'id': order.id})
+        return Response(OrderSerializer(order).data)
+
+    @action(detail=False, methods=['get'])
+    def book(self, request):
+        try:
+            levels = min(max(int(request.query_params.get('levels', 20)), 1), MAX_BOOK_LEVELS)
+        except ValueError:
+            return Response({'detail': 'levels inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+        open_orders = Order.objects.filter(status=Order.STATUS_OPEN).order_by()
+        depth = {}
+        for side, key, ordering in (('bids', Order.SIDE_BUY, '-price'), ('asks', Order.SIDE_SELL, 'price')):
+            rows = (
+                open_orders.filter(side=key).values('price')
+                .annotate(amount=models.Sum(models.F('amount') - models.F('filled')), orders=models.Count('id'))
+                .order_by(ordering)[:levels]
+            )
+            depth[side] = [
+                {'price': format(r['price'], '.2f'), 'amount': format(r['amount'], '.2f'), 'orders': r['orders']}
+                for r in rows
+            ]
+        return Response(depth)
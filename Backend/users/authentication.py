@@ -0,0 +1,99 @@
+"""
+Autenticación JWT con el usuario en caché.
+
+JWTAuthentication carga auth_user en cada petición y varias vistas piden enseguida los ids de las
+wallets del usuario. CachedJWTAuthentication guarda un principal compacto (campos de User salvo la
+contraseña, la huella de revocación de simplejwt e ids de wallets) en la caché de Django por
+AUTH_PRINCIPAL_TTL_S segundos; las señales de User y Wallet lo invalidan. El hash de la contraseña no
+se cachea: queda diferido y se lee de la BD solo si algo lo usa (check_password, step-up).
+
+La invalidación solo llega a todos los workers si CACHES es compartida (REDIS_URL). Con una caché
+local por proceso las señales invalidan la copia del worker que hizo el cambio, y las de los demás
+vencen a los AUTH_PRINCIPAL_LOCAL_TTL_S segundos: es el retraso máximo con el que otro worker ve una
+desactivación o un cambio de contraseña. En ambos casos la petición común no consulta la BD.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from wallets.models import Wallet
+
+CACHE_PREFIX = 'users:principal:'
+
+
+def _key(user_id) -> str:
+    return f'{CACHE_PREFIX}{user_id}'
+
+
+def cache_is_shared() -> bool:
+    """False si la caché vive en cada proceso: invalidar en uno no llega a los demás workers."""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def _principal(user: User) -> dict:
+    fields = {f.attname: getattr(user, f.attname) for f in User._meta.concrete_fields if f.attname != 'password'}
+    wallet_ids = list(Wallet.objects.filter(user_id=user.pk).order_by('id').values_list('id', flat=True))
+    return {'fields': fields, 'revoke': get_md5_hash_password(user.password), 'wallet_ids': wallet_ids}
+
+
+def _from_principal(principal: dict) -> User:
+    fields = principal['fields']
+    user = User.from_db('default', list(fields), list(fields.values()))     # password queda diferido
+    user.revoke_claim = principal['revoke']
+    user.wallet_ids = tuple(principal['wallet_ids'])
+    return user
+
+
+def load_user(user_id) -> User | None:
+    """Usuario (con .wallet_ids y .revoke_claim) desde la caché o, si no está, desde la BD."""
+    principal = cache.get(_key(user_id))
+    if principal is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            return None
+        principal = _principal(user)
+        ttl = settings.AUTH_PRINCIPAL_TTL_S if cache_is_shared() else settings.AUTH_PRINCIPAL_LOCAL_TTL_S
+        cache.set(_key(user_id), principal, ttl)
+    return _from_principal(principal)
+
+
+def invalidate_principal(user_id) -> None:
+    cache.delete(_key(user_id))
+
+
+def user_wallet_ids(user) -> list[int]:
+    """Ids de las wallets del usuario: del principal en caché si está, si no una consulta."""
+    wallet_ids = getattr(user, 'wallet_ids', None)
+    if wallet_ids is not None:
+        return list(wallet_ids)
+    return list(Wallet.objects.filter(user_id=user.pk).values_list('id', flat=True))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """Igual que JWTAuthentication (usuario activo, revocación por cambio de contraseña) pero con caché."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        user = load_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if getattr(api_settings, 'CHECK_REVOKE_TOKEN', False):
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != user.revoke_claim:
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        return user
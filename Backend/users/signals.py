@@ -4,12 +4,15 @@ from decimal import Decimal
 
 from django.contrib.auth.models import User
 from django.db import transaction
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from auditlog.utils import log_action
 from transactions.models import Transaction
 from transactions.serializers import TransactionCreateSerializer
+from transactions.utils import apply_balance_transition
+from users.authentication import invalidate_principal
+from wallets.defaults import MARKET_USERNAME, invalidate_default, market_wallet_id
 from wallets.models import Wallet
 from wallets.serializers import _gen_keypair
 
@@ -24,7 +27,7 @@ def ensure_default_wallet_and_credit(sender, instance: User, created: bool, **_k
         return
 
     # Evita ejecutar la lógica para el usuario especial del faucet
-    if instance.username == 'market':
+    if instance.username == MARKET_USERNAME:
         return
 
     # Si por alguna razón ya existe una wallet, no dupliques la operación.
@@ -37,34 +40,41 @@ def ensure_default_wallet_and_credit(sender, instance: User, created: bool, **_k
             user=instance,
             name='Default',
             pub_key=pub,
-            priv_key_enc=priv
+            priv_key_enc=priv,
+            is_default=True,
         )
         log_action(instance, 'WALLET_CREATE', {'wallet_id': default_wallet.id, 'name': default_wallet.name})
 
-        market_user, _ = User.objects.get_or_create(
-            username='market',
-            defaults={'email': 'market@example.com'}
-        )
-
-        market_wallet = market_user.wallets.filter(name='Exchange').first()
-        if not market_wallet:
-            pub_m, priv_m = _gen_keypair()
-            market_wallet = Wallet.objects.create(
-                user=market_user,
-                name='Exchange',
-                pub_key=pub_m,
-                priv_key_enc=priv_m
-            )
-            log_action(market_user, 'WALLET_CREATE', {'wallet_id': market_wallet.id, 'name': market_wallet.name})
-
         credit_serializer = TransactionCreateSerializer(data={
-            'from_wallet': market_wallet.id,
+            'from_wallet': market_wallet_id(),
             'to_wallet': default_wallet.id,
             'amount': Decimal('5'),
             'fee': Decimal('0'),
         })
         credit_serializer.is_valid(raise_exception=True)
         tx = credit_serializer.save()
+        old_status = tx.status
         tx.status = Transaction.STATUS_CONFIRMED
         tx.save(update_fields=['status'])
+        apply_balance_transition(tx, old_status, tx.status)
         log_action(instance, 'WELCOME_CREDIT', {'tx_id': tx.id, 'amount': '5'})
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance: User, **_kwargs) -> None:
+    """El principal en caché (users/authentication.py) se rehace tras cualquier cambio del usuario."""
+    # También al confirmar: una petición concurrente pudo cachear la fila vieja antes del commit
+    invalidate_principal(instance.pk)
+    transaction.on_commit(lambda: invalidate_principal(instance.pk))
+
+
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+def drop_cached_wallet_ids(sender, instance: Wallet, **_kwargs) -> None:
+    def drop() -> None:
+        invalidate_principal(instance.user_id)
+        invalidate_default(instance.user_id)
+
+    drop()
+    transaction.on_commit(drop)
@@ -0,0 +1,56 @@
+"""
+Token de confirmación (step-up) para operaciones de trading.
+
+POST /api/auth/step-up/ verifica la contraseña una vez (PBKDF2) y devuelve un token firmado con
+SECRET_KEY, ligado al usuario, al alcance 'trade' y a la huella del hash de la contraseña actual.
+buy/sell/approve y la creación de solicitudes lo aceptan en lugar de la contraseña, así las
+operaciones siguientes de la sesión solo verifican una firma HMAC (más la lectura del hash por pk: el
+principal en caché no lo incluye, ver authentication.py). Cambiar la contraseña lo revoca.
+"""
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+SALT = 'users.step-up'
+SCOPE_TRADE = 'trade'
+HEADER = 'X-Step-Up-Token'
+FIELD = 'step_up_token'
+
+
+def _fingerprint(user) -> str:
+    return salted_hmac(SALT, user.password).hexdigest()[:16]
+
+
+def issue_step_up(user, scope: str = SCOPE_TRADE) -> str:
+    return signing.dumps({'uid': user.pk, 'scope': scope, 'pwd': _fingerprint(user)}, salt=SALT)
+
+
+def verify_step_up(user, token: str, scope: str = SCOPE_TRADE) -> bool:
+    try:
+        data = signing.loads(token, salt=SALT, max_age=settings.STEP_UP_TTL_S)
+    except signing.BadSignature:   # incluye SignatureExpired
+        return False
+    return (
+        data.get('uid') == user.pk
+        and data.get('scope') == scope
+        and constant_time_compare(str(data.get('pwd', '')), _fingerprint(user))
+    )
+
+
+def request_step_up(request) -> str | None:
+    """Token enviado en la cabecera X-Step-Up-Token o en el campo step_up_token del body."""
+    token = request.headers.get(HEADER)
+    if not token and hasattr(request.data, 'get'):
+        token = request.data.get(FIELD)
+    return str(token or '').strip() or None
+
+
+def confirm_trade(request, password: str | None) -> str | None:
+    """
+    None si la operación está confirmada (token step-up válido o contraseña correcta);
+    si no, 'token' o 'password' según lo que falló.
+    """
+    token = request_step_up(request)
+    if token:
+        return None if verify_step_up(request.user, token) else 'token'
+    return None if request.user.check_password(password) else 'password'
@@ -1,3 +1,108 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from wallets.defaults import default_wallet_id
+
+from .authentication import _key, load_user
+from .stepup import HEADER, SCOPE_TRADE, issue_step_up
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=0)
+class CachedPrincipalTests(TestCase):
+    """El principal en caché no guarda el hash de la contraseña y respeta cambios hechos por otros procesos."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('cached', password='Pw123456!')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_password_hash_is_not_cached(self):
+        load_user(self.user.id)
+
+        principal = cache.get(_key(self.user.id))
+        self.assertNotIn('password', principal['fields'])
+        self.assertNotIn(self.user.password, str(principal))
+        self.assertTrue(load_user(self.user.id).check_password('Pw123456!'))     # se lee de la BD al usarlo
+
+    def test_deactivation_invalidates_the_principal(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    @override_settings(AUTH_PRINCIPAL_LOCAL_TTL_S=0)
+    def test_local_cache_expires_changes_from_other_workers(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        User.objects.filter(id=self.user.id).update(is_active=False)       # sin señales: como otro worker
+
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    def test_cached_principal_skips_identity_queries(self):
+        for shared in (False, True):
+            cache.clear()
+            with mock.patch('users.authentication.cache_is_shared', return_value=shared):
+                load_user(self.user.id)
+                with self.assertNumQueries(0):
+                    user = load_user(self.user.id)
+            self.assertEqual((user.username, user.is_active), ('cached', True))
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=0, MEMPOOL_ENABLED=False)
+class StepUpTokenTests(APITestCase):
+    """POST /api/auth/step-up/ entrega un token que confirma compras sin contraseña hasta que expira o se revoca."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('stepup', password='Pw123456!')
+        self.client.force_authenticate(self.user)
+
+    def _issue(self) -> str:
+        response = self.client.post('/api/auth/step-up/', {'password': 'Pw123456!'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['token']
+
+    def _buy(self, token: str):
+        body = {'wallet': default_wallet_id(self.user.id), 'amount': '1.00'}
+        return self.client.post('/api/tx/buy/', body, format='json', headers={HEADER: token})
+
+    def test_issue_requires_the_password(self):
+        self.assertEqual(self.client.post('/api/auth/step-up/', {}, format='json').status_code, 400)
+        self.assertEqual(self.client.post('/api/auth/step-up/', {'password': 'otra'}, format='json').status_code, 403)
+
+        response = self.client.post('/api/auth/step-up/', {'password': 'Pw123456!'}, format='json')
+        self.assertEqual((response.data['scope'], response.data['expires_in']), (SCOPE_TRADE, 300))
+
+    def test_token_confirms_several_trades(self):
+        token = self._issue()
+
+        self.assertEqual(self._buy(token).status_code, 201)
+        self.assertEqual(self._buy(token).status_code, 201)
+
+    def test_expired_token_is_rejected(self):
+        token = self._issue()
+
+        with override_settings(STEP_UP_TTL_S=-1):
+            response = self._buy(token)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['detail'], 'El token de confirmación es inválido o expiró.')
+
+    def test_password_change_revokes_the_token(self):
+        token = self._issue()
+        self.user.set_password('Nuevo123456!')
+        self.user.save()
+
+        self.assertEqual(self._buy(token).status_code, 403)
+
+    def test_token_of_another_user_or_scope_is_rejected(self):
+        other = User.objects.create_user('stepup-b', password='Pw123456!')
+
+        self.assertEqual(self._buy(issue_step_up(other)).status_code, 403)
+        self.assertEqual(self._buy(issue_step_up(self.user, scope='admin')).status_code, 403)
+        self.assertEqual(self._buy(issue_step_up(self.user)).status_code, 201)
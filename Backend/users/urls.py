@@ -1,10 +1,11 @@
 # Backend/users/urls.py
 from django.urls import path
-from .views import RegisterView, MeView, HealthView, UsersListView  # ajusta si tus nombres difieren
+from .views import RegisterView, MeView, HealthView, UsersListView, StepUpView  # ajusta si tus nombres difieren
 
 urlpatterns = [
     path('users/register/', RegisterView.as_view(), name='register'),
     path('users/me/', MeView.as_view(), name='me'),
     path('users/', UsersListView.as_view(), name='users-list'),
     path('health/', HealthView.as_view(), name='health'),
+    path('auth/step-up/', StepUpView.as_view(), name='step_up'),
 ]
@@ -3,7 +3,9 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from django.contrib.auth.models import User
+from django.conf import settings
 from .serializers import RegisterSerializer, UserSerializer
+from .stepup import SCOPE_TRADE, issue_step_up
 
 
 class HealthView(APIView):
@@ -37,3 +39,19 @@ class UsersListView(APIView):
         qs = User.objects.all().order_by('id')
         data = UserSerializer(qs, many=True).data
         return Response(data)
+
+
+class StepUpView(APIView):
+    """Verifica la contraseña una vez y entrega un token corto para confirmar operaciones de trading."""
+    permission_classes = [permissions.IsAuthenticated]
+    def post(self, request):
+        password = request.data.get('password')
+        if not password:
+            return Response({'detail': 'Debes ingresar tu contraseña.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not request.user.check_password(password):
+            return Response({'detail': 'Contraseña incorrecta.'}, status=status.HTTP_403_FORBIDDEN)
+        return Response({
+            'token': issue_step_up(request.user),
+            'scope': SCOPE_TRADE,
+            'expires_in': settings.STEP_UP_TTL_S,
+        })
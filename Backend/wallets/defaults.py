@@ -0,0 +1,111 @@
+"""
+Resolución de la wallet por defecto de un usuario y de la wallet del exchange ("market").
+
+La wallet por defecto es la marcada con is_default (índice parcial único, una por usuario). Los ids
+resueltos se guardan en memoria del proceso por WALLET_DEFAULT_CACHE_TTL_S segundos; las señales
+de Wallet invalidan la entrada del dueño en este proceso y el TTL acota lo que otros workers tardan
+en ver un cambio de wallet por defecto (algo poco frecuente).
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction as dbtx
+
+from auditlog.utils import log_action
+
+from .models import Wallet
+from .serializers import _gen_keypair
+
+MARKET_USERNAME = 'market'
+MARKET_WALLET_NAME = 'Exchange'
+
+_lock = threading.Lock()
+_defaults: dict[int, tuple[int, float]] = {}       # user_id -> (wallet_id, expira)
+_market: list[tuple[int, int, float]] = []         # [(user_id, wallet_id, expira)] o vacío
+
+
+def _fresh(entry: tuple[int, float] | None) -> int | None:
+    if entry is not None and entry[1] > time.monotonic():
+        return entry[0]
+    return None
+
+
+def _remember(user_id: int, wallet_id: int) -> None:
+    with _lock:
+        _defaults[user_id] = (wallet_id, time.monotonic() + settings.WALLET_DEFAULT_CACHE_TTL_S)
+
+
+def default_wallet_ids(user_ids) -> dict[int, int]:
+    """{user_id: id de su wallet por defecto}; una consulta indexada para los que no están en memoria."""
+    result, missing = {}, []
+    for user_id in set(user_ids):
+        cached = _fresh(_defaults.get(user_id))
+        if cached is None:
+            missing.append(user_id)
+        else:
+            result[user_id] = cached
+    if missing:
+        rows = Wallet.objects.filter(user_id__in=missing, is_default=True).order_by().values_list('user_id', 'id')
+        for user_id, wallet_id in rows:
+            result[user_id] = wallet_id
+            _remember(user_id, wallet_id)
+    return result
+
+
+def default_wallet_id(user_id: int) -> int | None:
+    """Id de la wallet por defecto del usuario (None si no tiene wallets)."""
+    return default_wallet_ids([user_id]).get(user_id)
+
+
+def invalidate_default(user_id: int) -> None:
+    with _lock:
+        _defaults.pop(user_id, None)
+        if _market and _market[0][0] == user_id:
+            _market.clear()
+
+
+def set_default(wallet: Wallet) -> None:
+    """Marca `wallet` como la de por defecto de su dueño (desmarca la anterior en el mismo atomic)."""
+    with dbtx.atomic():
+        Wallet.objects.filter(user_id=wallet.user_id, is_default=True).exclude(id=wallet.id).update(is_default=False)
+        Wallet.objects.filter(id=wallet.id).update(is_default=True)
+    wallet.is_default = True
+    invalidate_default(wallet.user_id)
+    dbtx.on_commit(lambda: invalidate_default(wallet.user_id))
+
+
+def promote_default(user_id: int) -> int | None:
+    """Si el usuario se quedó sin wallet por defecto, marca la más antigua. Devuelve su id."""
+    if Wallet.objects.filter(user_id=user_id, is_default=True).exists():
+        return default_wallet_id(user_id)
+    oldest = Wallet.objects.filter(user_id=user_id).order_by('created_at', 'id').first()
+    if oldest is None:
+        return None
+    set_default(oldest)
+    return oldest.id
+
+
+def market_wallet_id() -> int:
+    """Wallet del exchange (contraparte de compras, ventas y del crédito de bienvenida); la crea si falta."""
+    cached = _fresh(_market[0][1:] if _market else None)
+    if cached is not None:
+        return cached
+    user, _ = User.objects.get_or_create(username=MARKET_USERNAME, defaults={'email': 'market@example.com'})
+    wallet_id = default_wallet_id(user.id)
+    if wallet_id is None:
+        pub, priv = _gen_keypair()
+        try:
+            with dbtx.atomic():
+                wallet = Wallet.objects.create(
+                    user=user, name=MARKET_WALLET_NAME, pub_key=pub, priv_key_enc=priv, is_default=True,
+                )
+            log_action(user, 'WALLET_CREATE', {'wallet_id': wallet.id, 'name': wallet.name})
+            wallet_id = wallet.id
+        except IntegrityError:
+            # Otro proceso la creó a la vez (índice único parcial): se usa la suya
+            wallet_id = Wallet.objects.get(user=user, is_default=True).id
+    with _lock:
+        _market[:] = [(user.id, wallet_id, time.monotonic() + settings.WALLET_DEFAULT_CACHE_TTL_S)]
+    return wallet_id
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_default_wallets(apps, schema_editor):
+    # Misma regla que se usaba en cada consulta: la más antigua llamada "default", si no la más antigua
+    Wallet = apps.get_model('wallets', 'Wallet')
+    chosen: dict[int, tuple[int, bool]] = {}
+    rows = Wallet.objects.order_by('user_id', 'created_at', 'id').values_list('user_id', 'id', 'name')
+    for user_id, wallet_id, name in rows.iterator(chunk_size=5000):
+        named = name.lower() == 'default'
+        current = chosen.get(user_id)
+        if current is None or (named and not current[1]):
+            chosen[user_id] = (wallet_id, named)
+    ids = [wallet_id for wallet_id, _ in chosen.values()]
+    for start in range(0, len(ids), 500):
+        Wallet.objects.filter(id__in=ids[start:start + 500]).update(is_default=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='is_default',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_default_wallets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='wallet',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_default', True)), fields=('user',), name='wallet_one_default_per_user'),
+        ),
+    ]
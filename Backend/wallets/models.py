@@ -6,6 +6,7 @@ class Wallet(models.Model):
     name = models.CharField(max_length=120)
     pub_key = models.CharField(max_length=128, unique=True)     # clave pública (demo)
     priv_key_enc = models.CharField(max_length=256)             # privada “ofuscada” (NO exponer)
+    is_default = models.BooleanField(default=False)                # destino de envíos por usuario (una por usuario)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -14,6 +15,10 @@ class Wallet(models.Model):
             models.Index(fields=['user']),
             models.Index(fields=['created_at']),
         ]
+        constraints = [
+            # Índice parcial único: también resuelve "la wallet por defecto de X" en una búsqueda
+            models.UniqueConstraint(fields=['user'], condition=models.Q(is_default=True), name='wallet_one_default_per_user'),
+        ]
 
     def __str__(self):
         return f'{self.name} ({self.pub_key[:8]}...)'
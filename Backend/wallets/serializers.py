@@ -31,7 +31,8 @@ class WalletCreateSerializer(serializers.ModelSerializer):
             user=request.user,
             name=name,
             pub_key=pub,
-            priv_key_enc=priv
+            priv_key_enc=priv,
+            is_default=not Wallet.objects.filter(user=request.user).exists(),   # la primera queda como principal
         )
 
 class WalletSerializer(serializers.ModelSerializer):
@@ -43,20 +44,26 @@ class WalletSerializer(serializers.ModelSerializer):
     class Meta:
         model = Wallet
         # OJO: no exponemos priv_key_enc
-        fields = ('id', 'name', 'pub_key', 'created_at', 'balance', 'balance_sim', 'balance_usd', 'balance_btc')
-        read_only_fields = ('id', 'pub_key', 'created_at')
+        fields = ('id', 'name', 'pub_key', 'is_default', 'created_at', 'balance', 'balance_sim', 'balance_usd', 'balance_btc')
+        read_only_fields = ('id', 'pub_key', 'is_default', 'created_at')
+
+    def _balance(self, obj: Wallet, currency: str) -> str:
+        # La vista precalcula los saldos de todas las wallets en context['balances'] (una sola consulta)
+        balances = self.context.get('balances')
+        if balances is not None and obj.id in balances:
+            balance = balances[obj.id][currency]
+        else:
+            balance = wallet_available_balance(obj.id, currency)
+        return format(balance, '.2f')
 
     def get_balance(self, obj: Wallet) -> str:
         return self.get_balance_sim(obj)
 
     def get_balance_sim(self, obj: Wallet) -> str:
-        balance = wallet_available_balance(obj.id, Transaction.CURRENCY_SIM)
-        return format(balance, '.2f')
+        return self._balance(obj, Transaction.CURRENCY_SIM)
 
     def get_balance_usd(self, obj: Wallet) -> str:
-        balance = wallet_available_balance(obj.id, Transaction.CURRENCY_USD)
-        return format(balance, '.2f')
+        return self._balance(obj, Transaction.CURRENCY_USD)
 
     def get_balance_btc(self, obj: Wallet) -> str:
-        balance = wallet_available_balance(obj.id, Transaction.CURRENCY_BTC)
-        return format(balance, '.2f')
+        return self._balance(obj, Transaction.CURRENCY_BTC)
@@ -1,3 +1,105 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction as dbtx
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from . import defaults
+from .defaults import default_wallet_id, promote_default
+from .models import Wallet
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=60)
+class DefaultWalletTests(APITestCase):
+    """Una sola wallet por defecto por usuario; marcarla o borrarla invalida el id en memoria."""
+
+    def setUp(self):
+        self._clear_cache()
+        self.addCleanup(self._clear_cache)
+        self.user = User.objects.create_user('owner', password='Pw123456!')
+        self.client.force_authenticate(self.user)
+        self.first = default_wallet_id(self.user.id)
+        response = self.client.post('/api/wallets/', {'name': 'Ahorros'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.second = Wallet.objects.get(user=self.user, name='Ahorros').id
+
+    @staticmethod
+    def _clear_cache():
+        # La caché es del proceso: sin limpiarla, un id de usuario reusado tras el rollback vería otra wallet
+        with defaults._lock:
+            defaults._defaults.clear()
+            defaults._market.clear()
+
+    def _default_ids(self) -> list[int]:
+        return list(Wallet.objects.filter(user=self.user, is_default=True).values_list('id', flat=True))
+
+    def test_first_wallet_is_the_only_default(self):
+        self.assertEqual(self._default_ids(), [self.first])
+        with self.assertRaises(IntegrityError), dbtx.atomic():
+            Wallet.objects.filter(id=self.second).update(is_default=True)
+
+    def test_set_default_moves_the_flag_and_refreshes_the_cache(self):
+        response = self.client.post(f'/api/wallets/{self.second}/default/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_default'])
+        self.assertEqual(self._default_ids(), [self.second])
+        self.assertEqual(default_wallet_id(self.user.id), self.second)
+
+    def test_deleting_the_default_promotes_the_oldest_and_refreshes_the_cache(self):
+        self.client.post(f'/api/wallets/{self.second}/default/')
+        self.assertEqual(default_wallet_id(self.user.id), self.second)    # queda en memoria
+
+        self.assertEqual(self.client.delete(f'/api/wallets/{self.second}/').status_code, 204)
+
+        self.assertEqual(self._default_ids(), [self.first])
+        self.assertEqual(default_wallet_id(self.user.id), self.first)
+
+    def test_promote_default_marks_the_oldest_only_when_missing(self):
+        self.assertEqual(promote_default(self.user.id), self.first)       # ya tiene: no cambia nada
+        Wallet.objects.filter(user=self.user).update(is_default=False)
+
+        self.assertEqual(promote_default(self.user.id), self.first)
+        self.assertEqual(self._default_ids(), [self.first])
+
+
+@override_settings(WALLET_DEFAULT_CACHE_TTL_S=0)
+class WalletBalanceEndpointTests(APITestCase):
+    """GET /api/wallets/ y /api/wallets/{id}/ leen los saldos de todas las wallets con una sola consulta."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('balances', password='Pw123456!')     # 5 SIM de bienvenida
+        self.client.force_authenticate(self.user)
+
+    def _list_queries(self) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/wallets/').status_code, 200)
+        return len(queries)
+
+    def test_list_reports_every_currency(self):
+        self.client.post('/api/wallets/', {'name': 'Vacía'}, format='json')
+
+        main, empty = sorted(self.client.get('/api/wallets/').data, key=lambda row: not row['is_default'])
+
+        self.assertEqual((main['balance_sim'], main['balance']), ('5.00', '5.00'))
+        self.assertEqual((main['balance_usd'], main['balance_btc']), ('0.00', '0.00'))
+        self.assertEqual((empty['name'], empty['balance_sim']), ('Vacía', '0.00'))
+
+    def test_list_queries_do_not_grow_with_wallets(self):
+        baseline = self._list_queries()
+        for name in ('B', 'C', 'D'):
+            self.client.post('/api/wallets/', {'name': name}, format='json')
+
+        self.assertEqual(self._list_queries(), baseline)
+
+    def test_retrieve_uses_the_batched_balances(self):
+        wallet = default_wallet_id(self.user.id)
+
+        with mock.patch('wallets.serializers.wallet_available_balance') as per_wallet:
+            response = self.client.get(f'/api/wallets/{wallet}/')
+
+        self.assertEqual(response.data['balance_sim'], '5.00')
+        per_wallet.assert_not_called()
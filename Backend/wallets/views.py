@@ -1,8 +1,12 @@
+from django.db import transaction as dbtx
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
+from .defaults import promote_default, set_default
 from .models import Wallet
 from .serializers import WalletSerializer, WalletCreateSerializer
 from auditlog.utils import log_action
+from transactions.utils import bulk_wallet_balances
 
 class IsOwner(permissions.BasePermission):
     """Solo el dueño puede ver/modificar su wallet."""
@@ -14,6 +18,7 @@ class WalletViewSet(viewsets.ModelViewSet):
     /api/wallets/           GET (list) -> mis wallets
                             POST       -> crear (genera claves)
     /api/wallets/{id}/      GET, DELETE (solo si es mía)
+    /api/wallets/{id}/default/  POST -> marcarla como wallet por defecto (destino de envíos por usuario)
     """
     permission_classes = [permissions.IsAuthenticated, IsOwner]
 
@@ -27,13 +32,30 @@ class WalletViewSet(viewsets.ModelViewSet):
         wallet = serializer.save()
         log_action(self.request.user, 'WALLET_CREATE', {'wallet_id': wallet.id, 'name': wallet.name})
 
+    def _balances_context(self, wallets) -> dict:
+        return {**self.get_serializer_context(), 'balances': bulk_wallet_balances(w.id for w in wallets)}
+
+    def list(self, request, *args, **kwargs):
+        wallets = list(self.filter_queryset(self.get_queryset()))
+        return Response(WalletSerializer(wallets, many=True, context=self._balances_context(wallets)).data)
+
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         self.check_object_permissions(request, instance)
-        return Response(WalletSerializer(instance).data)
+        return Response(WalletSerializer(instance, context=self._balances_context([instance])).data)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         self.check_object_permissions(request, instance)
-        instance.delete()
+        with dbtx.atomic():
+            instance.delete()
+            if instance.is_default:
+                promote_default(request.user.id)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'])
+    def default(self, request, pk=None):
+        instance = self.get_object()
+        set_default(instance)
+        log_action(request.user, 'WALLET_SET_DEFAULT', {'wallet_id': instance.id})
+        return Response(WalletSerializer(instance, context=self._balances_context([instance])).data)
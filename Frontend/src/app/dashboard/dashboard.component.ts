@@ -164,7 +164,7 @@ export class DashboardComponent implements OnInit, AfterViewInit, OnDestroy {
       txs: this.txsApi.list().pipe(catchError(() => of([] as Transaction[]))),
       blocks: this.blocksApi.list().pipe(catchError(() => of([]))),
       mining: this.blocksApi.miningSummary().pipe(catchError(() => of({ total_btc: '0', total_attempts: 0 } as MiningSummary))),
-      prices: this.priceApi.list().pipe(catchError(() => of([] as PriceTick[]))),
+      prices: this.priceApi.recent(20).pipe(catchError(() => of([] as PriceTick[]))),
       audit: this.auditApi.list().pipe(catchError(() => of([]))),
       notices: this.tradeReqApi.list('incoming', 'PENDING').pipe(catchError(() => of([] as TradeRequest[])))
     }).subscribe({
@@ -192,11 +192,10 @@ export class DashboardComponent implements OnInit, AfterViewInit, OnDestroy {
         this.setupTransactionViewport();
 
         this.priceSeries = [...prices]
-          .sort((a, b) => new Date(a.ts).getTime() - new Date(b.ts).getTime())
-          .slice(-20);
+          .sort((a, b) => new Date(a.ts).getTime() - new Date(b.ts).getTime());
         // Mostrar último precio y cambio respecto al primero del rango cargado
-        const latest = prices[prices.length - 1];
-        const first = prices[0];
+        const latest = this.priceSeries[this.priceSeries.length - 1];
+        const first = this.priceSeries[0];
         const latestPrice = latest ? this.round2(Number(latest.price_usd)) : null;
         const firstPrice = first ? this.round2(Number(first.price_usd)) : null;
         this.lastPrice = latestPrice;
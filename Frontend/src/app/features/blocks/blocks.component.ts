@@ -2,8 +2,9 @@ import { Component, OnInit, OnDestroy } from '@angular/core';
 import { CommonModule, NgFor, DatePipe } from '@angular/common';
 import { FormsModule } from '@angular/forms';
 import { HttpErrorResponse } from '@angular/common/http';
-import { Subscription } from 'rxjs';
-import { BlocksService, Block, MiningSummary } from './blocks.service';
+import { Subscription, timer } from 'rxjs';
+import { switchMap, takeWhile } from 'rxjs/operators';
+import { BlocksService, Block, MiningSummary, SimulateMiningResponse } from './blocks.service';
 
 @Component({
   selector: 'app-blocks',
@@ -26,6 +27,7 @@ export class BlocksComponent implements OnInit, OnDestroy {
   totalMinedBtc = 0;
   minedAttempts = 0;
   private summarySub?: Subscription;
+  private miningJobSub?: Subscription;
 
   constructor(private service: BlocksService) {}
 
@@ -36,6 +38,7 @@ export class BlocksComponent implements OnInit, OnDestroy {
 
   ngOnDestroy(): void {
     this.summarySub?.unsubscribe();
+    this.miningJobSub?.unsubscribe();
   }
 
   refresh(): void {
@@ -104,26 +107,46 @@ export class BlocksComponent implements OnInit, OnDestroy {
     this.infoMessage = null;
     this.rowMiningId = block.id;
     this.service.simulateMining(block.id).subscribe({
+      next: (job) => this.watchMiningJob(block, job),
+      error: (err: HttpErrorResponse) => {
+        this.rowMiningId = null;
+        if (err?.status === 401) {
+          this.error = 'Debes iniciar sesión para minar bloques.';
+        } else if (err?.status === 409) {
+          this.error = err.error?.detail || `El bloque #${block.height} no se puede minar ahora.`;
+        } else {
+          this.error = 'No se pudo simular el minado.';
+        }
+      }
+    });
+  }
+
+  // El minado corre en el servidor en segundo plano: se consulta el trabajo hasta que termine
+  private watchMiningJob(block: Block, job: SimulateMiningResponse): void {
+    this.infoMessage = job.message;
+    this.miningJobSub?.unsubscribe();
+    this.miningJobSub = timer(1000, 1000).pipe(
+      switchMap(() => this.service.miningJob(job.job_id)),
+      takeWhile((res) => res.status === 'PENDING' || res.status === 'RUNNING', true)
+    ).subscribe({
       next: (res) => {
+        if (res.status === 'PENDING' || res.status === 'RUNNING') { return; }
         this.rowMiningId = null;
+        const rate = res.hashrate ? ` (${Math.round(res.hashrate).toLocaleString()} H/s)` : '';
         if (res.success) {
-          this.blocks = this.blocks.filter(b => b.id !== block.id);
-          const baseMessage = res.message || `Bloque #${block.height} minado.`;
+          const baseMessage = (res.message || `Bloque #${block.height} minado.`) + rate;
           this.infoMessage = baseMessage;
           this.loadMiningSummary(baseMessage);
         } else {
-          this.blocks = this.blocks.filter(b => b.id !== block.id);
-          this.error = res.message || `Imposible minar el bloque #${block.height}.`;
+          this.infoMessage = null;
+          this.error = (res.message || `Imposible minar el bloque #${block.height}.`) + rate;
           this.loadMiningSummary();
         }
       },
-      error: (err: HttpErrorResponse) => {
+      error: () => {
         this.rowMiningId = null;
-        if (err?.status === 401) {
-          this.error = 'Debes iniciar sesión para minar bloques.';
-        } else {
-          this.error = 'No se pudo simular el minado.';
-        }
+        this.infoMessage = null;
+        this.error = 'No se pudo consultar el estado del minado.';
       }
     });
   }
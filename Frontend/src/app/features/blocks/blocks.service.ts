@@ -18,11 +18,23 @@ export interface CreateBlockPayload {
   nonce: string;
 }
 
+export type MiningJobStatus = 'PENDING' | 'RUNNING' | 'DONE' | 'FAILED';
+
 export interface SimulateMiningResponse {
+  job_id: number;
+  status: MiningJobStatus;
   success: boolean;
   message: string;
   block_id: number;
+  reason?: string;
   reward_btc?: string;
+  winning_nonce?: string;
+  pow_hash?: string;
+  difficulty_bits?: number;
+  hashes?: number;
+  elapsed_s?: number;
+  hashrate?: number;
+  worker_hashrates?: number[];
 }
 
 export interface MiningSummary {
@@ -48,6 +60,10 @@ export class BlocksService {
     return this.http.post<SimulateMiningResponse>(`${this.base}${blockId}/simulate-mining/`, {});
   }
 
+  miningJob(jobId: number): Observable<SimulateMiningResponse> {
+    return this.http.get<SimulateMiningResponse>(`${this.base}mining-jobs/${jobId}/`);
+  }
+
   miningSummary(): Observable<MiningSummary> {
     return this.http.get<MiningSummary>(`${this.base}mining-summary/`);
   }
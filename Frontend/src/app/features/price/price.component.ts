@@ -31,19 +31,17 @@ export class PriceComponent implements AfterViewInit, OnDestroy {
 
   ngAfterViewInit(): void {
     this.fetch();
-    // Simulación automática permanente
-    this.timer = setInterval(() => this.simulateOnce(), 8000);
-    // Ejecuta una de inmediato para arrancar la serie
-    this.simulateOnce();
+    // Los ticks los genera el simulador del servidor (manage.py simulate_prices); aquí solo se leen
+    this.timer = setInterval(() => this.fetch(true), 8000);
   }
 
   private clearTimer(): void { if (this.timer) { clearInterval(this.timer); this.timer = undefined; } }
   ngOnDestroy(): void { this.clearTimer(); this.chart?.destroy(); }
 
-  fetch(): void {
-    this.loading = true;
+  fetch(silent = false): void {
+    this.loading = !silent;
     this.error = null;
-    this.price.list().subscribe({
+    this.price.recent().subscribe({
       next: data => {
         this.ticks = [...data].sort((a, b) => new Date(b.ts).getTime() - new Date(a.ts).getTime());
         this.loading = false;
@@ -56,21 +54,6 @@ export class PriceComponent implements AfterViewInit, OnDestroy {
     });
   }
 
-  private simulateOnce(): void {
-    const last = this.ticks[0] ? Number(this.ticks[0].price_usd) : 20;
-    // random walk: variación entre -3% y +3%
-    const pct = (Math.random() - 0.5) * 0.06;
-    const next = Math.max(0.1, this.round2(last * (1 + pct)));
-    const ts = new Date().toISOString();
-    const priceBtc = this.round8(next / 68000 * (1 + (Math.random() - 0.5) * 0.02));
-    const volumeSim = this.round2(12000 + Math.random() * 15000);
-    const note = this.pickNote();
-    this.price.create({ ts, price_usd: next, price_btc: priceBtc, volume_sim: volumeSim, notes: note }).subscribe({
-      next: tick => { this.ticks = [tick, ...this.ticks].slice(0, 100); this.renderChart(); },
-      error: () => { /* silencioso: puede fallar si no hay auth */ }
-    });
-  }
-
   private renderChart(): void {
     const canvas = document.getElementById('priceChart') as HTMLCanvasElement | null;
     if (!canvas) return;
@@ -116,28 +99,4 @@ export class PriceComponent implements AfterViewInit, OnDestroy {
     }
     return Math.round((value + Number.EPSILON) * 100) / 100;
   }
-
-  private round8(value: number): number {
-    if (!Number.isFinite(value)) {
-      return 0;
-    }
-    return Math.round((value + Number.EPSILON) * 1e8) / 1e8;
-  }
-
-  private pickNote(): string {
-    const notes = [
-      'Volumen institucional destacado',
-      'Mercado asiático en sesión alcista',
-      'Cobertura tras publicación de PMI',
-      'Rumores de ETF impulsan compras',
-      'Corrección técnica intradía',
-      'Entrada de liquidez desde OTC',
-      'Sesión europea con fuerte volatilidad',
-      'Rebalanceo de portafolios de fondos',
-      'Soporte crítico defendido por traders',
-      'Flujo mixto en exchanges locales'
-    ];
-    const idx = Math.floor(Math.random() * notes.length);
-    return notes[idx];
-  }
 }
@@ -1,6 +1,7 @@
 import { Injectable } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
 import { Observable } from 'rxjs';
+import { map } from 'rxjs/operators';
 import { environment } from '../../../environments/environment';
 
 export interface PriceTick {
@@ -18,8 +19,11 @@ export class PriceService {
 
   constructor(private http: HttpClient) {}
 
-  list(): Observable<PriceTick[]> {
-    return this.http.get<PriceTick[]>(this.base);
+  /** Últimos `limit` ticks (más nuevo primero) con la paginación keyset; nunca baja el histórico entero. */
+  recent(limit = 100): Observable<PriceTick[]> {
+    return this.http
+      .get<{ next: string | null; results: PriceTick[] }>(this.base, { params: { limit } })
+      .pipe(map(page => page.results));
   }
 
   latest(): Observable<PriceTick> {
@@ -56,4 +56,9 @@ export class TransactionsService {
   fail(id: number): Observable<Transaction> {
     return this.http.post<Transaction>(`${this.base}${id}/fail/`, {});
   }
+
+  /** Ticket corto para abrir el stream SSE (el JWT no viaja en la URL). 501 si el servidor no es ASGI. */
+  streamTicket(): Observable<{ ticket: string; expires_in: number }> {
+    return this.http.post<{ ticket: string; expires_in: number }>(`${environment.apiUrl}/notifications/stream-ticket/`, {});
+  }
 }
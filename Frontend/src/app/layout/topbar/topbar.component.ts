@@ -1,9 +1,11 @@
 import { Component, HostListener, OnDestroy, OnInit } from '@angular/core';
 import { Router, RouterLink, RouterLinkActive, NavigationEnd } from '@angular/router';
 import { CommonModule } from '@angular/common';
+import { HttpErrorResponse } from '@angular/common/http';
 import { Subscription, forkJoin, of } from 'rxjs';
 import { catchError } from 'rxjs/operators';
 import { AuthService } from '../../core/auth.service';
+import { environment } from '../../../environments/environment';
 import { TradeRequestsService, TradeRequest } from '../../features/trade/trade-requests.service';
 import { TransactionsService, Transaction } from '../../features/txs/transactions.service';
 
@@ -35,6 +37,10 @@ export class TopbarComponent implements OnInit, OnDestroy {
   private routerSub?: Subscription;
   private meSub?: Subscription;
   private notifTimer?: ReturnType<typeof setInterval>;
+  private notifStream?: EventSource;
+  private notifReconnect?: ReturnType<typeof setTimeout>;
+  private notifRefreshQueued?: ReturnType<typeof setTimeout>;
+  private lastEventId = '';
   onlyDashboard = false;
   isAuthPage = false;
   notifOpen = false;
@@ -234,10 +240,82 @@ export class TopbarComponent implements OnInit, OnDestroy {
   }
 
   private startNotificationPoll(): void {
-    if (this.notifTimer || !this.isLoggedIn || !this.currentUserId) {
+    if (this.notifTimer || this.notifStream || !this.isLoggedIn || !this.currentUserId) {
       return;
     }
-    this.notifTimer = setInterval(() => this.refreshNotifications(), 20000);
+    if (typeof EventSource === 'undefined') {
+      // Navegador sin SSE: sondeo clásico
+      this.notifTimer = setInterval(() => this.refreshNotifications(), 20000);
+      return;
+    }
+    this.openNotificationStream();
+  }
+
+  /** Stream SSE: el servidor empuja solo transacciones/solicitudes nuevas; refrescamos al recibir una. */
+  private openNotificationStream(): void {
+    this.txApi.streamTicket().subscribe({
+      next: ({ ticket }) => this.connectNotificationStream(ticket),
+      error: (err: HttpErrorResponse) => {
+        if (!this.isLoggedIn || !this.currentUserId) { return; }
+        if (err?.status === 501) {
+          // Servidor sin ASGI (runserver): sondeo clásico
+          this.notifTimer = setInterval(() => this.refreshNotifications(), 20000);
+        } else {
+          this.scheduleStreamReconnect();
+        }
+      }
+    });
+  }
+
+  private connectNotificationStream(ticket: string): void {
+    if (this.notifStream || !this.isLoggedIn || !this.currentUserId) { return; }
+    const params = new URLSearchParams({ ticket });
+    if (this.lastEventId) {
+      params.set('last_event_id', this.lastEventId);
+    }
+    const stream = new EventSource(`${environment.apiUrl}/notifications/stream/?${params.toString()}`);
+    const onEvent = (ev: MessageEvent) => {
+      this.lastEventId = ev.lastEventId || this.lastEventId;
+      if (ev.type !== 'ready') {
+        this.queueNotificationRefresh();
+      }
+    };
+    stream.addEventListener('ready', onEvent as EventListener);
+    stream.addEventListener('tx', onEvent as EventListener);
+    stream.addEventListener('trade_request', onEvent as EventListener);
+    // Venció el JWT con que se abrió: nuevo ticket (el interceptor refresca el token) y reconexión
+    stream.addEventListener('expired', () => {
+      stream.close();
+      this.notifStream = undefined;
+      this.openNotificationStream();
+    });
+    stream.onerror = () => {
+      // EventSource reintenta solo, pero el ticket ya no sirve pasado su plazo: se reabre con uno nuevo
+      stream.close();
+      this.notifStream = undefined;
+      this.scheduleStreamReconnect();
+    };
+    this.notifStream = stream;
+  }
+
+  private scheduleStreamReconnect(): void {
+    if (this.notifReconnect) { return; }
+    this.notifReconnect = setTimeout(() => {
+      this.notifReconnect = undefined;
+      if (this.isLoggedIn && this.currentUserId && !this.notifStream) {
+        this.refreshNotifications();
+        this.openNotificationStream();
+      }
+    }, 5000);
+  }
+
+  private queueNotificationRefresh(): void {
+    // Agrupa ráfagas de eventos en un solo refresco
+    if (this.notifRefreshQueued) { return; }
+    this.notifRefreshQueued = setTimeout(() => {
+      this.notifRefreshQueued = undefined;
+      this.refreshNotifications(true);
+    }, 300);
   }
 
   private stopNotificationPoll(): void {
@@ -245,6 +323,17 @@ export class TopbarComponent implements OnInit, OnDestroy {
       clearInterval(this.notifTimer);
       this.notifTimer = undefined;
     }
+    this.notifStream?.close();
+    this.notifStream = undefined;
+    if (this.notifReconnect) {
+      clearTimeout(this.notifReconnect);
+      this.notifReconnect = undefined;
+    }
+    if (this.notifRefreshQueued) {
+      clearTimeout(this.notifRefreshQueued);
+      this.notifRefreshQueued = undefined;
+    }
+    this.lastEventId = '';
   }
 
 